@@ -0,0 +1,26 @@
+from importlib.util import module_from_spec, spec_from_file_location
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def sim_module():
+    spec = spec_from_file_location("traderone_sim", os.path.join(ROOT, "traderone-sim.py"))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def sim(sim_module):
+    """
+    A fresh simulator served on a free localhost port.
+    """
+    server = sim_module.SimServer(("127.0.0.1", 0), sim_module.Simulator(seed=1), sim_module.Faults()).start()
+    yield server
+    server.stop()
@@ -0,0 +1,95 @@
+import pytest
+
+import traderone as t1
+
+np = pytest.importorskip("numpy")
+
+
+def test_loads_csv_with_timestamps(tmp_path):
+    path = tmp_path/"prices.csv"
+    path.write_text("timestamp, a, b\n0,1,2\n60,1.5,2.5\n")
+    tickers, prices, timestamps = t1.load_price_history(str(path))
+    assert tickers == ["a", "b"]
+    assert prices.tolist() == [[1, 2], [1.5, 2.5]]
+    assert timestamps.tolist() == [0, 60]
+
+
+def test_loads_csv_without_timestamps(tmp_path):
+    path = tmp_path/"prices.csv"
+    path.write_text("a,b,c\n1,2,3\n")
+    tickers, prices, timestamps = t1.load_price_history(str(path))
+    assert tickers == ["a", "b", "c"]
+    assert prices.tolist() == [[1, 2, 3]]
+    assert timestamps is None
+
+
+def test_replay_settles_trades_at_the_tick_price():
+    exchange = t1.ReplayExchange(["a", "b"], np.array([[2.0, 1.0], [4.0, 1.0]]), fee_rate=0.01)
+    a, b = t1.SimWallet("a", 1), t1.SimWallet("b", 1)
+    assert exchange.trade(0.5, a, b)[t1.Transaction.TAG_COMPLETED]
+    # 0.5 a is worth 1 b, less a 1% fee of 0.01 b
+    assert (a.balance, b.balance) == pytest.approx((0.5, 1.99))
+    assert not exchange.trade(1, a, b)[t1.Transaction.TAG_COMPLETED]
+    assert a.balance == pytest.approx(0.5)
+    exchange.set_tick(1)
+    assert exchange.trade(0.5, a, b)[t1.Transaction.TAG_COMPLETED]
+    assert (a.balance, b.balance) == pytest.approx((0, 3.97))
+    assert exchange.get_total_trades() == 2
+    assert exchange.get_total_fees() == pytest.approx(0.03)
+
+
+def test_two_ticker_backtest_accounts_for_every_trade():
+    """
+    Replays the backtest's own trades by hand and checks it reports the same trades, fees and PnL.
+    """
+    prices = np.array([[1.0, 1.0], [2.0, 1.0], [2.0, 1.0], [1.0, 1.0], [1.0, 2.0]])
+    backtest = t1.Backtest(["a", "b"], prices, fee_rate=0.01)
+    exchange = backtest.get_exchange()
+    trades = []
+    trade = exchange.trade
+    def record(amount, from_wallet, to_wallet):
+        trades.append((exchange.get_tick(), amount, from_wallet.get_ticker(), to_wallet.get_ticker()))
+        return trade(amount, from_wallet, to_wallet)
+    exchange.trade = record
+    result = backtest.run()
+    assert trades
+    balances = {"a": 1.0, "b": 1.0}
+    fees = 0
+    for tick, amount, from_ticker, to_ticker in trades:
+        price = dict(zip(["a", "b"], prices[tick]))
+        received = amount*price[from_ticker]/price[to_ticker]
+        balances[from_ticker] -= amount
+        balances[to_ticker] += received*0.99
+        fees += received*0.01*price[to_ticker]
+    end_value = balances["a"]*prices[-1][0]+balances["b"]*prices[-1][1]
+    assert (result["ticks"], result["cycles"], result["trades"]) == (5, 5, len(trades))
+    assert result["fees"] == pytest.approx(fees)
+    assert result["start_value"] == pytest.approx(2)
+    assert result["hold_value"] == pytest.approx(3)
+    assert result["end_value"] == pytest.approx(end_value)
+    assert result["pnl"] == pytest.approx(end_value-2)
+    assert [wallet.balance for wallet in backtest.wallets] == pytest.approx([balances["a"], balances["b"]])
+
+
+def test_flat_prices_cost_nothing_but_fees():
+    backtest = t1.Backtest(["a", "b", "c"], np.ones((20, 3)), fee_rate=0.01)
+    result = backtest.run()
+    assert result["pnl"] == pytest.approx(-result["fees"])
+
+
+def test_backtest_skips_ticks_within_the_cycle_delay():
+    tickers, prices = t1.generate_price_path(1, 100, 3)
+    result = t1.Backtest(tickers, prices, np.arange(100, dtype=float)*10, min_cycle_delay=30).run()
+    assert result["cycles"] == 34
+
+
+def test_snapshot_rates_match_pair_rates():
+    tickers, prices = t1.generate_price_path(2, 10, 4)
+    exchange = t1.ReplayExchange(tickers, prices)
+    for tick in range(10):
+        exchange.set_tick(tick)
+        for quote in tickers:
+            snapshot = exchange.get_rate_snapshot(tickers, quote)
+            for ticker in tickers:
+                assert snapshot.get_rates()[ticker] == pytest.approx(exchange.get_exchange_rate(ticker, quote))
+                assert exchange.get_rate(ticker, quote, snapshot) == pytest.approx(exchange.get_exchange_rate(ticker, quote))
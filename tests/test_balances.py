@@ -0,0 +1,37 @@
+from threading import Event
+
+import pytest
+
+import traderone as t1
+
+
+class BlockingWallet(t1.Wallet):
+    __slots__ = ("release",)
+
+    def __init__(self, ticker: str, release: Event):
+        super().__init__(ticker, ticker, None)
+        self.release = release
+
+    def get_live_balance(self) -> float | None:
+        self.release.wait(10)
+        return 1
+
+
+def test_queued_refresh_times_out():
+    """
+    Every balance worker is busy, so the refresh never starts; it still times out.
+    """
+    release = Event()
+    busy = [BlockingWallet(str(n), release) for n in range(t1.BALANCE_REFRESH_MAX_WORKERS)]
+    queued = BlockingWallet("queued", release)
+    trader = t1.Trader(t1.Exchange("test"), [queued], balance_refresh_timeout=0.2)
+    try:
+        for wallet in busy:
+            wallet.refresh_cached_balance(block=False)
+        with pytest.raises(TimeoutError, match="queued"):
+            trader.refresh_wallets_cached_balances(block=True)
+        assert queued.get_refresh_started() is None
+    finally:
+        release.set()
+    queued.refresh_future.result(10)
+    assert queued.get_cached_balance() == 1
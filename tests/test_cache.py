@@ -0,0 +1,115 @@
+import pytest
+
+import traderone as t1
+
+T = t1.Tests.Test1
+
+
+class CountingExchange(t1.ExchangeWrapper):
+    """
+    Counts the snapshots read through it, and the tickers each asked for.
+    """
+    def __init__(self, exchange):
+        super().__init__(exchange)
+        self.requests: list[list[str]] = []
+
+    def get_rate_snapshot(self, tickers, quote):
+        self.requests.append(sorted(tickers))
+        return super().get_rate_snapshot(tickers, quote)
+
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(t1, "monotonic", clock)
+    return clock
+
+
+def build(ttl: float = 5, max_size: int = 1024, **kwargs):
+    exchange = T.Test1Exchange(num_tickers=4, seed=1, log_shuffles=False)
+    exchange.shuffle_tickers()
+    counting = CountingExchange(exchange)
+    return exchange, counting, t1.CachingExchange(counting, ttl=ttl, max_size=max_size, **kwargs)
+
+
+def test_prices_expire_after_the_ttl(clock):
+    cache = t1.PriceCache(ttl=5)
+    cache.put("a", 2)
+    clock.now += 4.9
+    assert cache.get("a") == 2
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert cache.get_hits() == 1 and cache.get_misses() == 1
+
+
+def test_size_bound_evicts_the_least_recently_used():
+    cache = t1.PriceCache(ttl=60, max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache.entries) == 2
+
+
+def test_counters_track_hits_and_misses(clock):
+    exchange, counting, caching = build()
+    a, b, c, d = exchange.get_supported_tickers()
+    caching.get_exchange_rate(a, d)
+    assert (caching.get_cache().get_hits(), caching.get_cache().get_misses()) == (0, 1)
+    caching.get_exchange_rate(a, d)
+    caching.get_rate_snapshot([a, b], d)
+    assert (caching.get_cache().get_hits(), caching.get_cache().get_misses()) == (2, 2)
+    assert counting.requests == [[a], [b]]
+
+
+def test_cached_rates_match_the_exchange_until_they_expire(clock):
+    exchange, counting, caching = build()
+    tickers = exchange.get_supported_tickers()
+    snapshot = caching.get_rate_snapshot(tickers, tickers[0])
+    assert snapshot.get_rates() == pytest.approx(exchange.get_rate_snapshot(tickers, tickers[0]).get_rates())
+    exchange.shuffle_tickers()
+    assert caching.get_rate_snapshot(tickers, tickers[0]).get_rates() == snapshot.get_rates()
+    assert len(counting.requests) == 1
+    clock.now += 5
+    assert caching.get_rate_snapshot(tickers, tickers[0]).get_rates() == pytest.approx(exchange.get_rate_snapshot(tickers, tickers[0]).get_rates())
+    assert len(counting.requests) == 2
+
+
+def test_trade_invalidates_the_traded_tickers(clock):
+    exchange, counting, caching = build()
+    a, b, c, d = exchange.get_supported_tickers()
+    wallets = {ticker: T.Test1Wallet(ticker, ticker, ticker, 10) for ticker in (a, b)}
+    caching.get_rate_snapshot([a, b, c], d)
+    caching.trade(1, wallets[a], wallets[b])
+    caching.get_rate_snapshot([a, b, c], d)
+    assert counting.requests[-1] == [a, b]
+
+
+def test_trade_many_invalidates_every_traded_ticker(clock):
+    exchange, counting, caching = build()
+    a, b, c, d = exchange.get_supported_tickers()
+    wallets = {ticker: T.Test1Wallet(ticker, ticker, ticker, 10) for ticker in (a, b, c)}
+    caching.get_rate_snapshot([a, b, c], d)
+    caching.trade_many([(1, wallets[a], wallets[b]), (1, wallets[b], wallets[c])])
+    caching.get_rate_snapshot([a, b, c], d)
+    assert counting.requests[-1] == [a, b, c]
+
+
+def test_trades_keep_the_cache_when_told_to(clock):
+    exchange, counting, caching = build(invalidate_on_trade=False)
+    a, b, c, d = exchange.get_supported_tickers()
+    wallets = {ticker: T.Test1Wallet(ticker, ticker, ticker, 10) for ticker in (a, b)}
+    caching.get_rate_snapshot([a, b], d)
+    caching.trade(1, wallets[a], wallets[b])
+    caching.get_rate_snapshot([a, b], d)
+    assert len(counting.requests) == 1
@@ -0,0 +1,103 @@
+import asyncio
+
+import traderone as t1
+
+
+class ImpactExchange(t1.Exchange):
+    def get_price_impact(self, amount, from_ticker, to_ticker):
+        return 0.25
+
+    def get_fees(self, trades, snapshot=None):
+        return [0.5 for _ in trades]
+
+
+class AsyncImpactExchange(t1.AsyncExchange):
+    def get_price_impact(self, amount, from_ticker, to_ticker):
+        return 0.25
+
+    async def get_fees(self, trades, snapshot=None):
+        return [0.5 for _ in trades]
+
+
+class PriceExchange(t1.Exchange):
+    def __init__(self):
+        super().__init__("prices")
+        self.pulls = 0
+
+    def get_rate_snapshot(self, tickers, quote):
+        self.pulls += 1
+        return t1.RateSnapshot(quote, {ticker: 2 for ticker in tickers if ticker != quote})
+
+    def subscribe_prices(self, tickers, reference, interval=1):
+        # Pushed, never polled, so only the fallback fills it
+        return t1.PriceFeed(self, tickers, reference)
+
+
+class AsyncPriceExchange(t1.AsyncExchange):
+    def __init__(self):
+        super().__init__("prices")
+        self.pulls = 0
+
+    async def get_rate_snapshot(self, tickers, quote):
+        self.pulls += 1
+        return t1.RateSnapshot(quote, {ticker: 2 for ticker in tickers if ticker != quote})
+
+
+def test_wrappers_forward():
+    exchange = ImpactExchange("impact")
+    for wrapper in (t1.CachingExchange(exchange), t1.InstrumentedExchange(exchange), t1.StreamingExchange(exchange)):
+        assert wrapper.get_title() == "impact"
+        assert wrapper.get_exchange() is exchange
+        assert wrapper.get_price_impact(1, "a", "b") == 0.25
+        assert wrapper.get_fees([(1, None, None)]) == [0.5]
+
+
+def test_async_wrappers_forward():
+    exchange = AsyncImpactExchange("impact")
+    for wrapper in (t1.AsyncCachingExchange(exchange), t1.AsyncInstrumentedExchange(exchange), t1.AsyncStreamingExchange(exchange)):
+        assert wrapper.get_exchange() is exchange
+        assert wrapper.get_price_impact(1, "a", "b") == 0.25
+        assert asyncio.run(wrapper.get_fees([(1, None, None)])) == [0.5]
+
+
+def test_impact_reference_is_clamped():
+    cache = t1.PriceImpactCache()
+    samples = cache.get_samples([(1e-9, "a", "b")], {"a": 1e-6})
+    assert samples[0] == (1e-6, "a", "b")
+    assert cache.get_samples([(1, "a", "b")])[0] == (min(t1.IMPACT_BUCKETS)*t1.IMPACT_REFERENCE, "a", "b")
+
+
+def test_impact_curve():
+    cache = t1.PriceImpactCache()
+    samples = cache.get_samples([(100, "a", "b")])
+    # Pays out 2 b per a, minus a proportional impact of amount/1000
+    cache.set_samples(samples, [2*amount*(1-amount/1000) for amount, _, _ in samples])
+    assert cache.get_samples([(100, "a", "b")]) == []
+    assert abs(cache.get_cost(100, "a", "b")-0.1) < 1e-3
+    assert cache.get_cost(10**6, "a", "b") is None
+
+
+def test_streaming_falls_back_once_then_reads_the_feed():
+    exchange = PriceExchange()
+    streaming = t1.StreamingExchange(exchange)
+    assert streaming.get_rate_snapshot(["a", "b"], "q").get_rates() == {"a": 2, "b": 2, "q": 1}
+    assert streaming.get_rate_snapshot(["a", "b"], "q").get_rates() == {"a": 2, "b": 2, "q": 1}
+    assert streaming.get_exchange_rate("a", "b") == 1
+    assert streaming.get_fallbacks() == 1
+    assert exchange.pulls == 1
+
+
+def test_async_streaming_shares_the_feed_logic():
+    assert not asyncio.iscoroutinefunction(t1.AsyncPollingPriceFeed.refresh)
+    async def run():
+        exchange = AsyncPriceExchange()
+        streaming = t1.AsyncStreamingExchange(exchange, interval=0.01)
+        assert (await streaming.get_rate_snapshot(["a", "b"], "q")).get_rates() == {"a": 2, "b": 2, "q": 1}
+        assert streaming.get_fallbacks() == 1
+        await asyncio.sleep(0.05)
+        assert (await streaming.get_rate_snapshot(["a", "b"], "q")).get_rates() == {"a": 2, "b": 2, "q": 1}
+        assert await streaming.get_exchange_rate("a", "b") == 1
+        assert streaming.get_fallbacks() == 1
+        assert streaming.get_feed().get_updates() > 1
+        streaming.stop()
+    asyncio.run(run())
@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import traderone as t1
+
+IMPACT = 0.02
+COST = 0.003 # Uniswap v2's taker fee, and the Solana slippage set to match it
+RATE = 2
+AMOUNT = 10
+
+
+def expected_fee() -> float:
+    """
+    The fee on AMOUNT at RATE, in the to-ticker: the cost compounded with IMPACT.
+    """
+    return RATE*AMOUNT*(1-(1-IMPACT)*(1-COST))
+
+
+def get_uniswap_fee(sim) -> float:
+    tu = pytest.importorskip("traderone_uniswap")
+    from eth_account import Account
+    account = Account.from_key("0x"+"11"*32)
+    exchange = tu.UniswapExchange(account.address, account.key.hex(), sim.get_url())
+    exchange.get_price_impact = lambda amount, from_ticker, to_ticker: IMPACT
+    bat, dai = tu.UniswapWallet("bat", exchange), tu.UniswapWallet("dai", exchange)
+    return exchange.get_fee(AMOUNT, bat, dai, t1.RateSnapshot("dai", {"bat": RATE}))
+
+
+def get_solana_fee(sim) -> float:
+    ts = pytest.importorskip("traderone_solana")
+    rpc = ts.SolanaRPC(sim.get_url(), jupiter_url=sim.get_url())
+    exchange = ts.SolanaExchange("key", sim.get_url(), slippage=int(COST*100*100), agent=SimpleNamespace(wallet_address="owner", rpc_url=sim.get_url()), rpc=rpc)
+    exchange.get_price_impact = lambda amount, from_ticker, to_ticker: IMPACT
+    sol, usdc = (ts.SolanaWallet(ticker, exchange) for ticker in ("SOL", "USDC"))
+    async def fee() -> float:
+        try:
+            return await exchange.get_fee(AMOUNT, sol, usdc, t1.RateSnapshot("USDC", {"SOL": RATE}))
+        finally:
+            await rpc.close()
+    return asyncio.run(fee())
+
+
+def test_uniswap_fee_is_an_amount(sim):
+    assert get_uniswap_fee(sim) == pytest.approx(expected_fee())
+
+
+def test_solana_fee_is_an_amount(sim):
+    assert get_solana_fee(sim) == pytest.approx(expected_fee())
+
+
+def test_exchanges_agree_on_fee_units(sim):
+    assert get_uniswap_fee(sim) == pytest.approx(get_solana_fee(sim))
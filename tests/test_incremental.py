@@ -0,0 +1,62 @@
+from random import Random
+
+import pytest
+
+import traderone as t1
+
+T = t1.Tests.Test1
+
+
+class RecordingTraderOne(t1.TraderOne):
+    """
+    Keeps every cycle's candidates as (stage, ticker, trade_balance).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history: list[list[tuple[int, str, float]]] = []
+
+    def get_rebalance_candidates(self, wallets, rates):
+        candidates = super().get_rebalance_candidates(wallets, rates)
+        self.history.append([(stage, wallet.get_ticker(), trade_balance) for stage, wallet, trade_balance in candidates])
+        return candidates
+
+
+def run(seed: int, num_tickers: int, cycles: int, max_shuffle: int = 3, **kwargs) -> RecordingTraderOne:
+    """
+    A seeded portfolio with uneven starting balances, traded for cycles cycles.
+    """
+    rng = Random(seed)
+    exchange = T.Test1Exchange(num_tickers=num_tickers, max_shuffle=max_shuffle, seed=seed, log_shuffles=False)
+    wallets = [T.Test1Wallet(ticker, ticker, ticker, rng.uniform(0.5, 5)) for ticker in exchange.get_supported_tickers()]
+    trader = RecordingTraderOne(exchange, wallets, min_cycle_delay=0, use_kernel=False, **kwargs)
+    for _ in range(cycles):
+        exchange.shuffle_tickers()
+        trader.do_trade_cycle()
+    return trader
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("num_tickers", [3, 8, 60])
+@pytest.mark.parametrize("max_downs", [100, 1])
+def test_incremental_bound_zero_matches_full(seed, num_tickers, max_downs, caplog):
+    with caplog.at_level("WARNING", logger="traderone"):
+        full = run(seed, num_tickers, 60, max_downs=max_downs)
+        full_warnings = [record.getMessage() for record in caplog.records]
+        caplog.clear()
+        incremental = run(seed, num_tickers, 60, max_downs=max_downs, incremental=0)
+        incremental_warnings = [record.getMessage() for record in caplog.records]
+    assert incremental.history == full.history
+    assert [wallet.balance for wallet in incremental.get_wallets()] == [wallet.balance for wallet in full.get_wallets()]
+    assert incremental.down_tracker == full.down_tracker
+    # Wallets that did not change are not worked through, so only their down streaks are warned about again
+    assert set(incremental_warnings) <= set(full_warnings)
+    if max_downs == 1:
+        assert incremental_warnings
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_first_cycle_is_full(seed):
+    """
+    With no previous rates (NaN) every wallet has changed, so even a loose bound checks them all.
+    """
+    assert run(seed, 40, 1, incremental=0.5).history == run(seed, 40, 1).history
@@ -0,0 +1,79 @@
+from random import Random
+
+import pytest
+
+import traderone as t1
+
+np = pytest.importorskip("numpy")
+T = t1.Tests.Test1
+
+
+class RecordingTraderOne(t1.TraderOne):
+    """
+    Keeps every cycle's candidates as (stage, ticker, trade_balance).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history: list[list[tuple[int, str, float]]] = []
+
+    def get_rebalance_candidates(self, wallets, rates):
+        candidates = super().get_rebalance_candidates(wallets, rates)
+        self.history.append([(stage, wallet.get_ticker(), trade_balance) for stage, wallet, trade_balance in candidates])
+        return candidates
+
+
+def run(seed: int, num_tickers: int, cycles: int, **kwargs) -> RecordingTraderOne:
+    """
+    A seeded portfolio with uneven starting balances, traded for cycles cycles.
+    """
+    rng = Random(seed)
+    exchange = T.Test1Exchange(num_tickers=num_tickers, seed=seed, log_shuffles=False)
+    wallets = [T.Test1Wallet(ticker, ticker, ticker, rng.uniform(0.5, 5)) for ticker in exchange.get_supported_tickers()]
+    trader = RecordingTraderOne(exchange, wallets, min_cycle_delay=0, **kwargs)
+    for _ in range(cycles):
+        exchange.shuffle_tickers()
+        trader.do_trade_cycle()
+    return trader
+
+
+def warnings(caplog) -> int:
+    return sum(1 for record in caplog.records if "has been down" in record.getMessage())
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("num_tickers", [3, 8, 100])
+@pytest.mark.parametrize("max_downs", [100, 1])
+def test_kernel_matches_scalar(seed, num_tickers, max_downs, caplog):
+    with caplog.at_level("WARNING", logger="traderone"):
+        scalar = run(seed, num_tickers, 60, use_kernel=False, max_downs=max_downs)
+        scalar_warnings = warnings(caplog)
+        caplog.clear()
+        kernel = run(seed, num_tickers, 60, use_kernel=True, max_downs=max_downs)
+        kernel_warnings = warnings(caplog)
+    assert kernel.history == scalar.history
+    assert [wallet.balance for wallet in kernel.get_wallets()] == [wallet.balance for wallet in scalar.get_wallets()]
+    assert kernel.down_tracker == scalar.down_tracker
+    assert kernel_warnings == scalar_warnings
+    if max_downs == 1:
+        assert scalar_warnings > 0
+
+
+def test_kernel_first_cycle():
+    """
+    With no previous rates (NaN) nothing counts as down, and zero or too small balances hold.
+    """
+    rng = np.random.default_rng(1)
+    n = 50
+    balances = rng.uniform(0, 10, n)
+    balances[::7] = 0
+    rates = rng.uniform(0.1, 10, n)
+    last_rates = np.where(rng.random(n) < 0.5, np.nan, rng.uniform(0.1, 10, n))
+    downs, stages, trade_balances = t1.rebalance_kernel(balances, rates, last_rates, np.full(n, 3, dtype=np.int64))
+    avg_balance = sum((rates*balances).tolist())/(n+1)
+    for i in range(n):
+        assert downs[i] == (4 if last_rates[i] < rates[i] else 0)
+        diff_balance = rates[i]*balances[i]-avg_balance
+        assert trade_balances[i] == pytest.approx(diff_balance*rates[i])
+        held = not (balances[i] > 0 and balances[i] > abs(trade_balances[i])) or diff_balance == 0
+        assert stages[i] == (-1 if held else 0 if diff_balance > 0 else 1)
+    assert t1.rebalance_kernel(np.array([]), np.array([]), np.array([]), np.array([], dtype=np.int64))[1].size == 0
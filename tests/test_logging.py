@@ -0,0 +1,37 @@
+from io import StringIO
+from json import loads
+
+import pytest
+
+import traderone as t1
+
+
+@pytest.fixture
+def stream():
+    stream = StringIO()
+    t1.configure_logging(json_lines=True, stream=stream)
+    yield stream
+    t1.stop_log_queue()
+
+
+def test_fields_and_exc_info(stream):
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        t1.logger.error("failed %s", "trade", exc_info=True, ticker="a")
+    line = loads(stream.getvalue())
+    assert line["message"] == "failed trade"
+    assert line["ticker"] == "a"
+    assert "RuntimeError: boom" in line["exception"]
+    assert "exc_info" not in line
+
+
+def test_stack_info(stream):
+    t1.logger.info("here", stack_info=True)
+    assert "stack" in loads(stream.getvalue())
+
+
+def test_reserved_fields_rejected(stream):
+    with pytest.raises(ValueError):
+        t1.logger.info("hello", message="overwritten")
+    assert stream.getvalue() == ""
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import traderone as t1
+
+T = t1.Tests.Test1
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """
+    A fresh, enabled Metrics in place of the global one.
+    """
+    metrics = t1.Metrics(enabled=True)
+    monkeypatch.setattr(t1, "metrics", metrics)
+    return metrics
+
+
+def get_samples(text: str) -> dict[str, float]:
+    return {name: float(value) for name, value in (line.split(" ") for line in text.splitlines() if not line.startswith("#"))}
+
+
+def run_cycles(cycles: int) -> tuple[t1.TraderOne, int]:
+    exchange = T.Test1Exchange(num_tickers=4, seed=1, log_shuffles=False)
+    wallets = [T.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()]
+    trader = t1.TraderOne(t1.wrap_exchange(exchange, {}), wallets, min_cycle_delay=0)
+    trades = 0
+    for _ in range(cycles):
+        exchange.shuffle_tickers()
+        trader.do_trade_cycle()
+        trades += trader.get_last_trades()
+    return trader, trades
+
+
+def test_enabled_metrics_instrument_the_exchange(metrics):
+    trader, _ = run_cycles(1)
+    assert isinstance(trader.get_exchange(), t1.InstrumentedExchange)
+
+
+def test_cycles_reach_the_prometheus_output(metrics):
+    _, trades = run_cycles(3)
+    text = metrics.to_prometheus()
+    samples = get_samples(text)
+    assert "# TYPE traderone_cycles_total counter" in text
+    assert "# TYPE traderone_cycle_seconds summary" in text
+    assert samples["traderone_cycles_total"] == 3
+    assert samples["traderone_trades_total"] == trades > 0
+    assert samples["traderone_cycle_seconds_count"] == 3
+    assert 0 < samples["traderone_cycle_seconds_max"] <= samples["traderone_cycle_seconds_sum"]
+    assert samples["traderone_get_rate_snapshot_seconds_count"] >= 3
+    assert samples["traderone_trade_many_seconds_count"] >= 1
+    assert "traderone_last_cycle_trades" in samples
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    metrics = t1.Metrics()
+    monkeypatch.setattr(t1, "metrics", metrics)
+    trader, _ = run_cycles(2)
+    assert not isinstance(trader.get_exchange(), t1.InstrumentedExchange)
+    assert metrics.to_prometheus() == "\n"
+
+
+def test_end_cycle_writes_prom_and_json_files(tmp_path):
+    prom = t1.Metrics(enabled=True, path=str(tmp_path/"metrics.prom"))
+    lines = t1.Metrics(enabled=True, path=str(tmp_path/"metrics.jsonl"))
+    for metrics in (prom, lines):
+        metrics.end_cycle(0.5, 2)
+        metrics.end_cycle(0.25, 1)
+    assert get_samples((tmp_path/"metrics.prom").read_text()) == {
+            "traderone_cycle_seconds_count": 2,
+            "traderone_cycle_seconds_sum": 0.75,
+            "traderone_cycle_seconds_max": 0.5,
+            "traderone_cycles_total": 2,
+            "traderone_trades_total": 3,
+            "traderone_last_cycle_trades": 1,
+            }
+    records = [json.loads(line) for line in (tmp_path/"metrics.jsonl").read_text().splitlines()]
+    assert [record["counters"]["cycles"] for record in records] == [1, 2]
+    assert records[-1]["timers"]["cycle"] == {"count": 2, "sum": 0.75, "max": 0.5}
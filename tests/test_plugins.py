@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+import traderone as t1
+
+from conftest import ROOT
+
+SDKS = ("uniswap", "web3", "agentipy", "solders")
+
+
+def test_choosing_an_exchange_imports_no_other_sdk():
+    """
+    Runs in a fresh interpreter, since this one has already imported the SDKs for other tests.
+    """
+    script = f"""
+import sys
+import traderone as t1
+t1.get_exchange_plugin("test")
+for exchange in (None, "uniswap", "solana"):
+    try:
+        t1.main(["traderone.py", "--help"], exchange=exchange)
+    except SystemExit:
+        pass
+print("loaded:"+",".join(name for name in {SDKS!r} if name in sys.modules))
+"""
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "loaded:"
+
+
+def test_uniswap_run_main_honors_cycles(monkeypatch):
+    tu = pytest.importorskip("traderone_uniswap")
+    exchange = t1.Tests.Test1.Test1Exchange(num_tickers=3, seed=1, log_shuffles=False)
+    wallets = [t1.Tests.Test1.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()]
+    monkeypatch.setattr(tu, "build_trader", lambda args: t1.TraderOne(exchange, wallets, min_cycle_delay=0))
+    calls = []
+    monkeypatch.setattr(t1.TraderRunner, "main_loop", lambda self, cycles=-1, pause=0.1: calls.append(cycles) or 0)
+    assert tu.run_main({t1.ConfigKeys.CYCLES: 2}) == 0
+    assert tu.run_main({}) == 0
+    assert calls == [2, -1]
@@ -0,0 +1,23 @@
+import traderone as t1
+
+
+def test_rate_snapshot_copies_rates():
+    rates = {"a": 2.0}
+    snapshot = t1.RateSnapshot("q", rates)
+    assert rates == {"a": 2.0}
+    assert snapshot.get_rate("a", "q") == 2.0
+    assert snapshot.get_rate("q", "a") == 0.5
+
+
+def test_rate_snapshot_missing_leg():
+    snapshot = t1.RateSnapshot("q", {"a": 2.0})
+    assert snapshot.get_rate("a", "b") is None
+
+
+def test_down_tracker_setter_writes_portfolio():
+    T = t1.Tests.Test1
+    exchange = T.Test1Exchange(num_tickers=4, seed=1, log_shuffles=False)
+    trader = t1.TraderOne(exchange, [T.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()], min_cycle_delay=0)
+    trader.down_tracker = [(2.0, 3), (None, 1), (0.5, 0), (9.0, 9)]
+    assert trader.down_tracker == [(2.0, 3), (None, 1), (0.5, 0), (None, 0)]
+    assert trader.get_portfolio().downs[0] == 3
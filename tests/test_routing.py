@@ -0,0 +1,79 @@
+from random import Random
+from time import perf_counter
+
+import pytest
+
+import traderone as t1
+
+T = t1.Tests.Test1
+
+
+def build_trades(seed: int, sells: int, buys: int, paired: int = 0):
+    """
+    Hub trades between fresh wallets and a main wallet, all at rate 1, with paired of the buys worth exactly as much as one of the sells.
+    """
+    rng = Random(seed)
+    main = T.Test1Wallet("main", "main", "main")
+    wallets = [T.Test1Wallet(str(i), str(i), str(i)) for i in range(sells+buys)]
+    sell_values = [rng.uniform(1, 100) for _ in range(sells)]
+    buy_values = sell_values[:paired]+[rng.uniform(1, 100) for _ in range(buys-paired)]
+    trades = [(0, value, wallet, main) for value, wallet in zip(sell_values, wallets)]+[(1, value, main, wallet) for value, wallet in zip(buy_values, wallets[sells:])]
+    rng.shuffle(trades)
+    return trades, {id(wallet): 1 for wallet in wallets}
+
+
+def route(trades, rates):
+    trader = t1.TraderOne(T.Test1Exchange(), [])
+    matches = trader.get_route_matches(trades, rates)
+    # Free direct swaps, so every match is taken
+    return matches, trader.get_routed_trades(trades, [1]*len(trades), matches, [0]*len(matches), rates)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("sells,buys", [(1, 1), (1, 8), (8, 1), (10, 10), (50, 20), (20, 50)])
+def test_matches_are_bounded(seed, sells, buys):
+    trades, rates = build_trades(seed, sells, buys, paired=seed%(min(sells, buys)+1))
+    matches, routed = route(trades, rates)
+    assert len(matches) <= min(sells, sells+buys-1)
+    assert len({sell for sell, _, _ in matches}) == len(matches)
+    for i, trade in enumerate(trades):
+        matched = sum(value for sell, buy, value in matches if i in (sell, buy))
+        assert matched <= trade[1]*(1+t1.ROUTE_TOLERANCE)
+    assert len(routed) <= len(trades)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pairs_save_swaps(seed):
+    trades, rates = build_trades(seed, 12, 9, paired=5)
+    _, routed = route(trades, rates)
+    assert len(routed) <= len(trades)-5
+    assert sum(1 for _, _, from_wallet, to_wallet in routed if "main" not in (from_wallet.get_ticker(), to_wallet.get_ticker())) >= 5
+
+
+def test_routing_moves_the_same_value():
+    trades, rates = build_trades(1, 30, 30, paired=10)
+    _, routed = route(trades, rates)
+    def net(trades):
+        flows: dict[int, float] = {}
+        for _, amount, from_wallet, to_wallet in trades:
+            flows[id(from_wallet)] = flows.get(id(from_wallet), 0)-amount
+            flows[id(to_wallet)] = flows.get(id(to_wallet), 0)+amount
+        return flows
+    before, after = net(trades), net(routed)
+    for wallet, flow in before.items():
+        if wallet in rates:
+            assert after.get(wallet, 0) == pytest.approx(flow, rel=t1.ROUTE_TOLERANCE, abs=1e-9)
+
+
+def test_matching_scales_near_linearly():
+    def seconds(n: int) -> float:
+        trades, rates = build_trades(n, n, n, paired=n//4)
+        trader = t1.TraderOne(T.Test1Exchange(), [])
+        best = float("inf")
+        for _ in range(3):
+            started = perf_counter()
+            trader.get_route_matches(trades, rates)
+            best = min(best, perf_counter()-started)
+        return best
+    # O((S+B) log(S+B)) grows a little over 8x for 8x the trades, where a quadratic matcher would grow 64x
+    assert seconds(40000) < 20*seconds(5000)
@@ -0,0 +1,115 @@
+import pytest
+
+import traderone as t1
+
+START = 1_000_000.0
+
+
+class Clock():
+    """
+    Stands in for both time() and monotonic(), and for the scheduler's waits, which move it on instead of sleeping.
+    """
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            raise AssertionError("the scheduler waited with nothing queued")
+        self.now += timeout
+        return False
+
+
+class StubTrader():
+    def __init__(self, name: str, delay: float, last_tick_time: float = 0):
+        self.name = name
+        self.delay = delay
+        self.last_tick_time = last_tick_time
+
+    def get_last_tick_time(self):
+        return self.last_tick_time
+
+    def get_next_cycle_delay(self):
+        return self.delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(t1, "time", clock)
+    monkeypatch.setattr(t1, "monotonic", clock)
+    return clock
+
+
+def build(clock, traders, **kwargs):
+    """
+    A scheduler over traders that logs each cycle as (name, seconds since START).
+    """
+    runs = []
+    scheduler = t1.TraderScheduler(traders, cycle_fn=lambda trader: runs.append((trader.name, clock.now-START)), **kwargs)
+    scheduler.condition.wait = clock.wait
+    return scheduler, runs
+
+
+def test_traders_run_in_deadline_order(clock):
+    scheduler, runs = build(clock, [StubTrader("a", 10), StubTrader("b", 25), StubTrader("c", 7)])
+    assert scheduler.run(10) == 10
+    assert runs == [("a", 0), ("b", 0), ("c", 0), ("c", 7), ("a", 10), ("c", 14), ("a", 20), ("c", 21), ("b", 25), ("c", 28)]
+
+
+def test_min_pause_spaces_out_fast_traders(clock):
+    scheduler, runs = build(clock, [StubTrader("a", 1)], min_pause=4)
+    scheduler.run(3)
+    assert runs == [("a", 0), ("a", 4), ("a", 8)]
+
+
+def test_trigger_runs_early_but_not_within_the_min_interval(clock):
+    trader = StubTrader("a", 100)
+    scheduler, runs = build(clock, [trader], min_trigger_interval=5)
+    scheduler.run(1)
+    clock.now += 1
+    scheduler.trigger(trader)
+    scheduler.run(1)
+    assert runs[-1] == ("a", 5)
+    clock.now += 20
+    scheduler.trigger()
+    scheduler.run(1)
+    assert runs[-1] == ("a", 25)
+    scheduler.trigger(trader)
+    scheduler.trigger(trader)
+    scheduler.run(1)
+    assert runs == [("a", 0), ("a", 5), ("a", 25), ("a", 30)]
+
+
+def test_trigger_never_postpones_a_cycle(clock):
+    trader = StubTrader("a", 3)
+    scheduler, runs = build(clock, [trader], min_trigger_interval=10)
+    scheduler.run(1)
+    scheduler.trigger(trader)
+    scheduler.run(1)
+    assert runs == [("a", 0), ("a", 3)]
+
+
+def test_trigger_leaves_other_traders_alone(clock):
+    a, b = StubTrader("a", 100), StubTrader("b", 50)
+    scheduler, runs = build(clock, [a, b])
+    scheduler.run(2)
+    clock.now += 1
+    scheduler.trigger(a)
+    scheduler.run(2)
+    assert runs == [("a", 0), ("b", 0), ("a", 1), ("b", 50)]
+
+
+def test_add_trader_honors_a_restored_last_tick_time(clock):
+    scheduler, runs = build(clock, [StubTrader("restored", 60, last_tick_time=START-45), StubTrader("overdue", 60, last_tick_time=START-90)])
+    scheduler.run(3)
+    assert runs == [("overdue", 0), ("restored", 15), ("overdue", 60)]
+
+
+def test_run_stamps_the_last_tick_time(clock):
+    trader = StubTrader("a", 10)
+    scheduler, _ = build(clock, [trader])
+    scheduler.run(2)
+    assert trader.get_last_tick_time() == START+10
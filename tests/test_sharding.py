@@ -0,0 +1,51 @@
+from threading import Thread
+
+import pytest
+
+import traderone as t1
+
+T = t1.Tests.Test1
+
+
+def build_trader() -> t1.TraderOne:
+    exchange = T.Test1Exchange(num_tickers=4, seed=1, log_shuffles=False)
+    return t1.TraderOne(exchange, [T.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()], min_cycle_delay=0)
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    """
+    The cycle guard of shard 0 of two, as a shard worker sets it up.
+    """
+    guard = t1.CycleGuard()
+    guard.set_locks([t1.ProcessLock(), t1.ProcessLock()])
+    guard.set_shard("test-shard-0", 0)
+    monkeypatch.setattr(t1, "cycle_guard", guard)
+    return guard
+
+
+def test_shards_refuse_ordered_nonces():
+    pytest.importorskip("traderone_uniswap")
+    assert t1.shard_main({t1.ConfigKeys.EXCHANGE: "uniswap", t1.ConfigKeys.SHARDS: 2}) == 1
+
+
+def test_cycle_summary_names_the_shard(guard, caplog):
+    with caplog.at_level("INFO", logger="traderone"):
+        t1.TraderRunner(build_trader()).main_loop(cycles=1, pause=0)
+    summaries = [record.fields for record in caplog.records if "trades" in getattr(record, "fields", {})]
+    assert summaries and all(fields["shard"] == "test-shard-0" for fields in summaries)
+
+
+def test_shard_waits_for_hub_rebalancing(guard):
+    trader = build_trader()
+    runner = Thread(target=t1.TraderRunner(trader).main_loop, kwargs={"cycles": 1, "pause": 0})
+    guard.locks[0].acquire() # As the coordinator does for every hub cycle
+    try:
+        runner.start()
+        runner.join(0.2)
+        assert runner.is_alive()
+        assert trader.get_last_trades() == 0
+    finally:
+        guard.locks[0].release()
+    runner.join(5)
+    assert not runner.is_alive()
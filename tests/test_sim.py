@@ -0,0 +1,107 @@
+from json import dumps, loads
+from urllib.request import Request, urlopen
+
+import pytest
+
+import traderone as t1
+
+DAI = "0x6b175474e89094c44da98b954eedeac495271d0f"
+
+ABI_CASES = [
+        (["uint256", "address", "bool"], [2**256-1, "0x"+"ab"*20, True]),
+        (["bytes", "uint256"], [b"", 7]),
+        (["bytes"], [b"x"*33]),
+        (["uint256[]", "address[]"], [[1, 2, 3], ["0x"+"01"*20, "0x"+"02"*20]]),
+        (["uint256[]"], [[]]),
+        (["(bool,bytes)[]"], [[(True, b"\x01\x02"), (False, b"")]]),
+        (["(address,bool,bytes)[]"], [[("0x"+"ca"*20, False, bytes(range(70)))]]),
+        ]
+
+
+def rpc(url: str, method: str, params: list):
+    request = Request(url, dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode(), {"Content-Type": "application/json"})
+    with urlopen(request, timeout=10) as response:
+        return loads(response.read())["result"]
+
+
+def normalize(value):
+    """
+    Tuples as lists and addresses in lower case, as abi_decode gives them.
+    """
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value.lower() if isinstance(value, str) else value
+
+
+@pytest.mark.parametrize("types,values", ABI_CASES)
+def test_abi_round_trips(sim_module, types, values):
+    assert sim_module.abi_decode(types, sim_module.abi_encode(types, values)) == normalize(values)
+
+
+@pytest.mark.parametrize("types,values", ABI_CASES)
+def test_abi_matches_eth_abi(sim_module, types, values):
+    eth_abi = pytest.importorskip("eth_abi")
+    assert sim_module.abi_encode(types, values) == eth_abi.encode(types, values)
+
+
+def test_selectors_match_their_signatures(sim_module):
+    keccak = pytest.importorskip("eth_utils").keccak
+    for selector, signature in sim_module.SELECTORS.items():
+        assert keccak(text=signature)[:4] == selector, signature
+
+
+@pytest.mark.parametrize("item", [b"", b"\x00", b"\x7f", b"\x80", b"a"*55, b"a"*56, b"b"*1024, [], [b"", [b"c"]], [b"d"*60]*5])
+def test_rlp_decodes_what_rlp_encodes(sim_module, item):
+    rlp = pytest.importorskip("rlp")
+    assert sim_module.rlp_decode(rlp.encode(item)) == item
+
+
+def test_rlp_decodes_signed_transactions(sim_module):
+    account = pytest.importorskip("eth_account").Account.from_key("0x"+"11"*32)
+    to = "0x"+"22"*20
+    legacy = bytes(account.sign_transaction({"nonce": 3, "gasPrice": 10**9, "gas": 21000, "to": to, "value": 5, "data": b"\x01", "chainId": 1}).rawTransaction)
+    fields = sim_module.rlp_decode(legacy)
+    assert (int.from_bytes(fields[0], "big"), fields[3].hex(), int.from_bytes(fields[4], "big"), fields[5]) == (3, "22"*20, 5, b"\x01")
+    dynamic = bytes(account.sign_transaction({"type": 2, "nonce": 4, "maxFeePerGas": 2*10**9, "maxPriorityFeePerGas": 10**9, "gas": 21000, "to": to, "value": 6, "data": b"", "chainId": 1}).rawTransaction)
+    fields = sim_module.rlp_decode(dynamic[1:])
+    assert dynamic[0] == 2
+    assert (int.from_bytes(fields[1], "big"), fields[5].hex(), int.from_bytes(fields[6], "big")) == (4, "22"*20, 6)
+
+
+@pytest.mark.parametrize("data,encoded", [(b"", ""), (b"\x00\x00\x01", "112"), (b"hello world", "StV1DL6CwTryKyV"), (bytes(32), "1"*32)])
+def test_base58(sim_module, data, encoded):
+    assert sim_module.base58(data) == encoded
+
+
+def test_base58_matches_solders(sim_module):
+    pubkey = pytest.importorskip("solders.pubkey").Pubkey
+    key = bytes(range(32))
+    assert sim_module.base58(key) == str(pubkey(key))
+
+
+def test_router_quote_over_json_rpc(sim_module, sim):
+    chain = sim.simulator.ethereum
+    path = [chain.base, DAI]
+    selector = next(selector for selector, signature in sim_module.SELECTORS.items() if signature.startswith("getAmountsOut("))
+    data = selector+sim_module.abi_encode(["uint256", "address[]"], [10**18, path])
+    result = rpc(sim.get_url(), "eth_call", [{"to": sim_module.ROUTER_ADDRESS, "data": "0x"+data.hex()}, "latest"])
+    amounts = sim_module.abi_decode(["uint256[]"], bytes.fromhex(result[2:]))[0]
+    assert amounts == chain.get_amounts_out(10**18, path)
+    # Worth about 3000 dai at the default market, less the pool fee and a little price impact
+    assert 2900*10**18 < amounts[-1] < 3000*10**18
+
+
+def test_swap_end_to_end(sim):
+    tu = pytest.importorskip("traderone_uniswap")
+    from test_uniswap import build_exchange
+    exchange = build_exchange(sim, receipt_timeout=5)
+    eth, dai = tu.UniswapWallet("eth", exchange), tu.UniswapWallet("dai", exchange)
+    chain = sim.simulator.ethereum
+    token = chain.get_token(DAI)
+    expected = chain.get_amounts_out(10**17, [address.lower() for address in exchange.get_path("eth", "dai")])[-1]
+    balance, native = token.balance, chain.native
+    result = exchange.confirm(exchange.trade(0.1, eth, dai))
+    assert result[t1.Transaction.TAG_COMPLETED]
+    assert token.balance-balance == expected
+    assert native-chain.native == 10**17+result["receipt"]["gasUsed"]*result["receipt"]["effectiveGasPrice"]
+    assert sim.simulator.get_stats()["nonce"] == 1
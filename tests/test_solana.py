@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+solana = pytest.importorskip("traderone_solana")
+
+
+def run(rpc, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await rpc.close()
+    return asyncio.run(main())
+
+
+def test_token_balances_include_native_sol(sim):
+    rpc = solana.SolanaRPC(sim.get_url(), jupiter_url=sim.get_url())
+    balances = run(rpc, rpc.get_token_balances("owner"))
+    assert balances[solana.WSOL_MINT] == 10
+    assert balances["EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"] == 1000
+
+
+def test_prices(sim):
+    rpc = solana.SolanaRPC(sim.get_url(), jupiter_url=sim.get_url())
+    prices = run(rpc, rpc.fetch_prices([solana.WSOL_MINT, "unknown"]))
+    assert prices == {solana.WSOL_MINT: pytest.approx(150)}
@@ -0,0 +1,118 @@
+import asyncio
+import sqlite3
+
+import traderone as t1
+
+from test_traders import AsyncTestExchange, AsyncTestWallet, build
+
+
+def count_rows(path, table: str) -> int:
+    """
+    Rows the database itself holds, read over a separate connection as another process would.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_state_round_trips_through_attach_state_store(tmp_path):
+    path = str(tmp_path/"state.db")
+    exchange, wallets = build(1)
+    trader = t1.attach_state_store(t1.TraderOne(exchange, wallets, min_cycle_delay=0), {t1.ConfigKeys.STATE: path, t1.ConfigKeys.NAME: "one"})
+    for _ in range(3):
+        exchange.shuffle_tickers()
+        trader.last_tick_time = t1.time()
+        trader.do_trade_cycle()
+    state = trader.get_state()
+    _, restored_wallets = build(1)
+    restored = t1.TraderOne(exchange, restored_wallets, min_cycle_delay=0)
+    restored.set_state_store(t1.StateStore(path), "one")
+    assert restored.get_last_tick_time() == state["last_tick_time"] > 0
+    assert restored.get_state()["balances"] == state["balances"]
+    other = t1.TraderOne(exchange, build(1)[1], min_cycle_delay=0)
+    other.set_state_store(t1.StateStore(path), "two")
+    assert other.get_last_tick_time() == 0
+
+
+def test_attach_state_store_without_a_path_leaves_the_trader_alone():
+    exchange, wallets = build(1)
+    trader = t1.attach_state_store(t1.TraderOne(exchange, wallets, min_cycle_delay=0), {})
+    assert trader.get_state_store() is None
+
+
+def test_writes_are_batched_until_commit(tmp_path):
+    path = tmp_path/"state.db"
+    store = t1.StateStore(str(path))
+    store.set("one", "trader", {"last_tick_time": 1})
+    store.journal("one", 1.0, "a", "b", {"tx": "0x1"})
+    store.journal("one", 2.0, "b", "c", None)
+    assert store.get("one", "trader") == {"last_tick_time": 1}
+    assert count_rows(path, "state") == 0 and count_rows(path, "journal") == 0
+    store.commit()
+    assert count_rows(path, "state") == 1 and count_rows(path, "journal") == 2
+    store.close()
+
+
+def test_one_cycle_is_one_commit(tmp_path, monkeypatch):
+    exchange, wallets = build(2)
+    trader = t1.TraderOne(exchange, wallets, min_cycle_delay=0)
+    store = t1.StateStore(str(tmp_path/"state.db"))
+    trader.set_state_store(store, "one")
+    commits = []
+    commit = store.commit
+    monkeypatch.setattr(store, "commit", lambda: commits.append(1) or commit())
+    for n in range(1, 4):
+        exchange.shuffle_tickers()
+        trader.do_trade_cycle()
+        assert len(commits) == n
+
+
+def test_journal_records_every_trade(tmp_path):
+    exchange, wallets = build(3)
+    trader = t1.TraderOne(exchange, wallets, min_cycle_delay=0)
+    store = t1.StateStore(str(tmp_path/"state.db"))
+    trader.set_state_store(store, "one")
+    trades = 0
+    for _ in range(5):
+        exchange.shuffle_tickers()
+        trader.do_trade_cycle()
+        trades += trader.get_last_trades()
+    assert trades > 0
+    journal = store.get_journal("one", limit=1000)
+    assert len(journal) == trades
+    assert [entry["time"] for entry in journal] == sorted((entry["time"] for entry in journal), reverse=True)
+    tickers = set(exchange.get_supported_tickers())
+    assert all(entry["from_ticker"] in tickers and entry["to_ticker"] in tickers and entry["amount"] > 0 for entry in journal)
+    assert store.get_journal("two") == []
+
+
+def test_reopening_after_a_crash_keeps_only_committed_cycles(tmp_path):
+    path = str(tmp_path/"state.db")
+    store = t1.StateStore(path)
+    store.set("one", "trader", {"last_tick_time": 1})
+    store.journal("one", 1.0, "a", "b", None)
+    store.commit()
+    store.set("one", "trader", {"last_tick_time": 2})
+    store.journal("one", 2.0, "b", "c", None)
+    # Crash: the connection goes away without the staged cycle being committed
+    store.connection.close()
+    reopened = t1.StateStore(path)
+    assert reopened.get("one", "trader") == {"last_tick_time": 1}
+    assert [entry["amount"] for entry in reopened.get_journal("one")] == [1.0]
+    reopened.close()
+
+
+def test_async_runner_resumes_a_restored_schedule(monkeypatch):
+    exchange, wallets = build(4)
+    trader = t1.AsyncTraderOne(AsyncTestExchange(exchange), [AsyncTestWallet(wallet) for wallet in wallets], min_cycle_delay=60)
+    trader.set_state({"last_tick_time": t1.time()-45})
+    runner = t1.AsyncTraderRunner(trader)
+    waits = []
+    async def wait_until(deadline):
+        waits.append(deadline-t1.monotonic())
+    monkeypatch.setattr(runner, "_wait_until_", wait_until)
+    assert asyncio.run(runner.main_loop(cycles=1, pause=0)) == 0
+    assert 10 < waits[0] <= 15
+    assert trader.get_last_tick_time() > t1.time()-5
@@ -0,0 +1,67 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+import traderone as t1
+
+np = pytest.importorskip("numpy")
+
+TIMED = ("seconds", "ticks_per_second")
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    """
+    The names of the shared memory segments run_sweep creates.
+    """
+    names = []
+    share_array = t1._share_array_
+    def record(array):
+        shm, spec = share_array(array)
+        names.append(shm.name)
+        return shm, spec
+    monkeypatch.setattr(t1, "_share_array_", record)
+    return names
+
+
+def assert_unlinked(names: list[str]) -> None:
+    assert names
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
+
+
+def untimed(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key not in TIMED}
+
+
+@pytest.mark.parametrize("with_timestamps", [False, True])
+def test_sweep_matches_sequential_backtests(shared, with_timestamps):
+    tickers, prices = t1.generate_price_path(1, 300, 4)
+    timestamps = np.arange(300, dtype=float) if with_timestamps else None
+    grid = {t1.ConfigKeys.FEE_RATE: [0.001, 0.01], t1.ConfigKeys.MIN_PROPORTIONAL_DIFF: [0.01, 0.05]}
+    results = t1.run_sweep(tickers, prices, timestamps, grid, max_workers=2)
+    expected = []
+    for params in t1.get_sweep_params(grid):
+        trader_kwargs = dict(params)
+        fee_rate = trader_kwargs.pop(t1.ConfigKeys.FEE_RATE)
+        expected.append({**params, **t1.Backtest(tickers, prices, timestamps, fee_rate=fee_rate, **trader_kwargs).run()})
+    assert len(results) == 4
+    assert [untimed(result) for result in results] == [untimed(result) for result in sorted(expected, key=lambda result: result["pnl"], reverse=True)]
+    assert [result["pnl"] for result in results] == sorted((result["pnl"] for result in results), reverse=True)
+    assert len(shared) == (2 if with_timestamps else 1)
+    assert_unlinked(shared)
+
+
+def test_failed_sweep_leaves_no_shared_memory(shared):
+    tickers, prices = t1.generate_price_path(1, 50, 3)
+    with pytest.raises(IndexError):
+        t1.run_sweep(tickers, prices, np.arange(50, dtype=float), {t1.ConfigKeys.MAIN_WALLET_INDEX: [0, 99]}, max_workers=2)
+    assert_unlinked(shared)
+
+
+def test_unknown_sweep_key_leaves_no_shared_memory(shared):
+    tickers, prices = t1.generate_price_path(1, 50, 3)
+    with pytest.raises(ValueError):
+        t1.run_sweep(tickers, prices, None, {"seed": [1, 2]}, max_workers=1)
+    assert_unlinked(shared)
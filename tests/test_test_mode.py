@@ -0,0 +1,76 @@
+from logging import Handler
+
+import pytest
+
+import traderone as t1
+
+
+class ListHandler(Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    """
+    Every record the traderone logger emits, whatever handlers earlier tests left it with.
+    """
+    handler = ListHandler()
+    t1.logger.logger.addHandler(handler)
+    yield handler.records
+    t1.logger.logger.removeHandler(handler)
+
+
+def run_test_mode(records, *args: str) -> list[str]:
+    """
+    Runs test mode and returns the messages it logged, past any from earlier runs.
+    """
+    start = len(records)
+    assert t1.main(["traderone.py", "-T", *args]) == 0
+    return [record.getMessage() for record in records[start:]]
+
+
+def get_balances(messages: list[str]) -> list[str]:
+    """
+    The closing wallet listing and portfolio value, which summary mode logs after the last cycle.
+    """
+    return [message for message in messages if "LiveBalance" in message or message.startswith("Total portfolio value")][-2:]
+
+
+def test_same_seed_same_balances(records):
+    first = get_balances(run_test_mode(records, "-c", "30", "--seed", "7", "--log_mode", "summary"))
+    second = get_balances(run_test_mode(records, "-c", "30", "--seed", "7", "--log_mode", "summary"))
+    other = get_balances(run_test_mode(records, "-c", "30", "--seed", "8", "--log_mode", "summary"))
+    assert len(first) == 2
+    assert first == second
+    assert first != other
+
+
+def test_seeded_exchanges_shuffle_alike():
+    exchanges = [t1.Tests.Test1.Test1Exchange(seed=3, log_shuffles=False) for _ in range(2)]
+    for _ in range(20):
+        for exchange in exchanges:
+            exchange.shuffle_tickers()
+        assert exchanges[0].tickers == exchanges[1].tickers
+
+
+def test_cycle_mode_logs_every_cycle(records):
+    messages = run_test_mode(records, "-c", "3", "--seed", "1")
+    assert sum(message.startswith("Starting Cycle no.") for message in messages) == 3
+    assert sum(message.startswith("Finished Cycle no.") for message in messages) == 3
+
+
+def test_summary_mode_logs_no_cycles(records):
+    messages = run_test_mode(records, "-c", "3", "--seed", "1", "--log_mode", "summary")
+    assert not any("Cycle no." in message for message in messages)
+    assert len(get_balances(messages)) == 2
+    assert messages[-1].startswith("Ran 3 cycles")
+
+
+def test_off_mode_logs_only_the_throughput(records):
+    messages = run_test_mode(records, "-c", "3", "--seed", "1", "--log_mode", "off")
+    assert len(messages) == 1 and messages[0].startswith("Ran 3 cycles")
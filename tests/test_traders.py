@@ -0,0 +1,98 @@
+import asyncio
+
+import traderone as t1
+
+T = t1.Tests.Test1
+
+
+class AsyncTestExchange(t1.AsyncExchange):
+    """
+    A Test1Exchange behind coroutines, trading the Test1Wallets that AsyncTestWallets stand for.
+    """
+    def __init__(self, exchange: T.Test1Exchange):
+        super().__init__("async-test")
+        self.exchange = exchange
+
+    def get_supported_tickers(self):
+        return self.exchange.get_supported_tickers()
+
+    async def get_exchange_rate(self, from_ticker, to_ticker):
+        return self.exchange.get_exchange_rate(from_ticker, to_ticker)
+
+    async def get_fee(self, amount, from_wallet, to_wallet, snapshot=None):
+        return self.exchange.get_fee(amount, from_wallet, to_wallet, snapshot)
+
+    async def trade(self, amount, from_wallet, to_wallet):
+        return self.exchange.trade(amount, from_wallet.wallet, to_wallet.wallet)
+
+
+class AsyncTestWallet(t1.AsyncWallet):
+    __slots__ = ("wallet",)
+
+    def __init__(self, wallet: T.Test1Wallet):
+        super().__init__(wallet.get_ticker(), wallet.get_addr(), wallet.get_auth())
+        self.wallet = wallet
+
+    async def get_live_balance(self):
+        return self.wallet.balance
+
+
+def build(seed: int):
+    exchange = T.Test1Exchange(num_tickers=8, seed=seed, log_shuffles=False)
+    wallets = [T.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()]
+    return exchange, wallets
+
+
+def test_async_trader_is_not_a_sync_trader():
+    assert not issubclass(t1.AsyncTraderOne, t1.TraderOne)
+    assert not issubclass(t1.AsyncTraderOne, t1.Trader)
+    assert issubclass(t1.AsyncTraderOne, t1.AsyncTrader)
+    assert issubclass(t1.TraderOne, t1.Trader)
+
+
+def test_async_trader_matches_sync_trader():
+    sync_exchange, sync_wallets = build(1)
+    sync_trader = t1.TraderOne(sync_exchange, sync_wallets, min_cycle_delay=0)
+    async_exchange, async_wallets = build(1)
+    async_trader = t1.AsyncTraderOne(t1.wrap_exchange(AsyncTestExchange(async_exchange), {}), [AsyncTestWallet(wallet) for wallet in async_wallets], min_cycle_delay=0)
+    async def run():
+        for _ in range(100):
+            async_exchange.shuffle_tickers()
+            await async_trader.do_trade_cycle()
+    for _ in range(100):
+        sync_exchange.shuffle_tickers()
+        sync_trader.do_trade_cycle()
+    asyncio.run(run())
+    assert [wallet.balance for wallet in sync_wallets] == [wallet.balance for wallet in async_wallets]
+    assert sync_trader.down_tracker == async_trader.down_tracker
+
+
+def test_multi_runner_hosts_sync_and_async_traders():
+    sync_exchange, sync_wallets = build(2)
+    async_exchange, async_wallets = build(2)
+    traders = {
+            "sync": t1.TraderOne(sync_exchange, sync_wallets, min_cycle_delay=0),
+            "async": t1.AsyncTraderOne(AsyncTestExchange(async_exchange), [AsyncTestWallet(wallet) for wallet in async_wallets], min_cycle_delay=0),
+            }
+    runner = t1.MultiTraderRunner(traders, pause=0)
+    assert runner.main_loop(cycles=6) == 0
+    stats = runner.get_stats()
+    assert all(stats[name]["failures"] == 0 and stats[name]["cycles"] > 0 for name in traders)
+
+
+def test_async_runner_is_not_a_sync_runner():
+    assert not issubclass(t1.AsyncTraderRunner, t1.TraderRunner)
+    assert issubclass(t1.AsyncTraderRunner, t1.TraderRunnerBase) and issubclass(t1.TraderRunner, t1.TraderRunnerBase)
+
+
+def test_async_runner_trigger_runs_the_next_cycle_early():
+    exchange, wallets = build(3)
+    trader = t1.AsyncTraderOne(AsyncTestExchange(exchange), [AsyncTestWallet(wallet) for wallet in wallets], min_cycle_delay=60)
+    runner = t1.AsyncTraderRunner(trader)
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.2, runner.trigger)
+        started = t1.monotonic()
+        await asyncio.wait_for(runner.main_loop(cycles=2, pause=0), 5)
+        return t1.monotonic()-started
+    assert asyncio.run(run()) < 5
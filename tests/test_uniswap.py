@@ -0,0 +1,76 @@
+import pytest
+
+import traderone as t1
+
+tu = pytest.importorskip("traderone_uniswap")
+from eth_account import Account
+
+ACCOUNT = Account.from_key("0x"+"11"*32)
+
+
+def build_exchange(sim, **kwargs) -> "tu.UniswapExchange":
+    return tu.UniswapExchange(ACCOUNT.address, ACCOUNT.key.hex(), sim.get_url(), **kwargs)
+
+
+def count_calls(sim, method: str) -> int:
+    return sim.simulator.get_stats()["methods"].get(method, {}).get("calls", 0)
+
+
+def count_reads(sim) -> int:
+    """
+    eth_calls made by multicall reads, past the one that looks up the WETH address.
+    """
+    return count_calls(sim, "eth_call")-1
+
+
+def test_multicall_reuses_the_block_number(sim):
+    exchange = build_exchange(sim, block_ttl=60)
+    first = exchange.multicall.read("eth")
+    for _ in range(5):
+        assert exchange.multicall.read("eth") == first
+    assert count_calls(sim, "eth_blockNumber") == 1
+    assert count_reads(sim) == 1
+
+
+def test_multicall_without_block_ttl_checks_every_read(sim):
+    exchange = build_exchange(sim, block_ttl=0)
+    for _ in range(3):
+        exchange.multicall.read("eth")
+    assert count_calls(sim, "eth_blockNumber") == 3
+    assert count_reads(sim) == 1
+
+
+def test_new_block_rereads(sim):
+    exchange = build_exchange(sim, block_ttl=60)
+    rates, _ = exchange.multicall.read("eth")
+    sim.simulator.mine(drift=0.1)
+    assert exchange.multicall.read("eth")[0] == rates
+    exchange.multicall.new_block()
+    assert exchange.multicall.read("eth")[0] != rates
+    assert count_calls(sim, "eth_blockNumber") == 2
+    assert count_reads(sim) == 2
+
+
+def test_failed_trade_leaves_no_nonce_gap(sim):
+    exchange = build_exchange(sim, receipt_timeout=5)
+    bat, dai, eth = (tu.UniswapWallet(ticker, exchange) for ticker in ("bat", "dai", "eth"))
+    # The middle trade spends more bat than there is, so its gas estimate fails before it is given a nonce
+    results = exchange.trade_many([(100, bat, dai), (10**9, bat, eth), (1, dai, eth)])
+    assert [result[t1.Transaction.TAG_COMPLETED] for result in results] == [True, False, True]
+    assert "error" in results[1] and "hexbytes" not in results[1]
+    stats = sim.simulator.get_stats()
+    assert stats["nonce"] == 2 and stats["queued"] == 0
+    assert exchange.trade(1, eth, dai) is not None
+    assert sim.simulator.get_stats()["nonce"] == 3
+
+
+def test_failed_send_resyncs_the_nonce(sim):
+    exchange = build_exchange(sim, receipt_timeout=5)
+    eth, dai = tu.UniswapWallet("eth", exchange), tu.UniswapWallet("dai", exchange)
+    exchange.trade(1, eth, dai)
+    exchange.uniswap.next_nonce = 0 # As if another client had sent from the same address
+    with pytest.raises(Exception):
+        exchange.trade(1, eth, dai)
+    assert exchange.uniswap.next_nonce is None
+    exchange.trade(1, eth, dai)
+    assert sim.simulator.get_stats()["nonce"] == 2
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from json import dumps, loads
+from os import path as os_path
+from platform import platform, python_version
+from random import Random
+from statistics import mean, quantiles
+from subprocess import run
+import sys
+from threading import active_count
+from time import perf_counter, sleep, time
+import tracemalloc
+from typing import final#, override
+import traderone as t1
+
+
+
+@final
+class ConfigKeys():
+    WALLETS = "wallets"
+    LATENCIES = "latencies"
+    OUTPUT = "output"
+    BASELINE = "baseline"
+    TOLERANCE = "tolerance"
+    STARTUP = "startup"
+    STARTUP_ONLY = "startup_only"
+    REPLAY = "replay"
+    REPLAY_DELAY = "replay_delay"
+
+
+
+HEAVY_MODULES: tuple[str, ...] = ("web3", "uniswap", "eth_abi", "agentipy", "solders", "solana", "aiohttp")
+STARTUP_COMMANDS: list[list[str]] = [[script, *args] for script in ("traderone.py", "traderone-uniswap.py", "traderone-solana.py") for args in (["--help"], ["-T", "-c", "1", "--log_mode", "off"])]
+STARTUP_PROBE = """
+import json, runpy, sys
+heavy = set(json.loads(sys.argv[1]))
+sys.argv = sys.argv[2:]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+print(json.dumps(sorted({name.split(".")[0] for name in sys.modules} & heavy)))
+"""
+
+
+
+class LatencyExchange(t1.Exchange):
+    """
+    Stand-in exchange whose every call sleeps for latency seconds, pricing num_tickers tickers on a seeded random walk that moves each cycle.
+    A rate snapshot costs one call's latency, like an exchange with a batch endpoint.
+    """
+    def __init__(self, num_tickers: int, latency: float = 0, seed: int = 0):
+        super().__init__("latency")
+        self.latency: float = latency
+        self.rng: Random = Random(seed)
+        self.prices: dict[str, float] = {str(n): 1+self.rng.random() for n in range(num_tickers)}
+
+    def _wait_(self) -> None:
+        if self.latency > 0:
+            sleep(self.latency)
+
+    def move(self) -> None:
+        for ticker, price in self.prices.items():
+            self.prices[ticker] = max(0.01, price*(1+self.rng.gauss(0, 0.05)))
+
+    #@override
+    def get_supported_tickers(self) -> list[str]:
+        return list(self.prices.keys())
+
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        self._wait_()
+        return self.prices[from_ticker]/self.prices[to_ticker]
+
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> t1.RateSnapshot:
+        self._wait_()
+        return t1.RateSnapshot(quote, {ticker: self.prices[ticker]/self.prices[quote] for ticker in tickers if ticker != quote})
+
+    #@override
+    def get_fees(self, trades: list[tuple[float, t1.Wallet, t1.Wallet]], snapshot: t1.RateSnapshot | None = None) -> list[float]:
+        self._wait_()
+        return [abs(amount)*0.003 for amount, _, _ in trades]
+
+    #@override
+    def trade(self, amount: float, from_wallet: t1.Wallet, to_wallet: t1.Wallet) -> dict | None:
+        self._wait_()
+        from_wallet.balance -= amount
+        to_wallet.balance += amount*self.prices[from_wallet.get_ticker()]/self.prices[to_wallet.get_ticker()]
+        return {t1.Transaction.TAG_COMPLETED: True}
+
+
+class LatencyWallet(t1.Wallet):
+    """
+    Wallet whose live balance takes latency seconds to fetch, so refreshes go through the balance executor.
+    """
+    __slots__ = ("latency", "balance")
+
+    def __init__(self, ticker: str, latency: float = 0, start_balance: float = 1):
+        super().__init__(ticker, ticker, None)
+        self.latency: float = latency
+        self.balance: float = start_balance
+
+    #@override
+    def get_live_balance(self) -> float | None:
+        if self.latency > 0:
+            sleep(self.latency)
+        return self.balance
+
+
+class BenchTrader(t1.TraderOne):
+    """
+    Moves its exchange's prices before every cycle, so main_loop can be benchmarked as is.
+    """
+    #@override
+    def do_trade_cycle(self) -> None:
+        self.get_exchange().move()
+        super().do_trade_cycle()
+
+
+
+def get_percentiles(samples: list[float]) -> dict[str, float]:
+    if len(samples) < 2:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0]} if samples else {}
+    cuts = quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def build_trader(num_wallets: int, latency: float, seed: int = 0) -> BenchTrader:
+    exchange = LatencyExchange(num_wallets, latency, seed)
+    return BenchTrader(exchange, [LatencyWallet(ticker, latency) for ticker in exchange.get_supported_tickers()], min_cycle_delay=0)
+
+
+def bench_case(num_wallets: int, latency: float, cycles: int, seed: int = 0) -> dict:
+    """
+    Times do_trade_cycle and refresh_wallets_cached_balances cycles times each, then main_loop for cycles cycles.
+    Memory per wallet is what building the trader and running its first cycle allocated, divided by the number of wallets; the portfolio's arrays are part of it.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    trader = build_trader(num_wallets, latency, seed)
+    trader.do_trade_cycle()
+    memory = tracemalloc.get_traced_memory()[0]-before
+    tracemalloc.stop()
+
+    threads = active_count()
+    cycle_seconds: list[float] = []
+    for _ in range(cycles):
+        started = perf_counter()
+        trader.do_trade_cycle()
+        cycle_seconds.append(perf_counter()-started)
+        threads = max(threads, active_count())
+    refresh_seconds: list[float] = []
+    for _ in range(cycles):
+        started = perf_counter()
+        trader.refresh_wallets_cached_balances(block=True)
+        refresh_seconds.append(perf_counter()-started)
+        threads = max(threads, active_count())
+    started = perf_counter()
+    t1.TraderRunner(trader).main_loop(cycles, pause=0)
+    loop_seconds = perf_counter()-started
+    threads = max(threads, active_count())
+
+    return {
+            "wallets": num_wallets,
+            "latency": latency,
+            "cycles": cycles,
+            "cycle": {"mean": mean(cycle_seconds), **get_percentiles(cycle_seconds)},
+            "refresh": {"mean": mean(refresh_seconds), **get_percentiles(refresh_seconds)},
+            "cycles_per_second": cycles/loop_seconds if loop_seconds > 0 else None,
+            "threads": threads,
+            "memory_per_wallet": memory/num_wallets,
+            "portfolio_bytes_per_wallet": trader.get_portfolio().get_nbytes()/num_wallets,
+            }
+
+
+def bench_startup(command: list[str], runs: int) -> dict:
+    """
+    Times command (a script next to this one and its arguments) from a fresh interpreter runs times, and lists which HEAVY_MODULES it imported, or the error it failed with.
+    """
+    seconds: list[float] = []
+    imported: list[str] = []
+    error: str | None = None
+    for _ in range(runs):
+        started = perf_counter()
+        out = run([sys.executable, "-c", STARTUP_PROBE, dumps(HEAVY_MODULES), *command], cwd=os_path.dirname(os_path.abspath(__file__)), capture_output=True, text=True)
+        seconds.append(perf_counter()-started)
+        if out.returncode != 0:
+            error = (out.stderr.strip().splitlines() or [f"exit code {out.returncode}"])[-1]
+            break
+        imported = loads(out.stdout.strip().splitlines()[-1])
+    return {"command": " ".join(command), "startup": {"mean": mean(seconds), **get_percentiles(seconds)}, "heavy_imports": imported, "error": error}
+
+
+def bench_replay(num_ticks: int, cycle_delay: float, num_tickers: int = 6, seed: int = 0) -> dict:
+    """
+    Backtests num_ticks generated ticks one second apart, cycling every cycle_delay seconds; Backtest skips the ticks in between, which is what lets it get through millions of them in seconds.
+    """
+    tickers, prices = t1.generate_price_path(seed, num_ticks, num_tickers)
+    result = t1.Backtest(tickers, prices, t1.np.arange(num_ticks, dtype=float), min_cycle_delay=cycle_delay).run()
+    return {"ticks": num_ticks, "tickers": num_tickers, "cycle_delay": cycle_delay, "cycles": result["cycles"], "seconds": result["seconds"], "ticks_per_second": result["ticks_per_second"]}
+
+
+def run_bench(wallet_counts: list[int], latencies: list[float], cycles: int, seed: int = 0, startup_runs: int = 0, replay_ticks: list[int] | None = None, replay_delay: float = 60) -> dict:
+    level = t1.logger.logger.level
+    t1.logger.logger.setLevel("ERROR")
+    try:
+        results = [bench_case(num_wallets, latency, cycles, seed) for latency in latencies for num_wallets in wallet_counts]
+        replay = [bench_replay(num_ticks, replay_delay, seed=seed) for num_ticks in replay_ticks or []]
+    finally:
+        t1.logger.logger.setLevel(level)
+    startup = [bench_startup(command, startup_runs) for command in STARTUP_COMMANDS] if startup_runs > 0 else []
+    return {"time": time(), "python": python_version(), "platform": platform(), "results": results, "replay": replay, "startup": startup}
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """
+    Describes every case that is more than tolerance (proportionally) slower, less throughput or more memory than the same case in baseline, and every startup command that imported an exchange SDK.
+    """
+    regressions: list[str] = []
+    cases = {(case["wallets"], case["latency"]): case for case in baseline.get("results", [])}
+    for case in results["results"]:
+        old = cases.get((case["wallets"], case["latency"]))
+        if old is None:
+            continue
+        checks = [(f"cycle {p}", case["cycle"].get(p), old["cycle"].get(p), True) for p in ("p50", "p95", "p99")]
+        checks += [("cycles/s", case["cycles_per_second"], old["cycles_per_second"], False), ("memory/wallet", case["memory_per_wallet"], old["memory_per_wallet"], True)]
+        for name, new_value, old_value, lower_is_better in checks:
+            if new_value is None or not old_value:
+                continue
+            change = (new_value-old_value)/old_value
+            if (change if lower_is_better else -change) > tolerance:
+                regressions.append(f"{case['wallets']} wallets, {case['latency']}s latency: {name} went from {old_value:.6g} to {new_value:.6g} ({change:+.0%})")
+    replays = {(case["ticks"], case["cycle_delay"]): case for case in baseline.get("replay", [])}
+    for case in results.get("replay", []):
+        old = replays.get((case["ticks"], case["cycle_delay"]))
+        if old is not None and old["ticks_per_second"]:
+            change = (case["ticks_per_second"]-old["ticks_per_second"])/old["ticks_per_second"]
+            if -change > tolerance:
+                regressions.append(f"replay of {case['ticks']} ticks: ticks/s went from {old['ticks_per_second']:.6g} to {case['ticks_per_second']:.6g} ({change:+.0%})")
+    startups = {case["command"]: case for case in baseline.get("startup", [])}
+    for case in results.get("startup", []):
+        if case.get("error"):
+            regressions.append(f"{case['command']} failed: {case['error']}")
+        if case["heavy_imports"]:
+            regressions.append(f"{case['command']} imported {', '.join(case['heavy_imports'])}")
+        old = startups.get(case["command"])
+        if old is not None and old["startup"].get("p50"):
+            change = (case["startup"]["p50"]-old["startup"]["p50"])/old["startup"]["p50"]
+            if change > tolerance:
+                regressions.append(f"{case['command']}: startup p50 went from {old['startup']['p50']:.6g} to {case['startup']['p50']:.6g} ({change:+.0%})")
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    lines = ["wallets,latency,cycle_p50,cycle_p95,cycle_p99,refresh_p50,cycles_per_second,threads,memory_per_wallet"]
+    for case in results["results"]:
+        lines.append(",".join(str(value) for value in (case["wallets"], case["latency"], case["cycle"].get("p50"), case["cycle"].get("p95"), case["cycle"].get("p99"), case["refresh"].get("p50"), case["cycles_per_second"], case["threads"], case["memory_per_wallet"])))
+    if results.get("replay"):
+        lines.append("ticks,tickers,cycle_delay,cycles,seconds,ticks_per_second")
+        for case in results["replay"]:
+            lines.append(",".join(str(value) for value in (case["ticks"], case["tickers"], case["cycle_delay"], case["cycles"], case["seconds"], case["ticks_per_second"])))
+    if results.get("startup"):
+        lines.append("command,startup_p50,startup_p95,heavy_imports")
+        for case in results["startup"]:
+            lines.append(",".join(str(value) for value in (case["command"], case["startup"].get("p50"), case["startup"].get("p95"), " ".join(case["heavy_imports"]))))
+    return "\n".join(lines)
+
+
+
+def prep_parser(parser: ArgumentParser | None = None) -> ArgumentParser:
+    if parser is None:
+        parser = ArgumentParser(description="Benchmarks the trading core against stand-in exchanges")
+
+    parser.add_argument("--"+ConfigKeys.WALLETS, help="Wallet counts to benchmark (none to only time startup)", type=int, nargs="*", default=[2, 10, 100, 1000])
+    parser.add_argument("--"+ConfigKeys.LATENCIES, help="Artificial latencies (in seconds) of every exchange and balance call", type=float, nargs="+", default=[0, 0.001])
+    parser.add_argument("-c", "--"+t1.ConfigKeys.CYCLES, help="Cycles to time per case", type=int, default=50)
+    parser.add_argument("--"+t1.ConfigKeys.SEED, help="Random seed for the stand-in prices", type=int, default=0)
+    parser.add_argument("-o", "--"+ConfigKeys.OUTPUT, help="JSON file to write the results to (usable as a later baseline)")
+    parser.add_argument("-b", "--"+ConfigKeys.BASELINE, help="JSON results to compare against; exits with 1 if any case regressed")
+    parser.add_argument("--"+ConfigKeys.TOLERANCE, help="Proportional slowdown tolerated before a case counts as regressed", type=float, default=0.2)
+    parser.add_argument("--"+ConfigKeys.STARTUP, help="Also time --help and test mode of every entry script this many times each, failing if any imported an exchange SDK", type=int, default=0)
+    parser.add_argument("--"+ConfigKeys.REPLAY, help="Tick counts to time a backtest replay over (none to skip it)", type=int, nargs="*", default=[1000000])
+    parser.add_argument("--"+ConfigKeys.REPLAY_DELAY, help="Seconds between replayed cycles, the ticks being a second apart", type=float, default=60)
+    parser.add_argument("--"+ConfigKeys.STARTUP_ONLY, help="Skip the wallet cases and only time startup (--startup times, 1 unless given)", action="store_true")
+
+    return parser
+
+
+def main(args: list[str]) -> int:
+    t1.common_init()
+    pargs = vars(prep_parser().parse_args(args=args[1:]))
+    if pargs[ConfigKeys.STARTUP_ONLY]:
+        pargs[ConfigKeys.WALLETS] = []
+        pargs[ConfigKeys.REPLAY] = []
+        pargs[ConfigKeys.STARTUP] = max(pargs[ConfigKeys.STARTUP], 1)
+    results = run_bench(pargs[ConfigKeys.WALLETS], pargs[ConfigKeys.LATENCIES], pargs[t1.ConfigKeys.CYCLES], pargs[t1.ConfigKeys.SEED], pargs[ConfigKeys.STARTUP], pargs[ConfigKeys.REPLAY], pargs[ConfigKeys.REPLAY_DELAY])
+    t1.logger.info(f"Benchmark results:\n{format_results(results)}")
+    if pargs[ConfigKeys.OUTPUT]:
+        with open(pargs[ConfigKeys.OUTPUT], "w") as file:
+            file.write(dumps(results, indent=4)+"\n")
+    if pargs[ConfigKeys.BASELINE] or results["startup"]:
+        baseline: dict = {}
+        if pargs[ConfigKeys.BASELINE]:
+            with open(pargs[ConfigKeys.BASELINE]) as file:
+                baseline = loads(file.read())
+        regressions = compare(results, baseline, pargs[ConfigKeys.TOLERANCE])
+        for regression in regressions:
+            t1.logger.error(f"Regression: {regression}")
+        if regressions:
+            return 1
+        t1.logger.info("No regressions found")
+    return 0
+
+if __name__ == "__main__":
+    from sys import argv
+    exit(main(argv))
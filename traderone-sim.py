@@ -0,0 +1,867 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from os import path as os_path
+from random import Random
+from threading import Event, Lock, RLock, Thread
+from time import monotonic, sleep, time
+from typing import final#, override
+from urllib.parse import parse_qs, urlparse
+import traderone as t1
+
+
+
+@final
+class ConfigKeys():
+    HOST = "host"
+    PORT = "port"
+    MARKET = "market"
+    LATENCY = "latency"
+    JITTER = "jitter"
+    METHOD_LATENCY = "method_latency"
+    ERROR_RATE = "error_rate"
+    RATE_LIMIT = "rate_limit"
+    BURST = "burst"
+    BLOCK_TIME = "block_time"
+    DRIFT = "drift"
+
+
+
+CHAIN_ID: int = 1 # Mainnet, so the uniswap client picks its mainnet router and factory, which are simulated at the same addresses
+ROUTER_ADDRESS = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+FACTORY_ADDRESS = "0x5c69bee701ef814a2b6a3edd4b1652cb9cc5aa6f"
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+ETH_ADDRESS = "0x0000000000000000000000000000000000000000"
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+GAS_PRICE: int = 10**9
+GAS_USED: int = 150000
+UINT256_MAX: int = 2**256-1
+FEE_BPS: int = 30
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# The 4-byte selectors (first bytes of the keccak256 of the signature) of every contract function simulated
+SELECTORS: dict[bytes, str] = {bytes.fromhex(selector): signature for selector, signature in {
+        "70a08231": "balanceOf(address)",
+        "dd62ed3e": "allowance(address,address)",
+        "095ea7b3": "approve(address,uint256)",
+        "a9059cbb": "transfer(address,uint256)",
+        "313ce567": "decimals()",
+        "95d89b41": "symbol()",
+        "06fdde03": "name()",
+        "18160ddd": "totalSupply()",
+        "d0e30db0": "deposit()",
+        "2e1a7d4d": "withdraw(uint256)",
+        "ad5c4648": "WETH()",
+        "c45a0155": "factory()",
+        "d06ca61f": "getAmountsOut(uint256,address[])",
+        "1f00ca74": "getAmountsIn(uint256,address[])",
+        "7ff36ab5": "swapExactETHForTokens(uint256,address[],address,uint256)",
+        "18cbafe5": "swapExactTokensForETH(uint256,uint256,address[],address,uint256)",
+        "38ed1739": "swapExactTokensForTokens(uint256,uint256,address[],address,uint256)",
+        "fb3bdb41": "swapETHForExactTokens(uint256,address[],address,uint256)",
+        "4a25d94a": "swapTokensForExactETH(uint256,uint256,address[],address,uint256)",
+        "8803dbee": "swapTokensForExactTokens(uint256,uint256,address[],address,uint256)",
+        "e6a43905": "getPair(address,address)",
+        "0902f1ac": "getReserves()",
+        "0dfe1681": "token0()",
+        "d21220a7": "token1()",
+        "82ad56cb": "aggregate3((address,bool,bytes)[])",
+        "4d2301cc": "getEthBalance(address)",
+        }.items()}
+
+# Every token is pooled against the first token of its chain; balances and liquidity are in whole tokens and USD
+DEFAULT_MARKET: dict[str, dict] = {
+        "ethereum": {"native": 10, "tokens": [
+            {"symbol": "weth", "address": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2", "decimals": 18, "price": 3000, "balance": 0},
+            {"symbol": "bat", "address": "0x0d8775f648430679a709e98d2b0cb6250d2887ef", "decimals": 18, "price": 0.2, "balance": 10000, "liquidity": 10**6},
+            {"symbol": "dai", "address": "0x6b175474e89094c44da98b954eedeac495271d0f", "decimals": 18, "price": 1, "balance": 3000, "liquidity": 10**7},
+            ]},
+        "solana": {"tokens": [
+            {"symbol": "usdc", "address": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", "decimals": 6, "price": 1, "balance": 1000},
+            {"symbol": "sol", "address": "So11111111111111111111111111111111111111112", "decimals": 9, "price": 150, "balance": 10, "liquidity": 10**7},
+            {"symbol": "usdt", "address": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB", "decimals": 6, "price": 1, "balance": 1000, "liquidity": 10**7},
+            ]},
+        }
+
+
+
+class SimulatedRevert(Exception):
+    """
+    A contract call that reverted, or a simulated failure; either way a JSON-RPC error.
+    """
+    def __init__(self, message: str, code: int = 3):
+        super().__init__(message)
+        self.code: int = code
+
+
+def _split_types_(types: str) -> list[str]:
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(types):
+        depth += (char == "(")-(char == ")")
+        if char == "," and depth == 0:
+            parts.append(types[start:i])
+            start = i+1
+    if types[start:]:
+        parts.append(types[start:])
+    return parts
+
+def _is_dynamic_(abi_type: str) -> bool:
+    return abi_type == "bytes" or abi_type.endswith("[]") or (abi_type.startswith("(") and any(_is_dynamic_(part) for part in _split_types_(abi_type[1:-1])))
+
+def abi_encode(types: list[str], values: list) -> bytes:
+    """
+    The ABI encoding of values, for the uint256, address, bool and bytes types and arrays and tuples of them.
+    """
+    heads: list[bytes] = []
+    tails: list[bytes] = []
+    offset = 32*len(types)
+    for abi_type, value in zip(types, values):
+        if abi_type.endswith("[]"):
+            encoded = len(value).to_bytes(32, "big")+abi_encode([abi_type[:-2]]*len(value), value)
+        elif abi_type.startswith("("):
+            encoded = abi_encode(_split_types_(abi_type[1:-1]), value)
+        elif abi_type == "bytes":
+            encoded = len(value).to_bytes(32, "big")+value+bytes(-len(value) % 32)
+        elif abi_type == "address":
+            encoded = int(value, 16).to_bytes(32, "big")
+        else:
+            encoded = int(value).to_bytes(32, "big")
+        if _is_dynamic_(abi_type):
+            heads.append(offset.to_bytes(32, "big"))
+            tails.append(encoded)
+            offset += len(encoded)
+        else:
+            heads.append(encoded)
+    return b"".join(heads+tails)
+
+def abi_decode(types: list[str], data: bytes) -> list:
+    """
+    The inverse of abi_encode, for tuples of one-word static types.
+    """
+    values = []
+    for i, abi_type in enumerate(types):
+        word = data[32*i:32*i+32]
+        if _is_dynamic_(abi_type):
+            part = data[int.from_bytes(word, "big"):]
+            if abi_type.endswith("[]"):
+                values.append(abi_decode([abi_type[:-2]]*int.from_bytes(part[:32], "big"), part[32:]))
+            elif abi_type.startswith("("):
+                values.append(abi_decode(_split_types_(abi_type[1:-1]), part))
+            else:
+                values.append(part[32:32+int.from_bytes(part[:32], "big")])
+        elif abi_type == "address":
+            values.append("0x"+word[12:].hex())
+        elif abi_type == "bool":
+            values.append(bool(int.from_bytes(word, "big")))
+        else:
+            values.append(int.from_bytes(word, "big"))
+    return values
+
+def rlp_decode(data: bytes) -> list | bytes:
+    """
+    The item (bytes, or a list of items) data holds in RLP.
+    """
+    def item(pos: int) -> tuple[list | bytes, int]:
+        prefix = data[pos]
+        if prefix < 0x80:
+            return data[pos:pos+1], pos+1
+        if prefix < 0xc0:
+            size, pos = (prefix-0x80, pos+1) if prefix <= 0xb7 else (int.from_bytes(data[pos+1:pos+prefix-0xb6], "big"), pos+prefix-0xb6)
+            return data[pos:pos+size], pos+size
+        size, pos = (prefix-0xc0, pos+1) if prefix <= 0xf7 else (int.from_bytes(data[pos+1:pos+prefix-0xf6], "big"), pos+prefix-0xf6)
+        end, items = pos+size, []
+        while pos < end:
+            value, pos = item(pos)
+            items.append(value)
+        return items, end
+    return item(0)[0]
+
+def base58(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, digit = divmod(n, 58)
+        out = BASE58_ALPHABET[digit]+out
+    return "1"*(len(data)-len(data.lstrip(b"\0")))+out
+
+def _hex_(n: int) -> str:
+    return hex(n)
+
+def _hash_(*parts) -> str:
+    return "0x"+sha256(":".join(map(str, parts)).encode()).hexdigest()
+
+
+
+class SimToken():
+    __slots__ = ("symbol", "address", "decimals", "balance", "reserve", "base_reserve")
+
+    def __init__(self, symbol: str, address: str, decimals: int, balance: int, reserve: int, base_reserve: int):
+        self.symbol: str = symbol
+        self.address: str = address
+        self.decimals: int = decimals
+        self.balance: int = balance
+        self.reserve: int = reserve
+        self.base_reserve: int = base_reserve
+
+
+class SimChain():
+    """
+    One chain's tokens, the account's raw balance of each and a constant-product pool (Uniswap v2 pricing, FEE_BPS fee) between each and the chain's base token, the first one listed.
+    A swap between two other tokens goes through the base token, as Uniswap v2 and Jupiter would route it.
+    """
+    def __init__(self, spec: dict):
+        tokens = spec["tokens"]
+        self.base: str = self.normalize(tokens[0]["address"])
+        self.base_price: float = tokens[0]["price"]
+        self.native: int = int(spec.get("native", 0)*10**(18 if self.base.startswith("0x") else 9))
+        self.tokens: dict[str, SimToken] = {}
+        base_decimals = tokens[0]["decimals"]
+        for token in tokens:
+            liquidity = token.get("liquidity", 10**7)
+            self.tokens[self.normalize(token["address"])] = SimToken(token["symbol"], token["address"], token["decimals"], int(token.get("balance", 0)*10**token["decimals"]), int(liquidity/token["price"]*10**token["decimals"]), int(liquidity/self.base_price*10**base_decimals))
+
+    @staticmethod
+    def normalize(address: str) -> str:
+        return address.lower() if address.startswith("0x") else address
+
+    def get_token(self, address: str) -> SimToken:
+        token = self.tokens.get(self.normalize(address))
+        if token is None:
+            raise SimulatedRevert(f"Unknown token {address}")
+        return token
+
+    def get_hops(self, path: list[str]) -> list[tuple[SimToken, bool]]:
+        """
+        The (pool token, into the base token?) swaps that path takes.
+        """
+        hops: list[tuple[SimToken, bool]] = []
+        for from_address, to_address in zip(path, path[1:]):
+            from_address, to_address = self.normalize(from_address), self.normalize(to_address)
+            if from_address == to_address:
+                raise SimulatedRevert("UniswapV2Library: IDENTICAL_ADDRESSES")
+            if from_address != self.base:
+                hops.append((self.get_token(from_address), True))
+            if to_address != self.base:
+                hops.append((self.get_token(to_address), False))
+        return hops
+
+    @staticmethod
+    def get_reserves(token: SimToken, to_base: bool) -> tuple[int, int]:
+        return (token.reserve, token.base_reserve) if to_base else (token.base_reserve, token.reserve)
+
+    def get_amounts_out(self, amount: int, path: list[str]) -> list[int]:
+        amounts = [amount]
+        for token, to_base in self.get_hops(path):
+            reserve_in, reserve_out = self.get_reserves(token, to_base)
+            amount = amount*(10000-FEE_BPS)*reserve_out // (reserve_in*10000+amount*(10000-FEE_BPS))
+            amounts.append(amount)
+        return amounts
+
+    def get_amounts_in(self, amount: int, path: list[str]) -> list[int]:
+        amounts = [amount]
+        for token, to_base in reversed(self.get_hops(path)):
+            reserve_in, reserve_out = self.get_reserves(token, to_base)
+            if amount >= reserve_out:
+                raise SimulatedRevert("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+            amount = reserve_in*amount*10000 // ((reserve_out-amount)*(10000-FEE_BPS))+1
+            amounts.insert(0, amount)
+        return amounts
+
+    def swap(self, amounts: list[int], path: list[str]) -> None:
+        """
+        Moves the pools' reserves by amounts, from get_amounts_out or get_amounts_in on the same path.
+        """
+        for (token, to_base), amount_in, amount_out in zip(self.get_hops(path), amounts, amounts[1:]):
+            if to_base:
+                token.reserve, token.base_reserve = token.reserve+amount_in, token.base_reserve-amount_out
+            else:
+                token.base_reserve, token.reserve = token.base_reserve+amount_in, token.reserve-amount_out
+
+    def get_price(self, address: str) -> float:
+        """
+        The token's marginal USD price.
+        """
+        token = self.get_token(address)
+        if self.normalize(address) == self.base:
+            return self.base_price
+        base = self.tokens[self.base]
+        return (token.base_reserve/10**base.decimals)/(token.reserve/10**token.decimals)*self.base_price
+
+    def drift(self, rng: Random, size: float) -> None:
+        """
+        Trades a random proportion of up to size of each pool's reserve in or out, so prices wander between blocks.
+        """
+        for address, token in self.tokens.items():
+            if address != self.base:
+                move = rng.uniform(-size, size)
+                path = [address, self.base] if move > 0 else [self.base, address]
+                amount = int(abs(move)*(token.reserve if move > 0 else token.base_reserve))
+                if amount > 0:
+                    self.swap(self.get_amounts_out(amount, path), path)
+
+
+
+class Faults():
+    """
+    Per-call latency (a base, per-method overrides and uniform jitter), a random error rate and a token-bucket rate limit on requests.
+    """
+    def __init__(self, latency: float = 0, jitter: float = 0, method_latency: dict[str, float] | None = None, error_rate: float = 0, rate_limit: float = 0, burst: int | None = None, seed: int | None = None):
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.method_latency: dict[str, float] = method_latency or {}
+        self.error_rate: float = error_rate
+        self.rate_limit: float = rate_limit
+        self.burst: float = burst if burst is not None else max(1, rate_limit)
+        self.tokens: float = self.burst
+        self.refilled: float = monotonic()
+        self.rng: Random = Random(seed)
+        self.lock: Lock = Lock()
+
+    def allow(self) -> bool:
+        """
+        Whether a request fits in the rate limit (always, without one).
+        """
+        if self.rate_limit <= 0:
+            return True
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens+(now-self.refilled)*self.rate_limit)
+            self.refilled = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def delay(self, methods: list[str]) -> None:
+        """
+        Sleeps for the slowest of methods, as they are answered together.
+        """
+        latency = max((self.method_latency.get(method, self.latency) for method in methods), default=self.latency)
+        if self.jitter > 0:
+            with self.lock:
+                latency += self.rng.uniform(0, self.jitter)
+        if latency > 0:
+            sleep(latency)
+
+    def fails(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+
+
+class Simulator():
+    """
+    A single account on a simulated Ethereum and Solana, answering the JSON-RPC methods and Jupiter endpoints the exchange plugins use.
+    Ethereum transactions are decoded but not verified, and spend from the one account whoever signed them; they are mined one per block as soon as their nonce is next, so nonces sent out of order wait for the gap to fill.
+    Every read is of the latest state, whatever block it names.
+    """
+    def __init__(self, market: dict[str, dict] = DEFAULT_MARKET, seed: int | None = None):
+        self.lock: RLock = RLock()
+        self.ethereum: SimChain = SimChain(market["ethereum"])
+        self.solana: SimChain = SimChain(market["solana"])
+        self.rng: Random = Random(seed)
+        self.account: str = ETH_ADDRESS
+        self.nonce: int = 0
+        self.queued: dict[int, tuple[str, dict]] = {}
+        self.receipts: dict[str, dict] = {}
+        self.block: int = 1
+        self.block_times: dict[int, int] = {1: int(time())}
+        self.filters: dict[str, int] = {}
+        self.stats: dict[str, dict[str, int]] = {}
+        self.methods: dict = {
+                "web3_clientVersion": lambda: "TraderOneSim/1",
+                "net_version": lambda: str(CHAIN_ID),
+                "net_listening": lambda: True,
+                "eth_chainId": lambda: _hex_(CHAIN_ID),
+                "eth_syncing": lambda: False,
+                "eth_accounts": lambda: [],
+                "eth_blockNumber": lambda: _hex_(self.block),
+                "eth_gasPrice": lambda: _hex_(GAS_PRICE),
+                "eth_maxPriorityFeePerGas": lambda: _hex_(GAS_PRICE),
+                "eth_feeHistory": self.eth_fee_history,
+                "eth_estimateGas": self.eth_estimate_gas,
+                "eth_getBalance": self.eth_get_balance,
+                "eth_getTransactionCount": self.eth_get_transaction_count,
+                "eth_getCode": self.eth_get_code,
+                "eth_getBlockByNumber": self.eth_get_block_by_number,
+                "eth_call": self.eth_call,
+                "eth_sendRawTransaction": self.eth_send_raw_transaction,
+                "eth_getTransactionReceipt": lambda tx_hash: self.receipts.get(tx_hash),
+                "eth_newBlockFilter": self.eth_new_block_filter,
+                "eth_getFilterChanges": self.eth_get_filter_changes,
+                "eth_uninstallFilter": lambda filter_id: self.filters.pop(filter_id, None) is not None,
+                "getHealth": lambda: "ok",
+                "getVersion": lambda: {"solana-core": "traderone-sim", "feature-set": 0},
+                "getSlot": lambda *_: self.block,
+                "getBlockHeight": lambda *_: self.block,
+                "getLatestBlockhash": lambda *_: self._solana_context_({"blockhash": base58(sha256(str(self.block).encode()).digest()), "lastValidBlockHeight": self.block+150}),
+                "getBalance": lambda *_: self._solana_context_(self.get_lamports()),
+                "getTokenAccountsByOwner": self.get_token_accounts_by_owner,
+                "getAccountInfo": lambda address, *_: self._solana_context_(self._mint_account_(address)),
+                "getMultipleAccounts": lambda addresses, *_: self._solana_context_([self._mint_account_(address) for address in addresses]),
+                }
+
+    def record(self, name: str, outcome: str = "calls") -> None:
+        with self.lock:
+            stats = self.stats.setdefault(name, {"calls": 0, "errors": 0, "limited": 0})
+            stats[outcome] += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"block": self.block, "nonce": self.nonce, "queued": len(self.queued), "methods": {name: dict(stats) for name, stats in self.stats.items()}}
+
+    def call(self, method: str, params: list):
+        """
+        The result of one JSON-RPC call; raises SimulatedRevert as its error.
+        """
+        handler = self.methods.get(method)
+        if handler is None:
+            raise SimulatedRevert(f"Method {method} is not simulated", -32601)
+        with self.lock:
+            return handler(*params)
+
+    def mine(self, drift: float = 0) -> None:
+        """
+        Mines an empty block (a slot, on Solana), first moving prices by up to drift.
+        """
+        with self.lock:
+            if drift > 0:
+                self.ethereum.drift(self.rng, drift)
+                self.solana.drift(self.rng, drift)
+            self._next_block_()
+
+    def _next_block_(self) -> int:
+        self.block += 1
+        self.block_times[self.block] = int(time())
+        return self.block
+
+    # Ethereum
+
+    def eth_fee_history(self, count, newest, percentiles=None) -> dict:
+        count = min(int(count, 16) if isinstance(count, str) else count, self.block)
+        return {"oldestBlock": _hex_(self.block-count+1), "baseFeePerGas": [_hex_(GAS_PRICE)]*(count+1), "gasUsedRatio": [0.5]*count, "reward": [[_hex_(GAS_PRICE)]*len(percentiles or [])]*count}
+
+    def eth_get_balance(self, address: str, block=None) -> str:
+        self.account = address
+        return _hex_(self.ethereum.native)
+
+    def eth_get_transaction_count(self, address: str, block=None) -> str:
+        self.account = address
+        return _hex_(max(self.queued, default=self.nonce-1)+1 if block == "pending" else self.nonce)
+
+    def eth_get_code(self, address: str, block=None) -> str:
+        address = address.lower()
+        return "0x01" if address in (ROUTER_ADDRESS, FACTORY_ADDRESS, MULTICALL3_ADDRESS) or address in self.ethereum.tokens else "0x"
+
+    def eth_get_block_by_number(self, number, full: bool = False) -> dict | None:
+        number = self.block if number in ("latest", "pending", "safe", "finalized") else 0 if number == "earliest" else int(number, 16)
+        if number not in self.block_times:
+            return None
+        transactions = [receipt for receipt in self.receipts.values() if int(receipt["blockNumber"], 16) == number]
+        return {
+                "number": _hex_(number), "hash": _hash_("block", number), "parentHash": _hash_("block", number-1), "timestamp": _hex_(self.block_times[number]),
+                "baseFeePerGas": _hex_(GAS_PRICE), "gasLimit": _hex_(30000000), "gasUsed": _hex_(GAS_USED*len(transactions)), "miner": ETH_ADDRESS, "difficulty": "0x0", "totalDifficulty": "0x0",
+                "extraData": "0x", "logsBloom": "0x"+"00"*256, "nonce": "0x0000000000000000", "mixHash": _hash_("mix", number), "sha3Uncles": _hash_("uncles", number),
+                "stateRoot": _hash_("state", number), "receiptsRoot": _hash_("receipts", number), "transactionsRoot": _hash_("transactions", number), "size": "0x220", "uncles": [],
+                "transactions": [receipt["transactionHash"] for receipt in transactions],
+                }
+
+    def eth_new_block_filter(self) -> str:
+        filter_id = _hex_(len(self.filters)+1)
+        self.filters[filter_id] = self.block
+        return filter_id
+
+    def eth_get_filter_changes(self, filter_id: str) -> list[str]:
+        if filter_id not in self.filters:
+            raise SimulatedRevert("filter not found", -32000)
+        seen, self.filters[filter_id] = self.filters[filter_id], self.block
+        return [_hash_("block", number) for number in range(seen+1, self.block+1)]
+
+    def eth_call(self, tx: dict, block=None) -> str:
+        return "0x"+self._call_(tx.get("to") or "", bytes.fromhex((tx.get("data") or tx.get("input") or "0x")[2:]), int(tx.get("value") or "0x0", 16), False).hex()
+
+    def eth_estimate_gas(self, tx: dict, block=None) -> str:
+        """
+        Fails the way the transaction would if it were sent now, like a real node's estimate.
+        """
+        self.eth_call(tx, block)
+        return _hex_(GAS_USED)
+
+    def _call_(self, to: str, data: bytes, value: int, execute: bool) -> bytes:
+        """
+        Runs the contract function data calls on to, changing state only if execute is set.
+        """
+        to = to.lower()
+        signature = SELECTORS.get(data[:4])
+        if signature is None:
+            raise SimulatedRevert(f"execution reverted: unknown function 0x{data[:4].hex()} on {to}")
+        name, types = signature.split("(", 1)
+        args = abi_decode(_split_types_(types[:-1]), data[4:])
+        chain = self.ethereum
+        if to == MULTICALL3_ADDRESS:
+            if name == "getEthBalance":
+                return abi_encode(["uint256"], [chain.native])
+            if name == "aggregate3":
+                results = []
+                for target, allow_failure, call_data in args[0]:
+                    try:
+                        results.append((True, self._call_(target, call_data, 0, False)))
+                    except SimulatedRevert:
+                        if not allow_failure:
+                            raise
+                        results.append((False, b""))
+                return abi_encode(["(bool,bytes)[]"], [results])
+        elif to == ROUTER_ADDRESS:
+            if name == "WETH":
+                return abi_encode(["address"], [chain.base])
+            if name == "factory":
+                return abi_encode(["address"], [FACTORY_ADDRESS])
+            if name == "getAmountsOut":
+                return abi_encode(["uint256[]"], [chain.get_amounts_out(*args)])
+            if name == "getAmountsIn":
+                return abi_encode(["uint256[]"], [chain.get_amounts_in(*args)])
+            if name.startswith("swap"):
+                return self._swap_(name, args, value, execute)
+        elif to == FACTORY_ADDRESS:
+            if name == "getPair":
+                return abi_encode(["address"], [self._pair_address_(*args)])
+        elif to in chain.tokens:
+            token = chain.tokens[to]
+            if name == "balanceOf":
+                self.account = args[0]
+                return abi_encode(["uint256"], [token.balance])
+            if name == "allowance":
+                return abi_encode(["uint256"], [UINT256_MAX])
+            if name == "approve":
+                return abi_encode(["bool"], [True])
+            if name == "decimals":
+                return abi_encode(["uint256"], [token.decimals])
+            if name in ("symbol", "name"):
+                return abi_encode(["bytes"], [token.symbol.encode()]) # A string encodes like bytes
+            if name == "totalSupply":
+                return abi_encode(["uint256"], [token.reserve+token.balance])
+            if name == "transfer":
+                self._debit_(token, args[1], execute)
+                return abi_encode(["bool"], [True])
+            if name in ("deposit", "withdraw") and to == chain.base:
+                amount = value if name == "deposit" else args[0]
+                if (chain.native if name == "deposit" else token.balance) < amount:
+                    raise SimulatedRevert("execution reverted")
+                if execute:
+                    sign = 1 if name == "deposit" else -1
+                    chain.native -= sign*amount
+                    token.balance += sign*amount
+                return b""
+        else:
+            pair = next((token for address, token in chain.tokens.items() if self._pair_address_(address, chain.base) == to), None)
+            if pair is not None:
+                base_first = int(chain.base, 16) < int(pair.address, 16)
+                if name == "getReserves":
+                    return abi_encode(["uint256", "uint256", "uint256"], [*((pair.base_reserve, pair.reserve) if base_first else (pair.reserve, pair.base_reserve)), self.block_times[self.block]])
+                if name in ("token0", "token1"):
+                    return abi_encode(["address"], [chain.base if base_first == (name == "token0") else pair.address])
+        raise SimulatedRevert(f"execution reverted: {name} is not simulated on {to}")
+
+    def _pair_address_(self, token_a: str, token_b: str) -> str:
+        if self.ethereum.base not in (token_a.lower(), token_b.lower()) or token_a.lower() == token_b.lower():
+            return ETH_ADDRESS
+        return "0x"+sha256(":".join(sorted((token_a.lower(), token_b.lower()))).encode()).hexdigest()[:40]
+
+    def _debit_(self, token: SimToken, amount: int, execute: bool) -> None:
+        if token.balance < amount:
+            raise SimulatedRevert("execution reverted: TransferHelper: TRANSFER_FROM_FAILED")
+        if execute:
+            token.balance -= amount
+
+    def _swap_(self, name: str, args: list, value: int, execute: bool) -> bytes:
+        chain = self.ethereum
+        from_eth, to_eth, exact_in = name.startswith("swapExactETH") or name.startswith("swapETH"), name.endswith("ForETH") or name.endswith("ExactETH"), name.startswith("swapExact")
+        if from_eth:
+            limit, path = args[0], args[1]
+            amount = value
+        else:
+            amount, limit, path = args[0], args[1], args[2]
+        if exact_in:
+            amounts = chain.get_amounts_out(amount, path)
+            if amounts[-1] < limit:
+                raise SimulatedRevert("execution reverted: UniswapV2Router: INSUFFICIENT_OUTPUT_AMOUNT")
+        else:
+            amounts = chain.get_amounts_in(limit if from_eth else amount, path)
+            if amounts[0] > (value if from_eth else limit):
+                raise SimulatedRevert("execution reverted: UniswapV2Router: EXCESSIVE_INPUT_AMOUNT")
+        if from_eth and chain.native < amounts[0]:
+            raise SimulatedRevert("execution reverted")
+        if not from_eth:
+            self._debit_(chain.get_token(path[0]), amounts[0], False)
+        if execute:
+            if from_eth:
+                chain.native -= amounts[0]
+            else:
+                chain.get_token(path[0]).balance -= amounts[0]
+            if to_eth:
+                chain.native += amounts[-1]
+            else:
+                chain.get_token(path[-1]).balance += amounts[-1]
+            chain.swap(amounts, path)
+        return abi_encode(["uint256[]"], [amounts])
+
+    def eth_send_raw_transaction(self, raw: str) -> str:
+        data = bytes.fromhex(raw[2:])
+        fields = rlp_decode(data if data[0] >= 0xc0 else data[1:])
+        if data[0] >= 0xc0:
+            nonce, gas_price, to, value, call_data = fields[0], fields[1], fields[3], fields[4], fields[5]
+        else:
+            nonce, gas_price, to, value, call_data = fields[1], fields[3 if data[0] == 2 else 2], fields[5], fields[6], fields[7]
+        nonce = int.from_bytes(nonce, "big")
+        if nonce < self.nonce or nonce in self.queued:
+            raise SimulatedRevert("nonce too low", -32000)
+        if self.ethereum.native < GAS_USED*int.from_bytes(gas_price, "big")+int.from_bytes(value, "big"):
+            raise SimulatedRevert("insufficient funds for gas * price + value", -32000)
+        tx_hash = "0x"+sha256(data).hexdigest()
+        self.queued[nonce] = (tx_hash, {"to": "0x"+to.hex(), "data": call_data, "value": int.from_bytes(value, "big"), "gas_price": int.from_bytes(gas_price, "big")})
+        while self.nonce in self.queued:
+            self._execute_(*self.queued.pop(self.nonce))
+            self.nonce += 1
+        return tx_hash
+
+    def _execute_(self, tx_hash: str, tx: dict) -> None:
+        """
+        Mines tx in a block of its own; one that reverts still pays for its gas, and gets a failed receipt.
+        """
+        try:
+            self._call_(tx["to"], tx["data"], tx["value"], False)
+            self._call_(tx["to"], tx["data"], tx["value"], True)
+            status = 1
+        except SimulatedRevert:
+            status = 0
+        self.ethereum.native -= GAS_USED*tx["gas_price"]
+        block = self._next_block_()
+        self.receipts[tx_hash] = {
+                "transactionHash": tx_hash, "transactionIndex": "0x0", "blockHash": _hash_("block", block), "blockNumber": _hex_(block),
+                "from": self.account, "to": tx["to"], "cumulativeGasUsed": _hex_(GAS_USED), "gasUsed": _hex_(GAS_USED), "effectiveGasPrice": _hex_(tx["gas_price"]),
+                "contractAddress": None, "logs": [], "logsBloom": "0x"+"00"*256, "status": _hex_(status), "type": "0x2",
+                }
+
+    # Solana
+
+    def _solana_context_(self, value) -> dict:
+        return {"context": {"slot": self.block}, "value": value}
+
+    def _mint_account_(self, address: str) -> dict | None:
+        token = self.solana.tokens.get(address)
+        if token is None:
+            return None
+        return {"data": {"parsed": {"info": {"decimals": token.decimals, "supply": str(token.reserve+token.balance), "isInitialized": True, "mintAuthority": None, "freezeAuthority": None}, "type": "mint"}, "program": "spl-token", "space": 82},
+                "executable": False, "lamports": 1461600, "owner": TOKEN_PROGRAM_ID, "rentEpoch": 0}
+
+    def get_lamports(self) -> int:
+        """
+        The account's native SOL: the balance listed for the wrapped SOL mint, if the market has it.
+        """
+        token = self.solana.tokens.get(WSOL_MINT)
+        return token.balance if token is not None else self.solana.native
+
+    def get_token_accounts_by_owner(self, owner: str, selector: dict, config: dict | None = None) -> dict:
+        """
+        Like a real node, lists no account for native SOL (see get_lamports).
+        """
+        accounts = []
+        for token in self.solana.tokens.values():
+            if token.address == WSOL_MINT or selector.get("programId", TOKEN_PROGRAM_ID) != TOKEN_PROGRAM_ID or selector.get("mint", token.address) != token.address:
+                continue
+            amount = str(token.balance)
+            ui_amount = token.balance/10**token.decimals
+            info = {"isNative": False, "mint": token.address, "owner": owner, "state": "initialized", "tokenAmount": {"amount": amount, "decimals": token.decimals, "uiAmount": ui_amount, "uiAmountString": str(ui_amount)}}
+            accounts.append({"pubkey": base58(sha256(f"{owner}:{token.address}".encode()).digest()), "account": {"data": {"parsed": {"info": info, "type": "account"}, "program": "spl-token", "space": 165}, "executable": False, "lamports": 2039280, "owner": TOKEN_PROGRAM_ID, "rentEpoch": 0}})
+        return self._solana_context_(accounts)
+
+    # Jupiter
+
+    def jupiter_price(self, query: dict[str, str]) -> dict:
+        with self.lock:
+            data = {mint: {"id": mint, "type": "derivedPrice", "price": str(self.solana.get_price(mint))} for mint in query.get("ids", "").split(",") if mint in self.solana.tokens}
+        return {"data": data, "timeTaken": 0}
+
+    def jupiter_quote(self, query: dict[str, str]) -> dict:
+        path, amount = [query["inputMint"], query["outputMint"]], int(query["amount"])
+        with self.lock:
+            amounts = self.solana.get_amounts_out(amount, path)
+            spot = self.solana.get_price(path[0])/self.solana.get_price(path[1])*10**(self.solana.get_token(path[1]).decimals-self.solana.get_token(path[0]).decimals)
+            hops = self.solana.get_hops(path)
+        slippage = int(query.get("slippageBps", 50))
+        mints = [path[0], *(self.solana.base if to_base else token.address for token, to_base in hops)]
+        return {
+                "inputMint": path[0], "inAmount": str(amount), "outputMint": path[1], "outAmount": str(amounts[-1]), "otherAmountThreshold": str(amounts[-1]*(10000-slippage)//10000),
+                "swapMode": "ExactIn", "slippageBps": slippage, "priceImpactPct": str(max(0.0, 1-amounts[-1]/(amount*spot)) if amount else 0), "contextSlot": self.block, "timeTaken": 0,
+                "routePlan": [{"swapInfo": {"ammKey": token.address, "label": "TraderOneSim", "inputMint": in_mint, "outputMint": out_mint, "inAmount": str(amount_in), "outAmount": str(amount_out), "feeAmount": str(amount_in*FEE_BPS//10000), "feeMint": in_mint}, "percent": 100}
+                    for (token, _), in_mint, out_mint, amount_in, amount_out in zip(hops, mints, mints[1:], amounts, amounts[1:])],
+                }
+
+
+
+class SimRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON-RPC (single or batched) on POST to any path, and Jupiter's price and quote endpoints and the simulator's stats on GET, all behind the server's faults.
+    """
+    server: "SimServer"
+    protocol_version = "HTTP/1.1"
+
+    def _reply_(self, status: int, body) -> None:
+        data = dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _limited_(self, name: str) -> bool:
+        if self.server.faults.allow():
+            return False
+        self.server.simulator.record(name, "limited")
+        self._reply_(429, {"jsonrpc": "2.0", "id": None, "error": {"code": -32005, "message": "Too many requests"}})
+        return True
+
+    def _answer_(self, request: dict) -> dict:
+        method = request.get("method", "")
+        self.server.simulator.record(method)
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            if self.server.faults.fails():
+                raise SimulatedRevert("Simulated failure", -32000)
+            reply["result"] = self.server.simulator.call(method, request.get("params") or [])
+        except SimulatedRevert as e:
+            self.server.simulator.record(method, "errors")
+            reply["error"] = {"code": e.code, "message": str(e)}
+        except Exception as e:
+            self.server.simulator.record(method, "errors")
+            reply["error"] = {"code": -32602, "message": f"Invalid params: {e!r}"}
+        return reply
+
+    def do_POST(self) -> None:
+        body = loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"null")
+        requests = body if isinstance(body, list) else [body]
+        if self._limited_(requests[0].get("method", "") if requests and isinstance(requests[0], dict) else ""):
+            return
+        self.server.faults.delay([request.get("method", "") for request in requests])
+        replies = [self._answer_(request) for request in requests]
+        self._reply_(200, replies if isinstance(body, list) else replies[0])
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        name = url.path.rstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        handler = {"/price/v2": self.server.simulator.jupiter_price, "/v6/quote": self.server.simulator.jupiter_quote, "/sim/stats": lambda _: self.server.simulator.get_stats()}.get(name)
+        if handler is None:
+            self._reply_(404, {"error": f"{url.path} is not simulated"})
+            return
+        if self._limited_(name):
+            return
+        self.server.simulator.record(name)
+        self.server.faults.delay([name])
+        try:
+            if name != "/sim/stats" and self.server.faults.fails():
+                raise SimulatedRevert("Simulated failure", -32000)
+            self._reply_(200, handler(query))
+        except Exception as e:
+            self.server.simulator.record(name, "errors")
+            self._reply_(500 if isinstance(e, SimulatedRevert) and e.code == -32000 else 400, {"error": str(e)})
+
+    #@override
+    def log_message(self, format: str, *args) -> None:
+        t1.logger.debug("%s - " + format, self.address_string(), *args)
+
+
+class SimServer(ThreadingHTTPServer):
+    """
+    Serves a Simulator, mining a block (and moving prices by up to drift) every block_time seconds if given; start() serves from a background thread, for using it in-process.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], simulator: Simulator, faults: Faults, block_time: float = 0, drift: float = 0):
+        super().__init__(address, SimRequestHandler)
+        self.simulator: Simulator = simulator
+        self.faults: Faults = faults
+        self.block_time: float = block_time
+        self.drift: float = drift
+        self.stopped: Event = Event()
+        self.threads: list[Thread] = []
+
+    def get_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _mine_(self) -> None:
+        while not self.stopped.wait(self.block_time):
+            self.simulator.mine(self.drift)
+
+    def start(self) -> "SimServer":
+        self.threads.append(Thread(target=self.serve_forever, name="traderone-sim", daemon=True))
+        if self.block_time > 0:
+            self.threads.append(Thread(target=self._mine_, name="traderone-sim-blocks", daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.shutdown()
+        self.server_close()
+
+
+
+def load_market(market: str | None) -> dict[str, dict]:
+    """
+    DEFAULT_MARKET, or the market in a JSON file (or string) shaped like it.
+    """
+    if not market:
+        return DEFAULT_MARKET
+    if os_path.isfile(market):
+        with open(market) as file:
+            market = file.read()
+    return loads(market)
+
+
+def prep_parser(parser: ArgumentParser | None = None) -> ArgumentParser:
+    if parser is None:
+        parser = ArgumentParser(description="Simulates the Ethereum and Solana JSON-RPC and Jupiter endpoints the exchanges use, on localhost")
+
+    parser.add_argument("--"+ConfigKeys.HOST, help="Address to listen on", default="127.0.0.1")
+    parser.add_argument("--"+ConfigKeys.PORT, help="Port to listen on", type=int, default=8545)
+    parser.add_argument("--"+ConfigKeys.MARKET, help="JSON file (or string) of the tokens, balances and pool liquidity to simulate, shaped like DEFAULT_MARKET")
+    parser.add_argument("--"+ConfigKeys.LATENCY, help="Seconds every request takes", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.JITTER, help="Up to this many seconds more, at random", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.METHOD_LATENCY, help="JSON object of seconds per method (or Jupiter path, e.g. /v6/quote) instead of --latency", type=loads)
+    parser.add_argument("--"+ConfigKeys.ERROR_RATE, help="Proportion of calls that fail", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.RATE_LIMIT, help="Requests per second answered before the rest get HTTP 429 (0 for no limit)", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.BURST, help="Requests allowed at once under --rate_limit (defaults to one second's worth)", type=int)
+    parser.add_argument("--"+ConfigKeys.BLOCK_TIME, help="Seconds between empty blocks (0 only mines blocks for transactions)", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.DRIFT, help="Proportion of each pool's reserves traded at random every block, so prices move", type=float, default=0)
+    parser.add_argument("--"+t1.ConfigKeys.SEED, help="Random seed for faults and price drift", type=int)
+
+    return parser
+
+
+def main(args: list[str]) -> int:
+    t1.common_init()
+    pargs = vars(prep_parser().parse_args(args=args[1:]))
+    faults = Faults(pargs[ConfigKeys.LATENCY], pargs[ConfigKeys.JITTER], pargs[ConfigKeys.METHOD_LATENCY], pargs[ConfigKeys.ERROR_RATE], pargs[ConfigKeys.RATE_LIMIT], pargs[ConfigKeys.BURST], pargs[t1.ConfigKeys.SEED])
+    server = SimServer((pargs[ConfigKeys.HOST], pargs[ConfigKeys.PORT]), Simulator(load_market(pargs[ConfigKeys.MARKET]), pargs[t1.ConfigKeys.SEED]), faults, pargs[ConfigKeys.BLOCK_TIME], pargs[ConfigKeys.DRIFT]).start()
+    t1.logger.info("Simulating on %s", server.get_url())
+    try:
+        server.stopped.wait()
+    except KeyboardInterrupt:
+        print("Keyboard interrupt received, exiting...")
+    finally:
+        server.stop()
+        t1.logger.info("Simulator stats: %s", dumps(server.simulator.get_stats()))
+    return 0
+
+if __name__ == "__main__":
+    from sys import argv
+    exit(main(argv))
@@ -1,29 +1,81 @@
 #!/usr/bin/env python3
 
+if __name__ == "__main__": # Run as the traderone module rather than as __main__, so plugins, sweep workers and shards that import traderone share these classes
+    from sys import argv
+    import traderone
+    exit(traderone.main(argv))
+
 from argparse import ArgumentParser
-from logging import getLogger, basicConfig
-from threading import Thread
-from time import sleep, time
-from random import randint
+from array import array
+import asyncio
+import atexit
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from heapq import heapify, heappop, heappush
+from importlib import import_module
+from itertools import count, product
+from json import dumps, loads
+from logging import BASIC_FORMAT, DEBUG, ERROR, INFO, WARNING, Formatter, LogRecord, StreamHandler, getLogger, basicConfig
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing import Lock as ProcessLock
+from multiprocessing.shared_memory import SharedMemory
+from os import path as os_path
+from queue import SimpleQueue
+from threading import Condition, Event, Lock, Thread
+from time import monotonic, perf_counter, sleep, time
+from random import Random, randint
+import sqlite3
 from typing import final#, override
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 
 class LoggerWrapper: # This is here just in case regular print statements are needed
+    """
+    Formatting is lazy: msg % args is left to whichever handler writes the record, and a callable msg is only called if its level is enabled.
+    Keyword arguments go with the record as structured fields, which JsonLinesFormatter writes out, except exc_info and stack_info, which go to logging as usual.
+    Fields may not be named after the keys JsonLinesFormatter writes itself (RESERVED_FIELDS).
+    """
+    RESERVED_FIELDS: frozenset[str] = frozenset(("time", "level", "logger", "message", "exception", "stack"))
+
     def __init__(self, name: str = "traderone"):
         self.logger = getLogger(name)
         self.logger.setLevel("INFO")
 
-    def info(self, msg):
-        self.logger.info(msg)
+    def is_enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def _log_(self, level: int, msg, args: tuple, fields: dict) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        exc_info = stack_info = None
+        if fields:
+            exc_info = fields.pop("exc_info", None)
+            stack_info = fields.pop("stack_info", False)
+            if not self.RESERVED_FIELDS.isdisjoint(fields):
+                raise ValueError(f"Log fields cannot be named {', '.join(sorted(self.RESERVED_FIELDS.intersection(fields)))}")
+        if callable(msg):
+            msg = msg()
+        self.logger.log(level, msg, *args, exc_info=exc_info, stack_info=stack_info, extra={"fields": fields} if fields else None, stacklevel=3)
+
+    def debug(self, msg, *args, **fields):
+        self._log_(DEBUG, msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        self._log_(INFO, msg, args, fields)
         #print(msg)
 
-    def warning(self, msg):
-        self.logger.warning(msg)
+    def warning(self, msg, *args, **fields):
+        self._log_(WARNING, msg, args, fields)
         #print(msg)
 
-    def error(self, msg):
-        self.logger.error(msg)
+    def error(self, msg, *args, **fields):
+        self._log_(ERROR, msg, args, fields)
         #print(msg)
 
 
@@ -31,6 +83,277 @@ global logger
 logger = LoggerWrapper()
 
 
+class JsonLinesFormatter(Formatter):
+    """
+    Writes each record as one JSON object: its time, level, logger and message (and exception or stack, if it has them), plus its fields.
+    """
+    #@override
+    def format(self, record: LogRecord) -> str:
+        line = {"time": record.created, "level": record.levelname, "logger": record.name, "message": record.getMessage(), **getattr(record, "fields", {})}
+        if record.exc_info:
+            line["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            line["stack"] = self.formatStack(record.stack_info)
+        return dumps(line, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records as they are, leaving msg % args to the writer thread (QueueHandler formats on the logging thread).
+    As arguments are only formatted later, pass ones that will not change, like numbers, strings or copies.
+    """
+    #@override
+    def prepare(self, record: LogRecord) -> LogRecord:
+        return record
+
+
+_log_listener: QueueListener | None = None
+
+def configure_logging(json_lines: bool = False, queued: bool = False, stream=None) -> None:
+    """
+    Writes the logger's records to stream (stdout by default) as JSON lines and/or from a background thread fed through a queue, so a cycle only pays for creating and enqueueing its records.
+    Whatever is still queued is written out on exit, or by stop_log_queue().
+    """
+    global _log_listener
+    stop_log_queue()
+    if stream is None:
+        from sys import stdout
+        stream = stdout
+    handler = StreamHandler(stream)
+    handler.setFormatter(JsonLinesFormatter() if json_lines else Formatter(BASIC_FORMAT))
+    if queued:
+        queue: SimpleQueue = SimpleQueue()
+        _log_listener = QueueListener(queue, handler)
+        _log_listener.start()
+        handler = DeferredQueueHandler(queue)
+    logger.logger.handlers = [handler]
+    logger.logger.propagate = False
+
+
+def stop_log_queue() -> None:
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+atexit.register(stop_log_queue)
+
+
+
+BALANCE_REFRESH_MAX_WORKERS: int = 8
+_balance_executor: ThreadPoolExecutor | None = None
+_balance_executor_lock: Lock = Lock()
+
+def get_balance_executor() -> ThreadPoolExecutor:
+    """
+    Shared, bounded pool that every non-blocking balance refresh runs on.
+    """
+    global _balance_executor
+    with _balance_executor_lock:
+        if _balance_executor is None:
+            _balance_executor = ThreadPoolExecutor(max_workers=BALANCE_REFRESH_MAX_WORKERS, thread_name_prefix="traderone-balance")
+        return _balance_executor
+
+
+
+class Metrics():
+    """
+    Timers and counters for the trading hot path, exported as Prometheus text or JSON lines.
+    Instrumented code checks enabled before timing anything, so leaving it disabled costs a single attribute lookup.
+    """
+    def __init__(self, enabled: bool = False, path: str | None = None, prefix: str = "traderone"):
+        self.enabled: bool = enabled
+        self.path: str | None = path
+        self.prefix: str = prefix
+        self.timers: dict[str, list[float]] = {}
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.lock: Lock = Lock()
+
+    def enable(self, path: str | None = None) -> None:
+        self.enabled = True
+        if path is not None:
+            self.path = path
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0)+amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self.lock:
+            self.gauges[name] = value
+
+    def end_cycle(self, seconds: float, trades: int) -> None:
+        self.observe("cycle", seconds)
+        self.increment("cycles")
+        self.increment("trades", trades)
+        self.set_gauge("last_cycle_trades", trades)
+        if self.path is not None:
+            self.write(self.path)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                    "time": time(),
+                    "timers": {name: {"count": timer[0], "sum": timer[1], "max": timer[2]} for name, timer in self.timers.items()},
+                    "counters": dict(self.counters),
+                    "gauges": dict(self.gauges),
+                    }
+
+    def to_prometheus(self) -> str:
+        lines: list[str] = []
+        data = self.to_dict()
+        for name, timer in data["timers"].items():
+            metric = f"{self.prefix}_{name}_seconds"
+            lines += [f"# TYPE {metric} summary", f"{metric}_count {timer['count']}", f"{metric}_sum {timer['sum']}", f"# TYPE {metric}_max gauge", f"{metric}_max {timer['max']}"]
+        for name, value in data["counters"].items():
+            lines += [f"# TYPE {self.prefix}_{name}_total counter", f"{self.prefix}_{name}_total {value}"]
+        for name, value in data["gauges"].items():
+            lines += [f"# TYPE {self.prefix}_{name} gauge", f"{self.prefix}_{name} {value}"]
+        return "\n".join(lines)+"\n"
+
+    def write(self, path: str) -> None:
+        """
+        A .prom file is rewritten with the current values (for a node exporter textfile collector); anything else gets a JSON line appended.
+        """
+        if path.endswith(".prom"):
+            with open(path, "w") as file:
+                file.write(self.to_prometheus())
+        else:
+            with open(path, "a") as file:
+                file.write(dumps(self.to_dict())+"\n")
+
+
+global metrics
+metrics = Metrics()
+
+
+
+KERNEL_MIN_WALLETS: int = 64
+ROUTE_TOLERANCE: float = 0.01 # Sells and buys this close in value are paired as equal, and what routing leaves of a hub trade under this share of it is dropped
+IMPACT_BUCKETS: tuple[float, ...] = (0.25, 0.5, 1, 2, 4)
+IMPACT_REFERENCE: float = 1e-3
+
+def rebalance_kernel(balances, rates, last_rates, downs):
+    """
+    Vectorized form of TraderOne.get_rebalance_candidates over NumPy arrays; last_rates is NaN where there is no previous rate.
+    Returns (downs, stages, trade_balances) in input order, where a stage of 0 sells, 1 buys and -1 holds.
+    The total is a cumulative sum so it is added up in the same order, and rounds the same, as the pure-Python loop.
+    """
+    relative_balances = rates*balances
+    total_relative_balance = np.cumsum(relative_balances)[-1] if len(relative_balances) else 0.0
+    avg_balance = total_relative_balance / (len(relative_balances)+1)
+    downs = np.where(last_rates < rates, downs+1, 0)
+    diff_balances = relative_balances - avg_balance
+    trade_balances = diff_balances*rates
+    stages = np.where(diff_balances > 0, 0, np.where(diff_balances < 0, 1, -1))
+    stages = np.where((balances > 0) & (balances > np.abs(trade_balances)), stages, -1)
+    return downs, stages, trade_balances
+
+def trade_filter_kernel(stages, trade_balances, fees, balances, min_proportional_diff: float, impacts=None):
+    """
+    Vectorized form of TraderOne.get_trade, with NaN for unknown impacts; returns the mask of candidates worth trading.
+    """
+    worth = (np.abs(trade_balances)+fees) / balances >= min_proportional_diff
+    if impacts is not None:
+        worth &= np.isnan(impacts) | (np.abs(trade_balances)*(1-impacts) / balances >= min_proportional_diff)
+    return worth & np.where(stages == 0, trade_balances > 0, trade_balances < 0)
+
+
+
+_shared_clients: dict[tuple, object] = {}
+_shared_clients_lock: Lock = Lock()
+
+def get_shared_client(kind: str, key: tuple, factory):
+    """
+    One client per kind and key (e.g. per provider URL) for the whole process, so every trader on a provider shares its connection pool.
+    """
+    with _shared_clients_lock:
+        if (kind, *key) not in _shared_clients:
+            _shared_clients[(kind, *key)] = factory()
+        return _shared_clients[(kind, *key)]
+
+
+
+class StateStore():
+    """
+    Keeps trader state and a journal of every trade result in a SQLite database in WAL mode, so a restarted trader picks up where it left off.
+    Writes are staged in memory and only reach the database, in a single transaction, when commit() is called (once per cycle); a crash loses at most the cycle in progress.
+    Several traders may share one store, each under its own name.
+    """
+    def __init__(self, path: str):
+        self.path: str = path
+        self.connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS state (trader TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (trader, key))")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS journal (id INTEGER PRIMARY KEY AUTOINCREMENT, trader TEXT NOT NULL, time REAL NOT NULL, amount REAL NOT NULL, from_ticker TEXT NOT NULL, to_ticker TEXT NOT NULL, result TEXT)")
+        self.pending_state: dict[tuple[str, str], str] = {}
+        self.pending_journal: list[tuple[str, float, float, str, str, str]] = []
+        self.lock: Lock = Lock()
+
+    def get_path(self) -> str:
+        return self.path
+
+    def get(self, trader: str, key: str, default=None):
+        with self.lock:
+            value = self.pending_state.get((trader, key))
+            if value is None:
+                row = self.connection.execute("SELECT value FROM state WHERE trader = ? AND key = ?", (trader, key)).fetchone()
+                value = None if row is None else row[0]
+        return default if value is None else loads(value)
+
+    def set(self, trader: str, key: str, value) -> None:
+        with self.lock:
+            self.pending_state[(trader, key)] = dumps(value)
+
+    def journal(self, trader: str, amount: float, from_ticker: str, to_ticker: str, result: dict | None) -> None:
+        with self.lock:
+            self.pending_journal.append((trader, time(), amount, from_ticker, to_ticker, dumps(result, default=str)))
+
+    def get_journal(self, trader: str, limit: int = 100) -> list[dict]:
+        """
+        The trader's latest journal entries, newest first.
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT time, amount, from_ticker, to_ticker, result FROM journal WHERE trader = ? ORDER BY id DESC LIMIT ?", (trader, limit)).fetchall()
+        return [{"time": row[0], "amount": row[1], "from_ticker": row[2], "to_ticker": row[3], "result": loads(row[4])} for row in rows]
+
+    def commit(self) -> None:
+        with self.lock:
+            if not self.pending_state and not self.pending_journal:
+                return
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany("INSERT OR REPLACE INTO state (trader, key, value) VALUES (?, ?, ?)", [(*key, value) for key, value in self.pending_state.items()])
+                self.connection.executemany("INSERT INTO journal (trader, time, amount, from_ticker, to_ticker, result) VALUES (?, ?, ?, ?, ?, ?)", self.pending_journal)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.pending_state.clear()
+            self.pending_journal.clear()
+
+    def close(self) -> None:
+        self.commit()
+        self.connection.close()
+
+
+def get_state_store(path: str) -> StateStore:
+    return get_shared_client("state_store", (os_path.abspath(path),), lambda: StateStore(path))
+
+
 
 def get_div_str(end: bool = False, thin: bool = False) -> str:
     begincap = "++"
@@ -48,6 +371,49 @@ class ConfigKeys():
     EXCHANGE = "exchange"
     TEST = "test"
     CYCLES = "cycles"
+    CACHE_TTL = "cache_ttl"
+    BACKTEST = "backtest"
+    FEE_RATE = "fee_rate"
+    MIN_CYCLE_DELAY = "min_cycle_delay"
+    MIN_PROPORTIONAL_DIFF = "min_proportional_diff"
+    MAX_DOWNS = "max_downs"
+    MAIN_WALLET_INDEX = "main_wallet_index"
+    SWEEP = "sweep"
+    SWEEP_OUTPUT = "sweep_output"
+    WORKERS = "workers"
+    SEED = "seed"
+    TICKS = "ticks"
+    STRATEGIES = "strategies"
+    NAME = "name"
+    TICKERS = "tickers"
+    METRICS = "metrics"
+    ROUTING = "routing"
+    IMPACT_TTL = "impact_ttl"
+    SHARDS = "shards"
+    HUB_INTERVAL = "hub_interval"
+    PROVIDER = "provider"
+    INCREMENTAL = "incremental"
+    STATE = "state"
+    BALANCE_MAX_AGE = "balance_max_age"
+    STREAM = "stream"
+    MAX_STALENESS = "max_staleness"
+    MOVE_THRESHOLD = "move_threshold"
+    LOG_MODE = "log_mode"
+    LOG_FORMAT = "log_format"
+    LOG_QUEUE = "log_queue"
+
+
+@final
+class LogMode():
+    OFF = "off"
+    SUMMARY = "summary"
+    CYCLE = "cycle"
+
+
+@final
+class LogFormat():
+    TEXT = "text"
+    JSON = "json"
 
 
 @final
@@ -56,12 +422,22 @@ class Transaction():
 
 
 class Wallet():
+    """
+    Subclasses should declare __slots__ too, so no wallet carries an instance dict.
+    """
+    __slots__ = ("ticker", "addr", "auth", "cached_balance", "is_refreshing_cached_balance", "refresh_started", "refresh_submitted", "refresh_future", "balance_time")
+    refresh_inline: bool = False # Set on wallets whose balance is local, so refreshing never needs the balance executor
+
     def __init__(self, ticker: str, addr: str, auth: str | None):
         self.ticker: str = ticker
         self.addr: str = addr
         self.auth: str | None = auth
         self.cached_balance: float = 0
         self.is_refreshing_cached_balance: bool = False
+        self.refresh_started: float | None = None
+        self.refresh_submitted: float | None = None
+        self.refresh_future: Future | None = None
+        self.balance_time: float | None = None
 
     @staticmethod
     def is_addr_valid(addr: str) -> bool:
@@ -83,22 +459,111 @@ class Wallet():
         return 0
 
     def get_is_refreshing_cached_balance(self) -> bool:
-        return self.is_refreshing_cached_balance
+        return self.is_refreshing_cached_balance or (self.refresh_future is not None and not self.refresh_future.done())
+
+    def get_refresh_started(self) -> float | None:
+        return self.refresh_started
+
+    def get_refresh_submitted(self) -> float | None:
+        """
+        When the pending refresh was queued on the balance executor (as monotonic()), whether or not a worker has picked it up yet.
+        """
+        return self.refresh_submitted
+
+    def get_balance_time(self) -> float | None:
+        """
+        When the cached balance was last fetched (as time()), or None if it has not been, or may have changed since.
+        """
+        return self.balance_time
+
+    def invalidate_cached_balance(self) -> None:
+        self.balance_time = None
 
-    def refresh_cached_balance(self, block: bool = True) -> None:
+    def refresh_cached_balance(self, block: bool = True) -> Future | None:
+        """
+        When not blocking, the refresh is queued on the shared balance executor and its future is returned.
+        A refresh that is still pending is reused rather than queued again.
+        """
         if block:
             self.is_refreshing_cached_balance = True
-            balance = self.get_live_balance()
-            if balance is not None:
-                self.cached_balance = balance
-            self.is_refreshing_cached_balance = False
+            self.refresh_started = monotonic()
+            try:
+                if metrics.enabled:
+                    started = perf_counter()
+                    balance = self.get_live_balance()
+                    metrics.observe("get_live_balance", perf_counter()-started)
+                else:
+                    balance = self.get_live_balance()
+                if balance is not None:
+                    self.cached_balance = balance
+                    self.balance_time = time()
+            finally:
+                self.refresh_started = None
+                self.is_refreshing_cached_balance = False
+            return None
+        elif self.refresh_inline:
+            return self.refresh_cached_balance(block=True)
         else:
-            Thread(target=self.refresh_cached_balance, kwargs={"block": True}).start()
+            if self.refresh_future is None or self.refresh_future.done():
+                self.refresh_submitted = monotonic()
+                self.refresh_future = get_balance_executor().submit(self.refresh_cached_balance, block=True)
+            return self.refresh_future
 
     def send_to(self, rec_addr: str, amount: float | None, meta: dict | None) -> dict | None:
         return {Transaction.TAG_COMPLETED: True}
 
 
+class AsyncWallet(Wallet):
+    """
+    A wallet whose live balance is fetched with a coroutine; driven by an AsyncTrader.
+    """
+    __slots__ = ()
+    #@override
+    async def get_live_balance(self) -> float | None:
+        return 0
+
+    #@override
+    async def refresh_cached_balance(self) -> None:
+        self.is_refreshing_cached_balance = True
+        self.refresh_started = monotonic()
+        try:
+            if metrics.enabled:
+                started = perf_counter()
+                balance = await self.get_live_balance()
+                metrics.observe("get_live_balance", perf_counter()-started)
+            else:
+                balance = await self.get_live_balance()
+            if balance is not None:
+                self.cached_balance = balance
+                self.balance_time = time()
+        finally:
+            self.refresh_started = None
+            self.is_refreshing_cached_balance = False
+
+
+class RateSnapshot():
+    def __init__(self, quote: str, rates: dict[str, float]):
+        self.quote: str = quote
+        self.rates: dict[str, float] = dict(rates)
+        self.rates[quote] = 1
+
+    def get_quote(self) -> str:
+        return self.quote
+
+    def get_rates(self) -> dict[str, float]:
+        return self.rates
+
+    def get_rate(self, from_ticker: str, to_ticker: str) -> float | None:
+        """
+        Same convention as Exchange.get_exchange_rate, derived through the quote ticker. Returns None if either leg is missing.
+        """
+        from_rate = self.rates.get(from_ticker)
+        to_rate = self.rates.get(to_ticker)
+        if from_rate is None or not to_rate:
+            return None
+        return from_rate/to_rate
+
+
 class Exchange():
     def __init__(self, title: str):
         self.title: str = title
@@ -106,42 +571,874 @@ class Exchange():
     def get_title(self) -> str:
         return self.title
 
-    def get_supported_tickers(self) -> list[str]:
-        return []
+    def get_supported_tickers(self) -> list[str]:
+        return []
+
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        """
+        Should return to/from, not the reciprocal.
+        """
+        return 0
+
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        """
+        Should fetch the rate of every ticker against quote in as few round-trips as possible.
+        This default falls back to one get_exchange_rate call per ticker.
+        """
+        return RateSnapshot(quote, {ticker: self.get_exchange_rate(ticker, quote) for ticker in tickers if ticker != quote})
+
+    def get_rate(self, from_ticker: str, to_ticker: str, snapshot: RateSnapshot | None = None) -> float:
+        if snapshot is not None:
+            rate = snapshot.get_rate(from_ticker, to_ticker)
+            if rate is not None:
+                return rate
+        return self.get_exchange_rate(from_ticker, to_ticker)
+
+    def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return 0
+
+    def get_fees(self, trades: list[tuple[float, Wallet, Wallet]], snapshot: RateSnapshot | None = None) -> list[float]:
+        """
+        Fees of several (amount, from_wallet, to_wallet) trades; override when they can be quoted together.
+        """
+        return [self.get_fee(amount, from_wallet, to_wallet, snapshot) for amount, from_wallet, to_wallet in trades]
+
+    def get_price_impact(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        """
+        Proportion of amount that trading it loses to price impact, or None if unknown; must not do I/O (see PriceImpactCache).
+        """
+        return None
+
+    def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> "PriceFeed":
+        """
+        Should return a started feed that keeps the price of every ticker against reference up to date as it changes.
+        This default polls get_rate_snapshot every interval seconds on a background thread.
+        """
+        feed = PollingPriceFeed(self, tickers, reference, interval)
+        feed.start()
+        return feed
+
+    def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        pass
+
+    def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        """
+        Makes several (amount, from_wallet, to_wallet) trades that do not depend on each other, returning each one's result in order.
+        Override when they can be submitted together; this default makes them one after another.
+        """
+        return [self.trade(amount, from_wallet, to_wallet) for amount, from_wallet, to_wallet in trades]
+
+
+class AsyncExchange():
+    """
+    Coroutine counterpart of Exchange, for exchanges backed by an async SDK.
+    """
+    def __init__(self, title: str):
+        self.title: str = title
+
+    def get_title(self) -> str:
+        return self.title
+
+    def get_supported_tickers(self) -> list[str]:
+        return []
+
+    async def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        """
+        Should return to/from, not the reciprocal.
+        """
+        return 0
+
+    async def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        pending = [ticker for ticker in dict.fromkeys(tickers) if ticker != quote]
+        rates = await asyncio.gather(*(self.get_exchange_rate(ticker, quote) for ticker in pending))
+        return RateSnapshot(quote, dict(zip(pending, rates)))
+
+    async def get_rate(self, from_ticker: str, to_ticker: str, snapshot: RateSnapshot | None = None) -> float:
+        if snapshot is not None:
+            rate = snapshot.get_rate(from_ticker, to_ticker)
+            if rate is not None:
+                return rate
+        return await self.get_exchange_rate(from_ticker, to_ticker)
+
+    async def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return 0
+
+    async def get_fees(self, trades: list[tuple[float, Wallet, Wallet]], snapshot: RateSnapshot | None = None) -> list[float]:
+        return list(await asyncio.gather(*(self.get_fee(amount, from_wallet, to_wallet, snapshot) for amount, from_wallet, to_wallet in trades)))
+
+    def get_price_impact(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        """
+        Like Exchange.get_price_impact, and just as free of I/O.
+        """
+        return None
+
+    def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> "PriceFeed":
+        """
+        Like Exchange.subscribe_prices; the default feed polls as a task on the running event loop.
+        """
+        feed = AsyncPollingPriceFeed(self, tickers, reference, interval)
+        feed.start()
+        return feed
+
+    async def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        pass
+
+    async def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        return list(await asyncio.gather(*(self.trade(amount, from_wallet, to_wallet) for amount, from_wallet, to_wallet in trades)))
+
+
+class ExchangeWrapper(Exchange):
+    """
+    Base of exchanges that wrap another: every call forwards to the wrapped exchange unless a subclass overrides it.
+    get_rate is left to Exchange, so it goes through whatever get_exchange_rate the subclass gives.
+    """
+    def __init__(self, exchange: Exchange):
+        super().__init__(exchange.get_title())
+        self.exchange: Exchange = exchange
+
+    def get_exchange(self) -> Exchange:
+        return self.exchange
+
+    #@override
+    def get_supported_tickers(self) -> list[str]:
+        return self.exchange.get_supported_tickers()
+
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        return self.exchange.get_exchange_rate(from_ticker, to_ticker)
+
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        return self.exchange.get_rate_snapshot(tickers, quote)
+
+    #@override
+    def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return self.exchange.get_fee(amount, from_wallet, to_wallet, snapshot)
+
+    #@override
+    def get_fees(self, trades: list[tuple[float, Wallet, Wallet]], snapshot: RateSnapshot | None = None) -> list[float]:
+        return self.exchange.get_fees(trades, snapshot)
+
+    #@override
+    def get_price_impact(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        return self.exchange.get_price_impact(amount, from_ticker, to_ticker)
+
+    #@override
+    def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> "PriceFeed":
+        return self.exchange.subscribe_prices(tickers, reference, interval)
+
+    #@override
+    def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        return self.exchange.trade(amount, from_wallet, to_wallet)
+
+    #@override
+    def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        return self.exchange.trade_many(trades)
+
+
+class AsyncExchangeWrapper(AsyncExchange):
+    """
+    ExchangeWrapper for an AsyncExchange.
+    """
+    def __init__(self, exchange: AsyncExchange):
+        super().__init__(exchange.get_title())
+        self.exchange: AsyncExchange = exchange
+
+    def get_exchange(self) -> AsyncExchange:
+        return self.exchange
+
+    #@override
+    def get_supported_tickers(self) -> list[str]:
+        return self.exchange.get_supported_tickers()
+
+    #@override
+    async def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        return await self.exchange.get_exchange_rate(from_ticker, to_ticker)
+
+    #@override
+    async def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        return await self.exchange.get_rate_snapshot(tickers, quote)
+
+    #@override
+    async def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return await self.exchange.get_fee(amount, from_wallet, to_wallet, snapshot)
+
+    #@override
+    async def get_fees(self, trades: list[tuple[float, Wallet, Wallet]], snapshot: RateSnapshot | None = None) -> list[float]:
+        return await self.exchange.get_fees(trades, snapshot)
+
+    #@override
+    def get_price_impact(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        return self.exchange.get_price_impact(amount, from_ticker, to_ticker)
+
+    #@override
+    def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> "PriceFeed":
+        return self.exchange.subscribe_prices(tickers, reference, interval)
+
+    #@override
+    async def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        return await self.exchange.trade(amount, from_wallet, to_wallet)
+
+    #@override
+    async def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        return await self.exchange.trade_many(trades)
+
+
+class PriceFeed():
+    """
+    In-memory table of the latest price of each ticker against reference, with the monotonic time it arrived.
+    A source keeps it current by calling update() (or refresh(), which pulls one snapshot from exchange) whenever prices move; reads never do I/O.
+    """
+    def __init__(self, exchange: "Exchange | AsyncExchange | None", tickers: list[str], reference: str):
+        self.exchange: Exchange | AsyncExchange | None = exchange
+        self.tickers: list[str] = [ticker for ticker in dict.fromkeys(tickers) if ticker != reference]
+        self.reference: str = reference
+        self.prices: dict[str, tuple[float, float]] = {}
+        self.listeners: list = []
+        self.updates: int = 0
+
+    def get_tickers(self) -> list[str]:
+        return self.tickers
+
+    def get_reference(self) -> str:
+        return self.reference
+
+    def get_updates(self) -> int:
+        return self.updates
+
+    def add_listener(self, listener) -> None:
+        """
+        listener(prices) is called with the prices of every update, on the thread (or loop) that pushed it.
+        """
+        self.listeners.append(listener)
+
+    def update(self, prices: dict[str, float]) -> None:
+        now = monotonic()
+        self.prices.update({ticker: (price, now) for ticker, price in prices.items() if ticker != self.reference})
+        self.updates += 1
+        for listener in self.listeners:
+            listener(prices)
+
+    def refresh(self) -> None:
+        self.update(self.exchange.get_rate_snapshot(self.tickers, self.reference).get_rates())
+
+    def get_price(self, ticker: str, max_age: float | None = None) -> float | None:
+        """
+        None if the ticker has no price yet, or only one older than max_age seconds.
+        """
+        if ticker == self.reference:
+            return 1
+        entry = self.prices.get(ticker)
+        if entry is None or (max_age is not None and monotonic()-entry[1] > max_age):
+            return None
+        return entry[0]
+
+    def get_prices(self, tickers: list[str], max_age: float | None = None) -> dict[str, float] | None:
+        """
+        All or nothing: None as soon as one ticker is missing or stale.
+        """
+        prices: dict[str, float] = {}
+        for ticker in tickers:
+            price = self.get_price(ticker, max_age)
+            if price is None:
+                return None
+            prices[ticker] = price
+        return prices
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PollingPriceFeed(PriceFeed):
+    """
+    Refreshes every interval seconds on a daemon thread, for exchanges with nothing to subscribe to.
+    """
+    def __init__(self, exchange: "Exchange", tickers: list[str], reference: str, interval: float = 1):
+        super().__init__(exchange, tickers, reference)
+        self.interval: float = interval
+        self.stopped: Event = Event()
+        self.thread: Thread | None = None
+
+    def get_interval(self) -> float:
+        return self.interval
+
+    def poll(self) -> None:
+        self.refresh()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Price feed of {self.exchange.get_title()} failed to update: {e!r}")
+            self.stopped.wait(self.interval)
+
+    #@override
+    def start(self) -> None:
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self.run, name="traderone-feed", daemon=True)
+            self.thread.start()
+
+    #@override
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+class AsyncPollingPriceFeed(PriceFeed):
+    """
+    PollingPriceFeed for an AsyncExchange, as a task on the event loop it is started from.
+    """
+    def __init__(self, exchange: "AsyncExchange", tickers: list[str], reference: str, interval: float = 1):
+        super().__init__(exchange, tickers, reference)
+        self.interval: float = interval
+        self.task: asyncio.Task | None = None
+
+    def get_interval(self) -> float:
+        return self.interval
+
+    async def pull(self) -> None:
+        """
+        refresh() for an AsyncExchange: pulls one snapshot without blocking the loop.
+        """
+        self.update((await self.exchange.get_rate_snapshot(self.tickers, self.reference)).get_rates())
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.pull()
+            except Exception as e:
+                logger.warning(f"Price feed of {self.exchange.get_title()} failed to update: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    #@override
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    #@override
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+
+class PriceMoveTrigger():
+    """
+    Feed listener that calls callback once any ticker has moved by at least threshold (proportionally) since the previous call.
+    """
+    def __init__(self, threshold: float, callback):
+        self.threshold: float = threshold
+        self.callback = callback
+        self.anchors: dict[str, float] = {}
+
+    def __call__(self, prices: dict[str, float]) -> None:
+        moved = False
+        for ticker, price in prices.items():
+            anchor = self.anchors.get(ticker)
+            if anchor is None:
+                self.anchors[ticker] = price
+            elif anchor and abs(price-anchor) >= abs(anchor)*self.threshold:
+                moved = True
+        if moved:
+            self.anchors.update(prices)
+            self.callback()
+
+
+class PriceCache():
+    """
+    Size-bounded LRU of per-ticker prices that expire after ttl seconds.
+    """
+    def __init__(self, ttl: float = 5, max_size: int = 1024):
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.entries: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: Lock = Lock()
+
+    def get_ttl(self) -> float:
+        return self.ttl
+
+    def get_max_size(self) -> int:
+        return self.max_size
+
+    def get_hits(self) -> int:
+        return self.hits
+
+    def get_misses(self) -> int:
+        return self.misses
+
+    def get(self, ticker: str) -> float | None:
+        with self.lock:
+            entry = self.entries.get(ticker)
+            if entry is not None:
+                if entry[1] > monotonic():
+                    self.entries.move_to_end(ticker)
+                    self.hits += 1
+                    return entry[0]
+                del self.entries[ticker]
+            self.misses += 1
+            return None
+
+    def put(self, ticker: str, price: float) -> None:
+        with self.lock:
+            self.entries[ticker] = (price, monotonic()+self.ttl)
+            self.entries.move_to_end(ticker)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tickers: Iterable[str] | None = None) -> None:
+        with self.lock:
+            if tickers is None:
+                self.entries.clear()
+            else:
+                for ticker in tickers:
+                    self.entries.pop(ticker, None)
+
+    def lookup(self, tickers: list[str], reference: str) -> tuple[dict[str, float], list[str]]:
+        """
+        Returns the cached prices against reference, and the tickers that have to be fetched.
+        """
+        prices: dict[str, float] = {reference: 1}
+        missing: list[str] = []
+        for ticker in dict.fromkeys(tickers):
+            if ticker != reference:
+                price = self.get(ticker)
+                if price is None:
+                    missing.append(ticker)
+                else:
+                    prices[ticker] = price
+        return prices, missing
+
+    def store(self, prices: dict[str, float], missing: list[str], rates: dict[str, float]) -> dict[str, float]:
+        """
+        Caches the fetched rates of missing tickers into prices. Tickers the exchange could not price are left out.
+        """
+        for ticker in missing:
+            if ticker in rates:
+                self.put(ticker, rates[ticker])
+                prices[ticker] = rates[ticker]
+        return prices
+
+
+class PriceImpactCurve():
+    """
+    Proportional cost of trading amounts of one ticker for another, against the price of a trade too small to move it, sampled at a few amounts (0 costs nothing) and interpolated linearly between them.
+    """
+    __slots__ = ("amounts", "costs", "sampled_at")
+
+    def __init__(self, amounts: list[float], costs: list[float], sampled_at: float):
+        self.amounts: list[float] = amounts
+        self.costs: list[float] = costs
+        self.sampled_at: float = sampled_at
+
+    def covers(self, amount: float) -> bool:
+        return 0 <= amount <= self.amounts[-1]
+
+    def get_cost(self, amount: float) -> float:
+        i = bisect_left(self.amounts, amount)
+        if i == 0:
+            return self.costs[0]
+        if i == len(self.amounts):
+            return self.costs[-1]
+        low, high = self.amounts[i-1], self.amounts[i]
+        return self.costs[i-1] + (self.costs[i]-self.costs[i-1])*(amount-low)/(high-low)
+
+
+class PriceImpactCache():
+    """
+    Price-impact curves per pair, sampled around the amounts an exchange is asked to quote fees for and trusted for ttl seconds.
+    An exchange takes the quotes a batch of (amount, from_ticker, to_ticker) requests needs from get_samples(), fetches them however it batches best and hands what they paid out to set_samples(); get_cost() then reads the curves without any I/O.
+    """
+    def __init__(self, ttl: float = 300, buckets: tuple[float, ...] = IMPACT_BUCKETS):
+        self.ttl: float = ttl
+        self.buckets: tuple[float, ...] = buckets
+        self.curves: dict[tuple[str, str], PriceImpactCurve] = {}
+
+    def get_curve(self, amount: float, from_ticker: str, to_ticker: str) -> PriceImpactCurve | None:
+        """
+        The pair's curve, if it is fresh and reaches amount.
+        """
+        curve = self.curves.get((from_ticker, to_ticker))
+        if curve is None or monotonic()-curve.sampled_at > self.ttl or not curve.covers(amount):
+            return None
+        return curve
+
+    def get_cost(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        curve = self.get_curve(abs(amount), from_ticker, to_ticker)
+        return None if curve is None else curve.get_cost(abs(amount))
+
+    def get_samples(self, requests: list[tuple[float, str, str]], min_amounts: dict[str, float] | None = None) -> list[tuple[float, str, str]]:
+        """
+        The (amount, from_ticker, to_ticker) quotes needed for every request to have a curve: for each pair without one, a reference amount IMPACT_REFERENCE times the smallest, then every bucket multiple of each amount asked about.
+        min_amounts maps tickers to the smallest amount the exchange can quote (one raw unit); the reference is never smaller, as a quote of 0 would fail and leave the pair to be sampled again every cycle.
+        """
+        amounts: dict[tuple[str, str], set[float]] = {}
+        for amount, from_ticker, to_ticker in requests:
+            amount = abs(amount)
+            if amount > 0 and from_ticker != to_ticker and self.get_curve(amount, from_ticker, to_ticker) is None:
+                amounts.setdefault((from_ticker, to_ticker), set()).update(amount*bucket for bucket in self.buckets)
+        samples: list[tuple[float, str, str]] = []
+        for (from_ticker, to_ticker), pair_amounts in amounts.items():
+            ordered = sorted(pair_amounts)
+            samples.append((max(ordered[0]*IMPACT_REFERENCE, (min_amounts or {}).get(from_ticker, 0)), from_ticker, to_ticker))
+            samples.extend((amount, from_ticker, to_ticker) for amount in ordered)
+        return samples
+
+    def set_samples(self, samples: list[tuple[float, str, str]], outs: list[float | None]) -> None:
+        """
+        Builds curves from get_samples() and what each sample paid out, in any unit as long as it is the same per pair (None where a quote failed; a pair whose reference failed gets no curve).
+        """
+        quotes: dict[tuple[str, str], list[tuple[float, float | None]]] = {}
+        for (amount, from_ticker, to_ticker), out in zip(samples, outs):
+            quotes.setdefault((from_ticker, to_ticker), []).append((amount, out))
+        now = monotonic()
+        for pair, ((reference, reference_out), *rest) in quotes.items():
+            if not reference_out:
+                continue
+            price = reference_out/reference
+            points = [(amount, max(0.0, 1-out/amount/price)) for amount, out in rest if out is not None]
+            if points:
+                self.curves[pair] = PriceImpactCurve([0.0, *(amount for amount, _ in points)], [0.0, *(cost for _, cost in points)], now)
+
+
+class CachingExchangeBase():
+    """
+    What CachingExchange and AsyncCachingExchange share: the cache, its reference ticker, and every step of a cached read or trade that needs no I/O.
+    Mixed in ahead of an exchange wrapper, which it passes exchange on to.
+    """
+    def __init__(self, exchange: "Exchange | AsyncExchange", ttl: float = 5, max_size: int = 1024, reference: str | None = None, invalidate_on_trade: bool = True):
+        super().__init__(exchange)
+        self.cache: PriceCache = PriceCache(ttl, max_size)
+        self.reference: str | None = reference
+        self.invalidate_on_trade: bool = invalidate_on_trade
+
+    def get_cache(self) -> PriceCache:
+        return self.cache
+
+    def get_reference(self, default: str) -> str:
+        if self.reference is None:
+            self.reference = default
+        return self.reference
+
+    def invalidate(self, tickers: Iterable[str] | None = None) -> None:
+        self.cache.invalidate(tickers)
+
+    @staticmethod
+    def get_cached_rate(prices: dict[str, float], from_ticker: str, to_ticker: str) -> float | None:
+        """
+        from_ticker's rate against to_ticker from cached prices, or None if the exchange has to be asked.
+        """
+        if prices.get(from_ticker) is None or not prices.get(to_ticker):
+            return None
+        return prices[from_ticker]/prices[to_ticker]
+
+    @staticmethod
+    def get_cached_snapshot(prices: dict[str, float], quote: str) -> RateSnapshot | None:
+        if not prices.get(quote):
+            return None
+        return RateSnapshot(quote, {ticker: price/prices[quote] for ticker, price in prices.items() if ticker != quote})
+
+    def traded(self, trades: list[tuple[float, Wallet, Wallet]]) -> None:
+        """
+        Forgets the prices of every ticker trades touched, unless told not to.
+        """
+        if self.invalidate_on_trade:
+            self.invalidate({wallet.get_ticker() for _, from_wallet, to_wallet in trades for wallet in (from_wallet, to_wallet)})
+
+
+class CachingExchange(CachingExchangeBase, ExchangeWrapper):
+    """
+    Wraps an exchange and caches the price of each ticker against a reference ticker (the first quote asked for, unless given), deriving pair rates from those.
+    """
+    def get_prices(self, tickers: list[str], reference: str) -> dict[str, float]:
+        """
+        Prices against reference, fetching every expired one in a single snapshot.
+        """
+        prices, missing = self.cache.lookup(tickers, reference)
+        if missing:
+            prices = self.cache.store(prices, missing, self.exchange.get_rate_snapshot(missing, reference).get_rates())
+        return prices
+
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        rate = self.get_cached_rate(self.get_prices([from_ticker, to_ticker], self.get_reference(to_ticker)), from_ticker, to_ticker)
+        return self.exchange.get_exchange_rate(from_ticker, to_ticker) if rate is None else rate
+
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        snapshot = self.get_cached_snapshot(self.get_prices([*tickers, quote], self.get_reference(quote)), quote)
+        return self.exchange.get_rate_snapshot(tickers, quote) if snapshot is None else snapshot
+
+    #@override
+    def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        out = self.exchange.trade(amount, from_wallet, to_wallet)
+        self.traded([(amount, from_wallet, to_wallet)])
+        return out
+
+    #@override
+    def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        out = self.exchange.trade_many(trades)
+        self.traded(trades)
+        return out
+
+
+class InstrumentedExchange(ExchangeWrapper):
+    """
+    Wraps an exchange and times every call into it with metrics.
+    """
+    def __init__(self, exchange: Exchange):
+        super().__init__(exchange)
+
+    def _timed_(self, name: str, fn, *args):
+        started = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            metrics.observe(name, perf_counter()-started)
+
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        return self._timed_("get_exchange_rate", self.exchange.get_exchange_rate, from_ticker, to_ticker)
+
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        return self._timed_("get_rate_snapshot", self.exchange.get_rate_snapshot, tickers, quote)
+
+    #@override
+    def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return self._timed_("get_fee", self.exchange.get_fee, amount, from_wallet, to_wallet, snapshot)
+
+    #@override
+    def get_fees(self, trades: list[tuple[float, Wallet, Wallet]], snapshot: RateSnapshot | None = None) -> list[float]:
+        return self._timed_("get_fees", self.exchange.get_fees, trades, snapshot)
+
+    #@override
+    def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        return self._timed_("trade", self.exchange.trade, amount, from_wallet, to_wallet)
+
+    #@override
+    def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        return self._timed_("trade_many", self.exchange.trade_many, trades)
+
+
+class AsyncInstrumentedExchange(AsyncExchangeWrapper):
+    """
+    InstrumentedExchange for an AsyncExchange.
+    """
+    def __init__(self, exchange: AsyncExchange):
+        super().__init__(exchange)
+
+    async def _timed_(self, name: str, fn, *args):
+        started = perf_counter()
+        try:
+            return await fn(*args)
+        finally:
+            metrics.observe(name, perf_counter()-started)
+
+    #@override
+    async def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        return await self._timed_("get_exchange_rate", self.exchange.get_exchange_rate, from_ticker, to_ticker)
+
+    #@override
+    async def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        return await self._timed_("get_rate_snapshot", self.exchange.get_rate_snapshot, tickers, quote)
+
+    #@override
+    async def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return await self._timed_("get_fee", self.exchange.get_fee, amount, from_wallet, to_wallet, snapshot)
+
+    #@override
+    async def get_fees(self, trades: list[tuple[float, Wallet, Wallet]], snapshot: RateSnapshot | None = None) -> list[float]:
+        return await self._timed_("get_fees", self.exchange.get_fees, trades, snapshot)
+
+    #@override
+    async def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        return await self._timed_("trade", self.exchange.trade, amount, from_wallet, to_wallet)
+
+    #@override
+    async def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        return await self._timed_("trade_many", self.exchange.trade_many, trades)
+
+
+class AsyncCachingExchange(CachingExchangeBase, AsyncExchangeWrapper):
+    """
+    CachingExchange for an AsyncExchange.
+    """
+    async def get_prices(self, tickers: list[str], reference: str) -> dict[str, float]:
+        prices, missing = self.cache.lookup(tickers, reference)
+        if missing:
+            prices = self.cache.store(prices, missing, (await self.exchange.get_rate_snapshot(missing, reference)).get_rates())
+        return prices
+
+    #@override
+    async def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        rate = self.get_cached_rate(await self.get_prices([from_ticker, to_ticker], self.get_reference(to_ticker)), from_ticker, to_ticker)
+        return await self.exchange.get_exchange_rate(from_ticker, to_ticker) if rate is None else rate
+
+    #@override
+    async def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        snapshot = self.get_cached_snapshot(await self.get_prices([*tickers, quote], self.get_reference(quote)), quote)
+        return await self.exchange.get_rate_snapshot(tickers, quote) if snapshot is None else snapshot
+
+    #@override
+    async def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        out = await self.exchange.trade(amount, from_wallet, to_wallet)
+        self.traded([(amount, from_wallet, to_wallet)])
+        return out
+
+    #@override
+    async def trade_many(self, trades: list[tuple[float, Wallet, Wallet]]) -> list[dict | None]:
+        out = await self.exchange.trade_many(trades)
+        self.traded(trades)
+        return out
+
+
+class StreamingExchangeBase():
+    """
+    What StreamingExchange and AsyncStreamingExchange share: the feed, its move trigger, and reading rates from it, none of which does I/O.
+    Mixed in ahead of an exchange wrapper, which it passes exchange on to.
+    """
+    def __init__(self, exchange: "Exchange | AsyncExchange", interval: float = 1, max_staleness: float = 10, move_threshold: float | None = None):
+        super().__init__(exchange)
+        self.interval: float = interval
+        self.max_staleness: float = max_staleness
+        self.move_threshold: float | None = move_threshold
+        self.on_move = None
+        self.feed: PriceFeed | None = None
+        self.fallbacks: int = 0
+
+    def get_feed(self) -> PriceFeed | None:
+        return self.feed
+
+    def get_fallbacks(self) -> int:
+        return self.fallbacks
+
+    def set_on_move(self, callback) -> None:
+        self.on_move = callback
+
+    def _moved_(self) -> None:
+        if self.on_move is not None:
+            self.on_move()
+
+    def subscribe(self, tickers: list[str], quote: str) -> PriceFeed:
+        if self.feed is None:
+            self.feed = self.exchange.subscribe_prices(tickers, quote, self.interval)
+            if self.move_threshold is not None:
+                self.feed.add_listener(PriceMoveTrigger(self.move_threshold, self._moved_))
+        return self.feed
+
+    def read(self, tickers: list[str], quote: str) -> dict[str, float] | None:
+        """
+        Rates of tickers against quote from the feed, or None if the cycle has to pull.
+        """
+        prices = self.feed.get_prices([*tickers, quote], self.max_staleness) if self.feed is not None else None
+        if not prices or not prices[quote]:
+            self.fallbacks += 1
+            if metrics.enabled:
+                metrics.increment("feed_fallbacks")
+            return None
+        return {ticker: prices[ticker]/prices[quote] for ticker in tickers if ticker != quote}
 
-    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+    def pulled(self, snapshot: RateSnapshot) -> RateSnapshot:
         """
-        Should return to/from, not the reciprocal.
+        Feeds a snapshot the cycle had to pull back into the feed, when it is quoted in the feed's reference.
         """
-        return 0
+        if self.feed is not None and snapshot.get_quote() == self.feed.get_reference():
+            self.feed.update(snapshot.get_rates())
+        return snapshot
 
-    def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> float:
-        return 0
+    def stop(self) -> None:
+        if self.feed is not None:
+            self.feed.stop()
 
-    def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
-        pass
 
+class StreamingExchange(StreamingExchangeBase, ExchangeWrapper):
+    """
+    Wraps an exchange and answers rates from its price feed (see Exchange.subscribe_prices), so the hot path does no I/O.
+    The feed is subscribed on the first snapshot, against that snapshot's quote. Whenever a price is missing or older than max_staleness seconds, the call falls back to pulling from the exchange.
+    If move_threshold is given, on_move is called whenever the feed sees a ticker move by that much (see PriceMoveTrigger).
+    """
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        rates = self.read([from_ticker], to_ticker)
+        if rates is None:
+            return self.exchange.get_exchange_rate(from_ticker, to_ticker)
+        return rates[from_ticker]
 
-class Trader():
-    def __init__(self, exchange: Exchange, wallets: list[Wallet], min_cycle_delay: float = 30*60, max_random_cycle_delay_add: float = 0):
-        self.exchange: Exchange = exchange
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        self.subscribe(tickers, quote)
+        rates = self.read(tickers, quote)
+        if rates is None:
+            return self.pulled(self.exchange.get_rate_snapshot(tickers, quote))
+        return RateSnapshot(quote, rates)
+
+
+class AsyncStreamingExchange(StreamingExchangeBase, AsyncExchangeWrapper):
+    """
+    StreamingExchange for an AsyncExchange.
+    """
+    #@override
+    async def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        rates = self.read([from_ticker], to_ticker)
+        if rates is None:
+            return await self.exchange.get_exchange_rate(from_ticker, to_ticker)
+        return rates[from_ticker]
+
+    #@override
+    async def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        self.subscribe(tickers, quote)
+        rates = self.read(tickers, quote)
+        if rates is None:
+            return self.pulled(await self.exchange.get_rate_snapshot(tickers, quote))
+        return RateSnapshot(quote, rates)
+
+
+class TraderBase():
+    """
+    What every trader has, sync or async: its exchange, wallets, schedule and saved state, and nothing that does I/O.
+    Traders derive from Trader, or from AsyncTrader to run their cycles as coroutines on an AsyncExchange.
+    """
+    def __init__(self, exchange: "Exchange | AsyncExchange", wallets: list[Wallet], min_cycle_delay: float = 30*60, max_random_cycle_delay_add: float = 0, balance_refresh_timeout: float | None = 60, balance_max_age: float = 0):
+        self.exchange: Exchange | AsyncExchange = exchange
         self.wallets: list[Wallet] = wallets
         self.min_cycle_delay: float = min_cycle_delay
         self.max_random_cycle_delay_add: float = max_random_cycle_delay_add
+        self.balance_refresh_timeout: float | None = balance_refresh_timeout
+        self.balance_max_age: float = balance_max_age
         self.last_tick_time: float = 0
+        self.state_store: StateStore | None = None
+        self.state_name: str = "default"
+        self.last_trades: int = 0
 
-    def get_exchange(self) -> Exchange:
+    def get_exchange(self) -> "Exchange | AsyncExchange":
         return self.exchange
 
     def get_wallets(self) -> list[Wallet]:
         return self.wallets
 
-    def refresh_wallets_cached_balances(self, block: bool = True) -> None:
-        for wallet in self.get_wallets():
-            wallet.refresh_cached_balance(block=False)
-        if block:
-            while any(wallet.get_is_refreshing_cached_balance() for wallet in self.get_wallets() if wallet is not None):
-                sleep(0.1)
+    def get_last_trades(self) -> int:
+        """
+        How many trades the last cycle made.
+        """
+        return self.last_trades
+
+    def get_balance_refresh_timeout(self) -> float | None:
+        return self.balance_refresh_timeout
+
+    def get_balance_max_age(self) -> float:
+        return self.balance_max_age
+
+    def is_cached_balance_fresh(self, wallet: Wallet) -> bool:
+        """
+        Whether the wallet's cached balance is younger than the balance max age (0 never trusts it), and it has not traded since.
+        """
+        balance_time = wallet.get_balance_time()
+        return self.balance_max_age > 0 and balance_time is not None and time()-balance_time < self.balance_max_age
 
     def get_min_cycle_delay(self) -> float:
         return self.min_cycle_delay
@@ -152,52 +1449,618 @@ class Trader():
     def get_last_tick_time(self) -> float:
         return self.last_tick_time
 
+    def get_state_store(self) -> StateStore | None:
+        return self.state_store
+
+    def set_state_store(self, store: StateStore | None, name: str = "default") -> None:
+        """
+        Restores whatever state store holds for name, then saves to it after every cycle.
+        """
+        self.state_store = store
+        self.state_name = name
+        if store is not None:
+            state = store.get(name, "trader")
+            if state is not None:
+                self.set_state(state)
+                logger.info(f"Restored the state of trader {name} from {store.get_path()}")
+
+    def get_state(self) -> dict:
+        return {
+                "last_tick_time": self.last_tick_time,
+                "balances": {wallet.get_ticker(): [wallet.get_cached_balance(), wallet.get_balance_time()] for wallet in self.get_wallets() if wallet is not None},
+                }
+
+    def set_state(self, state: dict) -> None:
+        self.last_tick_time = state.get("last_tick_time", self.last_tick_time)
+        balances: dict[str, list] = state.get("balances", {})
+        for wallet in self.get_wallets():
+            if wallet is not None and wallet.get_ticker() in balances:
+                wallet.cached_balance, wallet.balance_time = balances[wallet.get_ticker()]
+
+    def record_trades(self, trades: list[tuple[float, Wallet, Wallet]], results: list[dict | None]) -> None:
+        """
+        Marks the traded wallets' balances as changed and journals each result.
+        """
+        for (amount, from_wallet, to_wallet), result in zip(trades, results):
+            from_wallet.invalidate_cached_balance()
+            to_wallet.invalidate_cached_balance()
+            if self.state_store is not None:
+                self.state_store.journal(self.state_name, amount, from_wallet.get_ticker(), to_wallet.get_ticker(), result)
+
+    def save_state(self) -> None:
+        if self.state_store is not None:
+            self.state_store.set(self.state_name, "trader", self.get_state())
+            self.state_store.commit()
+
     def is_runnable(self) -> bool:
         return True
 
-    def do_trade_cycle(self):
-        pass
-
-    def tick(self):
+    def get_next_cycle_delay(self) -> float:
         delay: float = self.get_min_cycle_delay()
         rand_delay: float = self.get_max_random_cycle_delay_add()
         if rand_delay != 0:
             float_scale = 100
             delay += randint(0, int(rand_delay*float_scale))/float_scale
+        return delay
+
+
+class Trader(TraderBase):
+    """
+    A trader whose cycles run on the calling thread, over an Exchange.
+    """
+    def get_exchange(self) -> Exchange:
+        return self.exchange
+
+    def refresh_wallets_cached_balances(self, block: bool = True) -> None:
+        """
+        When blocking, waits for every refresh to complete.
+        Raises TimeoutError if any single wallet's refresh was queued longer than the balance refresh timeout ago, whether or not a worker has picked it up yet.
+        """
+        futures: dict[Future, Wallet] = {}
+        for wallet in self.get_wallets():
+            if wallet is not None and not self.is_cached_balance_fresh(wallet):
+                future = wallet.refresh_cached_balance(block=False)
+                if future is not None:
+                    futures[future] = wallet
+        if block:
+            timeout = self.get_balance_refresh_timeout()
+            pending = set(futures)
+            while pending:
+                wake = timeout
+                if timeout is not None:
+                    now = monotonic()
+                    started = {future: futures[future].get_refresh_submitted() for future in pending}
+                    expired = [futures[future].get_ticker() for future, start in started.items() if start is not None and now-start >= timeout]
+                    if expired:
+                        raise TimeoutError(f"Refreshing the balance of {', '.join(expired)} took longer than {timeout}s (including waiting for a worker)")
+                    wake = min((start+timeout-now for start in started.values() if start is not None), default=timeout)
+                done, pending = wait(pending, timeout=wake, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        logger.warning("Failed to refresh the balance of %s: %s", futures[future].get_ticker(), future.exception(), ticker=futures[future].get_ticker())
+
+    def do_trade_cycle(self):
+        pass
+
+    def tick(self):
+        delay: float = self.get_next_cycle_delay()
         current_time: float = time()
         if current_time - self.get_last_tick_time() >= delay:
             self.last_tick_time = current_time
             self.do_trade_cycle()
 
 
-class TraderRunner():
+class AsyncTrader(TraderBase):
+    """
+    Coroutine counterpart of Trader, over an AsyncExchange and AsyncWallets; runners await its cycles on their event loop.
+    """
+    def get_exchange(self) -> AsyncExchange:
+        return self.exchange
+
+    async def refresh_wallets_cached_balances(self) -> None:
+        wallets = [wallet for wallet in self.get_wallets() if wallet is not None and not self.is_cached_balance_fresh(wallet)]
+        timeout = self.get_balance_refresh_timeout()
+        results = await asyncio.gather(*(asyncio.wait_for(wallet.refresh_cached_balance(), timeout) for wallet in wallets), return_exceptions=True)
+        expired: list[str] = []
+        for wallet, result in zip(wallets, results):
+            if isinstance(result, TimeoutError):
+                expired.append(wallet.get_ticker())
+            elif isinstance(result, Exception):
+                logger.warning("Failed to refresh the balance of %s: %s", wallet.get_ticker(), result, ticker=wallet.get_ticker())
+        if expired:
+            raise TimeoutError(f"Refreshing the balance of {', '.join(expired)} took longer than {timeout}s")
+
+    async def do_trade_cycle(self):
+        pass
+
+    async def tick(self):
+        delay: float = self.get_next_cycle_delay()
+        current_time: float = time()
+        if current_time - self.get_last_tick_time() >= delay:
+            self.last_tick_time = current_time
+            await self.do_trade_cycle()
+
+
+def get_first_deadline(trader: TraderBase, now: float) -> float:
+    """
+    When, on the monotonic clock now reads, trader's first cycle is due: once its delay has passed since its last tick, so a restored last_tick_time is honored.
+    """
+    return now+max(0, trader.get_last_tick_time()+trader.get_next_cycle_delay()-time())
+
+
+def get_next_deadline(trader: TraderBase, started: float, min_pause: float) -> float:
+    """
+    When trader's next cycle is due, given when (on the monotonic clock) its last one started.
+    """
+    return started+max(min_pause, trader.get_next_cycle_delay())
+
+
+def get_trigger_deadline(now: float, last_run: float, min_trigger_interval: float) -> float:
+    """
+    The earliest a triggered cycle may run: now, unless the last one (on the monotonic clock) is less than min_trigger_interval ago.
+    """
+    return max(now, last_run+min_trigger_interval)
+
+
+class TraderScheduler():
+    """
+    Runs traders on a heap of deadlines, sleeping exactly until the next one is due.
+    Each trader is next due get_next_cycle_delay() (at least min_pause) after its last cycle started; trigger() makes it due early, e.g. when a price feed reports a move.
+    """
+    def __init__(self, traders: list[TraderBase] | None = None, min_pause: float = 0, min_trigger_interval: float = 0, cycle_fn=None):
+        self.queue: list[tuple[float, int, TraderBase]] = []
+        self.deadlines: dict[int, tuple[float, int]] = {}
+        self.last_runs: dict[int, float] = {}
+        self.counter = count()
+        self.condition: Condition = Condition()
+        self.min_pause: float = min_pause
+        self.min_trigger_interval: float = min_trigger_interval
+        self.cycle_fn = cycle_fn if cycle_fn is not None else (lambda trader: trader.do_trade_cycle())
+        self.running: bool = False
+        for trader in traders or []:
+            self.add_trader(trader)
+
+    def _schedule_(self, trader: TraderBase, deadline: float) -> None:
+        seq = next(self.counter)
+        self.deadlines[id(trader)] = (deadline, seq)
+        heappush(self.queue, (deadline, seq, trader))
+        self.condition.notify()
+
+    def add_trader(self, trader: TraderBase) -> None:
+        """
+        The first cycle is due once the trader's delay has passed since its last tick, so a restored last_tick_time is honored.
+        """
+        with self.condition:
+            self._schedule_(trader, get_first_deadline(trader, monotonic()))
+
+    def get_traders(self) -> list[TraderBase]:
+        with self.condition:
+            return [trader for _, seq, trader in self.queue if self.deadlines.get(id(trader), (None, None))[1] == seq]
+
+    def trigger(self, trader: TraderBase | None = None) -> None:
+        """
+        Makes trader (or every trader) due now, or min_trigger_interval after its last cycle if that is later.
+        """
+        with self.condition:
+            now = monotonic()
+            for queued in ([trader] if trader is not None else self.get_traders()):
+                current = self.deadlines.get(id(queued))
+                if current is not None:
+                    deadline = get_trigger_deadline(now, self.last_runs.get(id(queued), 0), self.min_trigger_interval)
+                    if deadline < current[0]:
+                        self._schedule_(queued, deadline)
+
+    def stop(self) -> None:
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def _next_due_(self) -> TraderBase | None:
+        with self.condition:
+            while self.running:
+                if not self.queue:
+                    self.condition.wait()
+                    continue
+                deadline, seq, trader = self.queue[0]
+                if self.deadlines.get(id(trader), (None, None))[1] != seq:
+                    heappop(self.queue)
+                    continue
+                now = monotonic()
+                if deadline > now:
+                    self.condition.wait(deadline-now)
+                    continue
+                heappop(self.queue)
+                del self.deadlines[id(trader)]
+                return trader
+            return None
+
+    def run(self, cycles: int | None = None) -> int:
+        """
+        Runs until stop() is called or, if given, cycles cycles have run in total. Returns how many ran.
+        """
+        self.running = True
+        done = 0
+        while cycles is None or done < cycles:
+            trader = self._next_due_()
+            if trader is None:
+                break
+            started = monotonic()
+            trader.last_tick_time = time()
+            self.last_runs[id(trader)] = started
+            try:
+                self.cycle_fn(trader)
+            finally:
+                with self.condition:
+                    self._schedule_(trader, get_next_deadline(trader, started, self.min_pause))
+            done += 1
+        self.running = False
+        return done
+
+
+def set_on_price_move(trader: TraderBase, callback) -> None:
+    """
+    Calls callback whenever the trader's streaming exchange (if it has one outermost) sees prices move.
+    """
+    exchange = trader.get_exchange()
+    if isinstance(exchange, (StreamingExchange, AsyncStreamingExchange)):
+        exchange.set_on_move(callback)
+
+
+def get_wallet_stats(trader: TraderBase) -> list[str]:
+    return [f"[Ticker: {wallet.get_ticker()}, Address: {wallet.get_addr()}, Auth: {wallet.get_auth()}, CachedBalance: {wallet.get_cached_balance()}, IsRefreshingCachedBalance: {wallet.get_is_refreshing_cached_balance()}]" for wallet in trader.get_wallets() if wallet is not None]
+
+
+def log_cycle_summary(trader: TraderBase, n: int, seconds: float, **fields) -> None:
+    """
+    One record per finished cycle in place of a line per wallet; the wallets follow at DEBUG, and are only gathered when that is enabled.
+    In a shard worker the record names the shard (see CycleGuard).
+    """
+    trades = trader.get_last_trades()
+    logger.info("Finished Cycle no. %d in %.3fs with %d trade(s)", n, seconds, trades, cycle=n, seconds=seconds, trades=trades, wallets=len(trader.get_wallets()), **{**cycle_guard.get_fields(), **fields})
+    logger.debug(lambda: get_wallet_stats(trader))
+
+
+class TraderRunnerBase():
+    """
+    What TraderRunner and AsyncTraderRunner share; both schedule cycles with get_first_deadline, get_next_deadline and get_trigger_deadline.
+    """
+    def __init__(self, trader: TraderBase):
+        self.trader: TraderBase = trader
+
+    def printstat(self) -> None:
+        logger.info(lambda: get_wallet_stats(self.trader))
+        #logger.info(f"Total portfolio value change relative to start: {sum([wallet.get_live_balance()*exchange.tickers[trader.get_main_wallet().get_ticker()] for wallet in trader.get_wallets() if wallet is not None])}")
+
+
+class TraderRunner(TraderRunnerBase):
     def __init__(self, trader: Trader):
-        self.trader: Trader = trader
+        super().__init__(trader)
+        self.scheduler: TraderScheduler | None = None
+
+    def get_scheduler(self) -> TraderScheduler | None:
+        return self.scheduler
 
     def main_loop(self, cycles: int | None = -1, pause: float = 0.1) -> int:
-        def printstat():
-            logger.info([f"[Ticker: {wallet.get_ticker()}, Address: {wallet.get_addr()}, Auth: {wallet.get_auth()}, LiveBalance: {wallet.get_live_balance()}, CachedBalance: {wallet.get_cached_balance()}, IsRefreshingCachedBalance: {wallet.get_is_refreshing_cached_balance()}]" for wallet in self.trader.get_wallets() if wallet is not None])
-            #logger.info(f"Total portfolio value change relative to start: {sum([wallet.get_live_balance()*exchange.tickers[trader.get_main_wallet().get_ticker()] for wallet in trader.get_wallets() if wallet is not None])}")
-        printstat()
-        def run(n: int):
+        """
+        Cycles are scheduled by the trader's min_cycle_delay and random delay, and at least pause apart.
+        Each cycle logs one summary record; the wallets are only listed at the start, and at DEBUG after every cycle.
+        """
+        self.printstat()
+        n = 0
+        def run(trader: Trader):
+            nonlocal n
+            logger.info(get_div_str(False, False))
+            logger.info("Starting Cycle no. %d", n, cycle=n)
+            logger.info(get_div_str(False, True))
+            started = perf_counter()
+            with cycle_guard:
+                trader.do_trade_cycle()
+            log_cycle_summary(trader, n, perf_counter()-started)
+            logger.info(get_div_str(True, False))
+            n += 1
+        self.scheduler = TraderScheduler([self.trader], min_pause=pause, cycle_fn=run)
+        set_on_price_move(self.trader, lambda: self.scheduler.trigger(self.trader))
+        try:
+            self.scheduler.run(cycles if cycles is not None and cycles > -1 else None)
+        except KeyboardInterrupt:
+            print("Keyboard interrupt received, exiting...")
+        return 0
+
+
+class TraderStats():
+    def __init__(self, name: str):
+        self.name: str = name
+        self.cycles: int = 0
+        self.failures: int = 0
+        self.skipped: int = 0
+        self.total_seconds: float = 0
+        self.last_seconds: float | None = None
+        self.last_error: str | None = None
+
+    def record(self, seconds: float, error: BaseException | None = None) -> None:
+        self.cycles += 1
+        self.total_seconds += seconds
+        self.last_seconds = seconds
+        if error is not None:
+            self.failures += 1
+            self.last_error = repr(error)
+
+    def to_dict(self) -> dict:
+        return {
+                "cycles": self.cycles,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "avg_seconds": self.total_seconds/self.cycles if self.cycles else None,
+                "last_seconds": self.last_seconds,
+                "last_error": self.last_error,
+                }
+
+
+class MultiTraderRunner():
+    """
+    Hosts many traders, sync or async, in one process on a single TraderScheduler.
+    Sync cycles each run on their own worker thread and async ones on one shared event loop, so a failing or slow trader never holds up the others.
+    A trader whose previous cycle is still running skips its turn.
+    """
+    def __init__(self, traders: dict[str, TraderBase], pause: float = 0.1):
+        self.traders: dict[str, TraderBase] = traders
+        self.names: dict[int, str] = {id(trader): name for name, trader in traders.items()}
+        self.stats: dict[str, TraderStats] = {name: TraderStats(name) for name in traders}
+        self.running: dict[int, Future] = {}
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max(1, len(traders)), thread_name_prefix="traderone-trader")
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.scheduler: TraderScheduler = TraderScheduler(list(traders.values()), min_pause=pause, cycle_fn=self._dispatch_)
+        for trader in traders.values():
+            set_on_price_move(trader, lambda trader=trader: self.scheduler.trigger(trader))
+
+    def get_scheduler(self) -> TraderScheduler:
+        return self.scheduler
+
+    def get_stats(self) -> dict[str, dict]:
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def _get_loop_(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            Thread(target=self.loop.run_forever, name="traderone-async", daemon=True).start()
+        return self.loop
+
+    def _dispatch_(self, trader: TraderBase) -> None:
+        name = self.names[id(trader)]
+        pending = self.running.get(id(trader))
+        if pending is not None and not pending.done():
+            self.stats[name].skipped += 1
+            logger.warning("Trader %s is still running its previous cycle, skipping...", name, trader=name)
+            return
+        started = monotonic()
+        if isinstance(trader, AsyncTrader):
+            future = asyncio.run_coroutine_threadsafe(trader.do_trade_cycle(), self._get_loop_())
+        else:
+            future = self.executor.submit(trader.do_trade_cycle)
+        self.running[id(trader)] = future
+        future.add_done_callback(lambda done: self._record_(name, started, done))
+
+    def _record_(self, name: str, started: float, future: Future) -> None:
+        error = None if future.cancelled() else future.exception()
+        self.stats[name].record(monotonic()-started, error)
+        if error is not None:
+            logger.error("Trader %s failed its cycle: %r", name, error, trader=name, error=repr(error))
+        else:
+            logger.info("Trader %s finished cycle no. %d in %.3fs", name, self.stats[name].cycles-1, self.stats[name].last_seconds, trader=name, cycle=self.stats[name].cycles-1, seconds=self.stats[name].last_seconds, trades=self.traders[name].get_last_trades())
+
+    def main_loop(self, cycles: int | None = -1, pause: float | None = None) -> int:
+        """
+        cycles counts turns across all traders, skipped ones included.
+        """
+        if pause is not None:
+            self.scheduler.min_pause = pause
+        try:
+            self.scheduler.run(cycles if cycles is not None and cycles > -1 else None)
+        except KeyboardInterrupt:
+            print("Keyboard interrupt received, exiting...")
+        finally:
+            wait(list(self.running.values()))
+            self.executor.shutdown()
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+            stats = self.get_stats()
+            logger.info("Trader stats: %s", stats, stats=stats)
+        return 0
+
+
+class CycleGuard():
+    """
+    Held by a runner around every cycle it runs. In a shard worker it holds that shard's lock, which the coordinator takes too while it rebalances the hubs, and names the shard in every cycle summary; anywhere else it does nothing.
+    """
+    def __init__(self):
+        self.locks: list = []
+        self.lock = None
+        self.fields: dict = {}
+
+    def get_fields(self) -> dict:
+        return self.fields
+
+    def set_locks(self, locks: list) -> None:
+        self.locks = locks
+
+    def set_shard(self, name: str, index: int) -> None:
+        self.lock = self.locks[index] if index < len(self.locks) else None
+        self.fields = {"shard": name}
+
+    def __enter__(self) -> "CycleGuard":
+        if self.lock is not None:
+            self.lock.acquire()
+        return self
+
+    def __exit__(self, *_) -> None:
+        if self.lock is not None:
+            self.lock.release()
+
+    async def __aenter__(self) -> "CycleGuard":
+        """
+        Waits for the lock on a worker thread, so the event loop keeps running meanwhile.
+        """
+        if self.lock is not None:
+            await asyncio.to_thread(self.lock.acquire)
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.__exit__()
+
+
+global cycle_guard
+cycle_guard = CycleGuard()
+
+
+def _shard_worker_init_(json_lines: bool, queued: bool, locks: list) -> None:
+    """
+    Gives each worker its own log writer, as a queue's writer thread stays behind in the parent, and every shard's lock (which can only be handed over as the worker starts).
+    """
+    common_init()
+    if json_lines or queued:
+        configure_logging(json_lines=json_lines, queued=queued)
+    cycle_guard.set_locks(locks)
+
+def _shard_worker_run_(spec: dict, index: int) -> int:
+    cycle_guard.set_shard(spec[ConfigKeys.NAME], index)
+    return run_main(spec)
+
+
+class ShardedTraderRunner():
+    """
+    Runs each shard (a group of wallets trading around its own hub wallet, see get_shard_specs) with its own exchange client in its own worker process, so a cycle only ever covers one shard's wallets.
+    In this process a coordinator trader over the hub wallets rebalances the shards against each other every hub interval, until every shard has finished.
+    Each shard holds its own lock for the length of every cycle (see CycleGuard), and the coordinator holds all of them while it rebalances, so no hub is ever traded by two processes at once.
+    """
+    def __init__(self, hub_spec: dict, shard_specs: list[dict], pause: float = 0.1):
+        self.hub_spec: dict = hub_spec
+        self.shard_specs: list[dict] = shard_specs
+        self.coordinator: TraderBase = build_trader(hub_spec)
+        self.scheduler: TraderScheduler = TraderScheduler([self.coordinator], min_pause=pause, cycle_fn=self._run_hubs_)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.shards: list[Future] = []
+        self.locks: list = []
+        self.cycles: int = 0
+
+    def get_coordinator(self) -> TraderBase:
+        return self.coordinator
+
+    def get_scheduler(self) -> TraderScheduler:
+        return self.scheduler
+
+    def _shards_done_(self) -> bool:
+        return all(shard.done() for shard in self.shards)
+
+    def _run_hubs_(self, trader: TraderBase) -> None:
+        if self._shards_done_():
+            self.scheduler.stop()
+            return
+        for lock in self.locks:
+            lock.acquire()
+        started = perf_counter()
+        try:
+            if isinstance(trader, AsyncTrader):
+                if self.loop is None:
+                    self.loop = asyncio.new_event_loop()
+                self.loop.run_until_complete(trader.do_trade_cycle())
+            else:
+                trader.do_trade_cycle()
+        except Exception as e:
+            logger.error("Hub rebalancing failed: %r", e, shard="hubs", error=repr(e))
+        else:
+            log_cycle_summary(trader, self.cycles, perf_counter()-started, shard="hubs")
+        finally:
+            for lock in self.locks:
+                lock.release()
+        self.cycles += 1
+
+    def main_loop(self) -> int:
+        """
+        Returns 1 if any shard failed, and 0 otherwise.
+        """
+        json_lines = self.hub_spec.get(ConfigKeys.LOG_FORMAT) == LogFormat.JSON
+        self.locks = [ProcessLock() for _ in self.shard_specs]
+        with ProcessPoolExecutor(max_workers=len(self.shard_specs), initializer=_shard_worker_init_, initargs=(json_lines, bool(self.hub_spec.get(ConfigKeys.LOG_QUEUE)), self.locks)) as pool:
+            self.shards = [pool.submit(_shard_worker_run_, spec, k) for k, spec in enumerate(self.shard_specs)]
+            for shard in self.shards:
+                shard.add_done_callback(lambda _: self.scheduler.stop() if self._shards_done_() else None)
+            try:
+                self.scheduler.run()
+            except KeyboardInterrupt:
+                print("Keyboard interrupt received, exiting...")
+            finally:
+                wait(self.shards)
+                if self.loop is not None:
+                    self.loop.close()
+        failed = 0
+        for spec, shard in zip(self.shard_specs, self.shards):
+            error = shard.exception()
+            if error is not None or shard.result():
+                failed += 1
+                logger.error("Shard %s failed: %r", spec.get(ConfigKeys.NAME), error if error is not None else shard.result(), shard=spec.get(ConfigKeys.NAME))
+        logger.info("Ran %d shard(s) with %d hub rebalancing cycle(s)", len(self.shards), self.cycles, shards=len(self.shards), cycles=self.cycles)
+        return 1 if failed else 0
+
+
+class AsyncTraderRunner(TraderRunnerBase):
+    """
+    Drives an AsyncTrader on the running event loop.
+    Cycles are due when TraderScheduler would have them due, and trigger() (safe to call from any thread) brings the next one forward.
+    """
+    def __init__(self, trader: AsyncTrader, min_trigger_interval: float = 0):
+        super().__init__(trader)
+        self.min_trigger_interval: float = min_trigger_interval
+        self.last_run: float = 0
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.wake: asyncio.Event | None = None
+
+    def trigger(self) -> None:
+        if self.loop is not None and self.wake is not None:
+            self.loop.call_soon_threadsafe(self.wake.set)
+
+    async def _wait_until_(self, deadline: float) -> None:
+        """
+        Sleeps until deadline on the monotonic clock, or until a trigger() brings it forward.
+        """
+        while (timeout := deadline-monotonic()) > 0:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout)
+            except TimeoutError:
+                break
+            self.wake.clear()
+            deadline = min(deadline, get_trigger_deadline(monotonic(), self.last_run, self.min_trigger_interval))
+        self.wake.clear()
+
+    async def main_loop(self, cycles: int | None = -1, pause: float = 0.1) -> int:
+        self.loop = asyncio.get_running_loop()
+        self.wake = asyncio.Event()
+        set_on_price_move(self.trader, self.trigger)
+        self.printstat()
+        deadline = get_first_deadline(self.trader, monotonic())
+        async def run(n: int):
+            nonlocal deadline
+            await self._wait_until_(deadline)
+            started = monotonic()
+            self.last_run = started
+            self.trader.last_tick_time = time()
             logger.info(get_div_str(False, False))
-            logger.info(f"Starting Cycle no. {n}")
+            logger.info("Starting Cycle no. %d", n, cycle=n)
             logger.info(get_div_str(False, True))
-            self.trader.do_trade_cycle()
-            printstat()
-            logger.info(f"Finished Cycle no. {n}")
+            async with cycle_guard:
+                await self.trader.do_trade_cycle()
+            log_cycle_summary(self.trader, n, monotonic()-started)
             logger.info(get_div_str(True, False))
-            sleep(pause)
+            deadline = get_next_deadline(self.trader, started, pause)
         if cycles is not None and cycles > -1:
             for n in range(cycles):
-                run(n)
+                await run(n)
         else:
             n = 0
             while True:
                 try:
-                    run(n)
+                    await run(n)
                     n += 1
-                except KeyboardInterrupt:
+                except (KeyboardInterrupt, asyncio.CancelledError):
                     print("Keyboard interrupt received, exiting...")
                     break
         return 0
@@ -205,13 +2068,100 @@ class TraderRunner():
 
 
 
-class TraderOne(Trader):
-    def __init__(self, exchange: Exchange, wallets: list[Wallet], min_cycle_delay: float = 30*60, max_random_cycle_delay_add: float = 0, min_proportional_diff: float = 0.1, max_downs: int | None = 100, main_wallet_index: int = 0):
-        super().__init__(exchange, wallets, min_cycle_delay, max_random_cycle_delay_add)
+class Position():
+    """
+    View of one position of a Portfolio; holds nothing but where to look.
+    """
+    __slots__ = ("portfolio", "index")
+
+    def __init__(self, portfolio: "Portfolio", index: int):
+        self.portfolio: Portfolio = portfolio
+        self.index: int = index
+
+    def get_wallet(self) -> Wallet:
+        return self.portfolio.secondary[self.index]
+
+    def get_ticker(self) -> str:
+        return self.portfolio.tickers[self.index]
+
+    def get_balance(self) -> float:
+        return self.portfolio.balances[self.index]
+
+    def get_rate(self) -> float | None:
+        rate = self.portfolio.last_rates[self.index]
+        return None if rate != rate else rate # NaN until the first rate
+
+    def get_downs(self) -> int:
+        return self.portfolio.downs[self.index]
+
+
+class Portfolio():
+    """
+    The secondary positions of a TraderOne in parallel typed arrays, indexed like its secondary wallets: the balance and rate each cycle last saw, and the down streak.
+    Cycles fill the arrays in place (NumPy views them without copying), so they stay at POSITION_BYTES a position however long the trader runs.
+    Incremental cycles also keep the running total of the relative balances, the average as of the last full check, and the stage of each current candidate by index.
+    """
+    __slots__ = ("main_wallet", "secondary", "tickers", "balances", "last_rates", "downs", "relative_balances", "trade_balances", "total_relative_balance", "checked_average", "candidates")
+
+    POSITION_BYTES: int = 5*8
+
+    def __init__(self, wallets: list[Wallet], main_wallet_index: int):
+        self.main_wallet: Wallet = wallets[main_wallet_index]
+        self.secondary: list[Wallet] = [wallet for i, wallet in enumerate(wallets) if i != main_wallet_index]
+        self.tickers: list[str] = [wallet.get_ticker() for wallet in self.secondary]
+        n = len(self.secondary)
+        self.balances: array = array("d", bytes(8*n))
+        self.last_rates: array = array("d", [float("nan")])*n
+        self.downs: array = array("q", bytes(8*n))
+        self.relative_balances: array = array("d", bytes(8*n))
+        self.trade_balances: array = array("d", bytes(8*n))
+        self.total_relative_balance: float = 0
+        self.checked_average: float | None = None
+        self.candidates: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.secondary)
+
+    def get_main_wallet(self) -> Wallet:
+        return self.main_wallet
+
+    def get_secondary_wallets(self) -> list[Wallet]:
+        return self.secondary
+
+    def get_tickers(self) -> list[str]:
+        return self.tickers
+
+    def get_position(self, index: int) -> Position:
+        return Position(self, index)
+
+    def get_nbytes(self) -> int:
+        return sum(len(values)*values.itemsize for values in (self.balances, self.last_rates, self.downs, self.relative_balances, self.trade_balances))
+
+    def get_down_tracker(self) -> list[tuple[float | None, int]]:
+        """
+        (last rate or None, down streak) of every position.
+        """
+        return [(None if rate != rate else rate, down) for rate, down in zip(self.last_rates, self.downs)]
+
+    def set_down(self, index: int, last_rate: float | None, down: int) -> None:
+        self.last_rates[index] = float("nan") if last_rate is None else last_rate
+        self.downs[index] = down
+        self.checked_average = None
+
+
+class TraderOneBase(TraderBase):
+    """
+    TraderOne's rebalancing, shared by TraderOne and AsyncTraderOne: every step of a cycle that needs no I/O, from the down streaks and candidates to fee filtering and routing.
+    """
+    def __init__(self, exchange: "Exchange | AsyncExchange", wallets: list[Wallet], min_cycle_delay: float = 30*60, max_random_cycle_delay_add: float = 0, min_proportional_diff: float = 0.1, max_downs: int | None = 100, main_wallet_index: int = 0, balance_refresh_timeout: float | None = 60, use_kernel: bool | None = None, routing: bool = False, balance_max_age: float = 0, incremental: float | None = None):
+        super().__init__(exchange, wallets, min_cycle_delay, max_random_cycle_delay_add, balance_refresh_timeout, balance_max_age)
         self.min_proportional_diff: float = min_proportional_diff
         self.main_wallet_index: int = main_wallet_index
-        self.down_tracker: list[tuple[float | None, int]] = [(None, 0) for _ in self.get_wallets()]
+        self.portfolio: Portfolio | None = None
         self.max_downs: int | None = max_downs
+        self.use_kernel: bool | None = use_kernel
+        self.routing: bool = routing
+        self.incremental: float | None = incremental
 
     def _check_enough_wallets_(self) -> bool:
         w = len(self.get_wallets())
@@ -227,6 +2177,68 @@ class TraderOne(Trader):
     def get_main_wallet_index(self) -> int:
         return self.main_wallet_index
 
+    def get_routing(self) -> bool:
+        return self.routing
+
+    def get_incremental(self) -> float | None:
+        """
+        How far (proportionally) the average may move before an incremental cycle checks every wallet again; None checks every wallet every cycle.
+        """
+        return self.incremental
+
+    def get_portfolio(self) -> Portfolio | None:
+        """
+        Built on first use, once there are enough wallets.
+        """
+        if self.portfolio is None and self._check_enough_wallets_():
+            self.portfolio = Portfolio(self.get_wallets(), self.get_main_wallet_index())
+        return self.portfolio
+
+    @property
+    def down_tracker(self) -> list[tuple[float | None, int]]:
+        """
+        (last rate or None, down streak) per wallet, in secondary wallet order; a copy, see Portfolio for the live arrays.
+        """
+        portfolio = self.get_portfolio()
+        down_tracker = portfolio.get_down_tracker() if portfolio is not None else []
+        return down_tracker + [(None, 0)]*(len(self.get_wallets())-len(down_tracker))
+
+    @down_tracker.setter
+    def down_tracker(self, down_tracker: list[tuple[float | None, int]]) -> None:
+        """
+        Writes into the Portfolio's arrays; entries past its secondary wallets are ignored, like the padding the getter adds.
+        """
+        portfolio = self.get_portfolio()
+        if portfolio is not None:
+            for i, (last_rate, down) in zip(range(len(portfolio)), down_tracker):
+                portfolio.set_down(i, last_rate, down)
+
+    #@override
+    def get_state(self) -> dict:
+        state = super().get_state()
+        portfolio = self.get_portfolio()
+        if portfolio is not None:
+            state["down_tracker"] = {ticker: list(down) for ticker, down in zip(portfolio.get_tickers(), portfolio.get_down_tracker())}
+        return state
+
+    #@override
+    def set_state(self, state: dict) -> None:
+        super().set_state(state)
+        down_tracker: dict[str, list] = state.get("down_tracker", {})
+        portfolio = self.get_portfolio()
+        if portfolio is not None:
+            for i, ticker in enumerate(portfolio.get_tickers()):
+                if ticker in down_tracker:
+                    portfolio.set_down(i, *down_tracker[ticker])
+
+    def get_use_kernel(self, num_wallets: int) -> bool:
+        """
+        Whether to run the NumPy kernels; when unset, they are used if NumPy is installed and there are at least KERNEL_MIN_WALLETS wallets.
+        """
+        if np is None:
+            return False
+        return num_wallets >= KERNEL_MIN_WALLETS if self.use_kernel is None else self.use_kernel
+
     def get_main_wallet(self) -> Wallet | None:
         if self._check_enough_wallets_():
             return self.get_wallets()[self.get_main_wallet_index()]
@@ -234,57 +2246,318 @@ class TraderOne(Trader):
             return None
 
     def get_secondary_wallets(self) -> list[Wallet] | None:
-        if self._check_enough_wallets_():
-            wallets = self.get_wallets().copy()
-            wallets.pop(self.get_main_wallet_index())
-            return wallets
-        else:
+        """
+        The portfolio's own list, not a copy; do not modify it.
+        """
+        portfolio = self.get_portfolio()
+        return portfolio.get_secondary_wallets() if portfolio is not None else None
+
+    def get_rebalance_candidates(self, wallets: list[Wallet], rates: list[float]) -> list[tuple[int, Wallet, float]]:
+        """
+        Takes each secondary wallet's rate against the main wallet, updates the down streaks and returns (stage, wallet, trade_balance) for every wallet that holds enough to rebalance.
+        Stage 0 sells to the main wallet and comes first, stage 1 buys from it. Working values live in the portfolio's arrays, so only candidates allocate.
+        """
+        if self.get_incremental() is not None:
+            return self._get_rebalance_candidates_incremental_(wallets, rates)
+        if self.get_use_kernel(len(wallets)):
+            return self._get_rebalance_candidates_kernel_(wallets, rates)
+        portfolio = self.get_portfolio()
+        balances, last_rates, downs = portfolio.balances, portfolio.last_rates, portfolio.downs
+        relative_balances, trade_balances = portfolio.relative_balances, portfolio.trade_balances
+        n = len(wallets)
+        total_relative_balance: float = 0
+        for i in range(n):
+            rate = rates[i]
+            last_rate = last_rates[i]
+            downs[i] = downs[i] + 1 if last_rate < rate else 0 # NaN (no previous rate) never compares less
+            last_rates[i] = rate
+            balance = wallets[i].get_cached_balance()
+            balances[i] = balance
+            relative_balance = rate*balance
+            relative_balances[i] = relative_balance
+            total_relative_balance += relative_balance
+        num_balances: int = n+1
+        avg_balance: float = total_relative_balance / num_balances
+        for i in range(n):
+            if self.max_downs is not None and downs[i] > self.max_downs:
+                logger.warning("Ticker %s has been down for %d trade-cycles, skipping...", wallets[i].get_ticker(), downs[i], ticker=wallets[i].get_ticker(), downs=int(downs[i]))
+                pass
+            trade_balances[i] = (relative_balances[i] - avg_balance)*rates[i]
+        candidates: list[tuple[int, Wallet, float]] = []
+        for stage in (0, 1):
+            for i in range(n):
+                trade_balance = trade_balances[i]
+                diff_balance = relative_balances[i] - avg_balance
+                if (diff_balance > 0 if stage == 0 else diff_balance < 0) and balances[i] > 0 and balances[i] > abs(trade_balance):
+                    candidates.append((stage, wallets[i], trade_balance))
+        return candidates
+
+    def _get_rebalance_candidates_incremental_(self, wallets: list[Wallet], rates: list[float]) -> list[tuple[int, Wallet, float]]:
+        """
+        Like get_rebalance_candidates, but only wallets whose rate or balance changed (or whose down streak ends) are worked through: their relative balances go into the running total as deltas, and only they are checked against the new average.
+        Once the average has moved more than get_incremental() (proportionally) since the last full check, the total is added up again and every wallet checked, exactly as a full cycle would.
+        In between, candidates are checked again against the current average before they are returned, so none is stale; a wallet the average drifted into range of waits for its own change or the next full check.
+        Spotting the changes is one comparison per wallet; everything else is proportional to the changes and the candidates.
+        """
+        portfolio = self.get_portfolio()
+        balances, last_rates, downs = portfolio.balances, portfolio.last_rates, portfolio.downs
+        relative_balances, trade_balances = portfolio.relative_balances, portfolio.trade_balances
+        n = len(wallets)
+        changed: list[int] = []
+        for i in range(n):
+            rate = rates[i]
+            balance = wallets[i].get_cached_balance()
+            last_rate = last_rates[i]
+            if rate != last_rate or balance != balances[i] or downs[i]: # NaN (no previous rate) never compares equal
+                changed.append(i)
+                downs[i] = downs[i] + 1 if last_rate < rate else 0
+                last_rates[i] = rate
+                balances[i] = balance
+                relative_balance = rate*balance
+                portfolio.total_relative_balance += relative_balance - relative_balances[i]
+                relative_balances[i] = relative_balance
+        num_balances: int = n+1
+        avg_balance: float = portfolio.total_relative_balance / num_balances
+        checked_average = portfolio.checked_average
+        if checked_average is None or abs(avg_balance - checked_average) > abs(checked_average)*self.get_incremental():
+            total_relative_balance: float = 0
+            for i in range(n):
+                total_relative_balance += relative_balances[i]
+            portfolio.total_relative_balance = total_relative_balance
+            avg_balance = total_relative_balance / num_balances
+            portfolio.checked_average = avg_balance
+            changed = range(n)
+        candidates = portfolio.candidates
+        for i in changed:
+            if self.max_downs is not None and downs[i] > self.max_downs:
+                logger.warning("Ticker %s has been down for %d trade-cycles, skipping...", wallets[i].get_ticker(), downs[i], ticker=wallets[i].get_ticker(), downs=int(downs[i]))
+                pass
+            diff_balance = relative_balances[i] - avg_balance
+            trade_balance = diff_balance*rates[i]
+            trade_balances[i] = trade_balance
+            if diff_balance > 0 and balances[i] > 0 and balances[i] > abs(trade_balance):
+                candidates[i] = 0
+            elif diff_balance < 0 and balances[i] > 0 and balances[i] > abs(trade_balance):
+                candidates[i] = 1
+            else:
+                candidates.pop(i, None)
+        result: list[tuple[int, Wallet, float]] = []
+        for i, stage in sorted(candidates.items(), key=lambda item: (item[1], item[0])):
+            diff_balance = relative_balances[i] - avg_balance
+            trade_balance = diff_balance*rates[i]
+            if (diff_balance > 0 if stage == 0 else diff_balance < 0) and balances[i] > 0 and balances[i] > abs(trade_balance):
+                result.append((stage, wallets[i], trade_balance))
+            else:
+                del candidates[i]
+        return result
+
+    def _get_rebalance_candidates_kernel_(self, wallets: list[Wallet], rates: list[float]) -> list[tuple[int, Wallet, float]]:
+        n = len(wallets)
+        portfolio = self.get_portfolio()
+        balances = np.frombuffer(portfolio.balances, dtype=float, count=n)
+        balances[:] = np.fromiter((wallet.get_cached_balance() for wallet in wallets), dtype=float, count=n)
+        rates_arr = np.asarray(rates, dtype=float)
+        last_rates = np.frombuffer(portfolio.last_rates, dtype=float, count=n)
+        downs_arr = np.frombuffer(portfolio.downs, dtype=np.int64, count=n)
+        downs, stages, trade_balances = rebalance_kernel(balances, rates_arr, last_rates, downs_arr)
+        last_rates[:] = rates_arr
+        downs_arr[:] = downs
+        if self.max_downs is not None:
+            for i in np.flatnonzero(downs > self.max_downs):
+                logger.warning("Ticker %s has been down for %d trade-cycles, skipping...", wallets[i].get_ticker(), downs[i], ticker=wallets[i].get_ticker(), downs=int(downs[i]))
+        order = np.concatenate((np.flatnonzero(stages == 0), np.flatnonzero(stages == 1)))
+        trade_balances_list = trade_balances.tolist()
+        return [(int(stages[i]), wallets[i], trade_balances_list[i]) for i in order.tolist()]
+
+    @staticmethod
+    def get_stage_wallets(stage: int, wallet: Wallet, main_wallet: Wallet) -> tuple[Wallet, Wallet]:
+        return (main_wallet, wallet) if stage else (wallet, main_wallet)
+
+    def get_trade(self, stage: int, wallet: Wallet, trade_balance: float, fee: float, main_wallet: Wallet, impact: float | None = None) -> tuple[float, Wallet, Wallet] | None:
+        """
+        Returns (amount, from_wallet, to_wallet) if the candidate is worth trading after fees, otherwise None.
+        With a known price impact, what is left of the amount after it must still be worth trading too.
+        """
+        if impact is not None and abs(trade_balance)*(1-impact) / wallet.get_cached_balance() < self.get_min_proportional_diff():
             return None
+        if (abs(trade_balance)+fee) / wallet.get_cached_balance() >= self.get_min_proportional_diff():
+            if stage == 0:
+                if trade_balance > 0:
+                    return (trade_balance, wallet, main_wallet)
+            else:
+                if trade_balance < 0:
+                    return (abs(trade_balance), main_wallet, wallet)
+        return None
 
+    def get_fee_requests(self, candidates: list[tuple[int, Wallet, float]], main_wallet: Wallet) -> list[tuple[float, Wallet, Wallet]]:
+        return [(trade_balance, *self.get_stage_wallets(stage, wallet, main_wallet)) for stage, wallet, trade_balance in candidates]
+
+    def get_price_impacts(self, candidates: list[tuple[int, Wallet, float]], main_wallet: Wallet) -> list[float | None] | None:
+        """
+        The exchange's price impact for each candidate (read from curves sampled while quoting fees), or None if it knows none of them.
+        """
+        exchange = self.get_exchange()
+        impacts = [exchange.get_price_impact(abs(trade_balance), *(w.get_ticker() for w in self.get_stage_wallets(stage, wallet, main_wallet))) for stage, wallet, trade_balance in candidates]
+        return None if all(impact is None for impact in impacts) else impacts
+
+    def get_trades(self, candidates: list[tuple[int, Wallet, float]], fees: list[float], main_wallet: Wallet) -> list[tuple[int, float, Wallet, Wallet]]:
+        """
+        Filters candidates with their fees into (stage, amount, from_wallet, to_wallet) trades, in candidate order.
+        """
+        impacts = self.get_price_impacts(candidates, main_wallet)
+        if candidates and self.get_use_kernel(len(candidates)):
+            stages = np.fromiter((stage for stage, _, _ in candidates), dtype=np.int64, count=len(candidates))
+            trade_balances = np.fromiter((trade_balance for _, _, trade_balance in candidates), dtype=float, count=len(candidates))
+            balances = np.fromiter((wallet.get_cached_balance() for _, wallet, _ in candidates), dtype=float, count=len(candidates))
+            impact_array = None if impacts is None else np.array([np.nan if impact is None else impact for impact in impacts], dtype=float)
+            mask = trade_filter_kernel(stages, trade_balances, np.asarray(fees, dtype=float), balances, self.get_min_proportional_diff(), impact_array)
+            return [(stage, abs(trade_balance), *self.get_stage_wallets(stage, wallet, main_wallet)) for (stage, wallet, trade_balance), worth in zip(candidates, mask.tolist()) if worth]
+        trades: list[tuple[int, float, Wallet, Wallet]] = []
+        for i, ((stage, wallet, trade_balance), fee) in enumerate(zip(candidates, fees)):
+            trade = self.get_trade(stage, wallet, trade_balance, fee, main_wallet, None if impacts is None else impacts[i])
+            if trade is not None:
+                trades.append((stage, *trade))
+        return trades
+
+    @staticmethod
+    def get_trade_fees(candidates: list[tuple[int, Wallet, float]], fees: list[float], trades: list[tuple[int, float, Wallet, Wallet]]) -> list[float]:
+        """
+        The fee quoted for each trade's candidate, in trade order.
+        """
+        fee_by_wallet = {id(wallet): fee for (_, wallet, _), fee in zip(candidates, fees)}
+        return [fee_by_wallet[id(to_wallet if stage else from_wallet)] for stage, _, from_wallet, to_wallet in trades]
+
+    @staticmethod
+    def get_trade_value(trade: tuple[int, float, Wallet, Wallet], rates: dict[int, float]) -> float:
+        """
+        The value a hub trade moves, in main wallet units; rates maps id(wallet) to each secondary wallet's rate against the main wallet.
+        """
+        stage, amount, from_wallet, _ = trade
+        return amount if stage else amount*rates.get(id(from_wallet), 0)
+
+    def get_route_matches(self, trades: list[tuple[int, float, Wallet, Wallet]], rates: dict[int, float]) -> list[tuple[int, int, float]]:
+        """
+        Matches the hub sells (stage 0) of trades with the hub buys (stage 1) into (sell index, buy index, value) direct transfers, matching each sell at most once.
+        First sells and buys of the same value (to within ROUTE_TOLERANCE) are paired, each pair's one swap replacing two hub legs; then each remaining sell, largest first, goes whole to the buy with the most room left if it fits there, replacing its own hub leg (and the buy's once that is filled).
+        So routing never needs more swaps than going through the main wallet, and one fewer for every pair or filled buy. For S sells and B buys this takes O((S+B) log(S+B)) time and gives at most min(S, S+B-1) matches.
+        """
+        sells = sorted((value, i) for i, trade in enumerate(trades) if trade[0] == 0 and (value := self.get_trade_value(trade, rates)) > 0)
+        buys = sorted((value, i) for i, trade in enumerate(trades) if trade[0] == 1 and (value := self.get_trade_value(trade, rates)) > 0)
+        matches: list[tuple[int, int, float]] = []
+        rest: list[tuple[float, int]] = []
+        rooms: list[tuple[float, int]] = []
+        s = b = 0
+        while s < len(sells) and b < len(buys):
+            (sell_value, sell), (buy_value, buy) = sells[s], buys[b]
+            if abs(sell_value-buy_value) <= max(sell_value, buy_value)*ROUTE_TOLERANCE:
+                matches.append((sell, buy, min(sell_value, buy_value)))
+                s += 1
+                b += 1
+            elif sell_value < buy_value:
+                rest.append(sells[s])
+                s += 1
+            else:
+                rooms.append((-buy_value, buy))
+                b += 1
+        rest.extend(sells[s:])
+        rooms.extend((-buy_value, buy) for buy_value, buy in buys[b:])
+        heapify(rooms)
+        for value, sell in reversed(rest):
+            if rooms and -rooms[0][0] >= value:
+                room, buy = heappop(rooms)
+                matches.append((sell, buy, value))
+                if -room > value:
+                    heappush(rooms, (room+value, buy))
+        return matches
+
+    def get_route_fee_requests(self, trades: list[tuple[int, float, Wallet, Wallet]], matches: list[tuple[int, int, float]], rates: dict[int, float]) -> list[tuple[float, Wallet, Wallet]]:
+        return [(value/rates[id(trades[sell][2])], trades[sell][2], trades[buy][3]) for sell, buy, value in matches]
+
+    def get_routed_trades(self, trades: list[tuple[int, float, Wallet, Wallet]], trade_fees: list[float], matches: list[tuple[int, int, float]], route_fees: list[float], rates: dict[int, float]) -> list[tuple[int, float, Wallet, Wallet]]:
+        """
+        Replaces each matched part of a hub sell and buy with one direct swap between the two secondary wallets, wherever its fee is no more than the hub legs' share of theirs.
+        Fees are compared in main wallet units, taking each to be charged in the receiving wallet's ticker. What is left of a hub trade goes through the main wallet as before, scaled down.
+        Direct swaps never touch the main wallet, so they go in stage 0 with the remaining sells. Remainders under ROUTE_TOLERANCE of their trade are what pairing nearly equal trades leaves over, and dropped.
+        """
+        values = [self.get_trade_value(trade, rates) for trade in trades]
+        fee_values = [fee*(1 if stage == 0 else rates.get(id(to_wallet), 0)) for (stage, _, _, to_wallet), fee in zip(trades, trade_fees)]
+        left = list(values)
+        direct: list[tuple[int, float, Wallet, Wallet]] = []
+        for (sell, buy, value), route_fee in zip(matches, route_fees):
+            from_wallet, to_wallet = trades[sell][2], trades[buy][3]
+            hub_fee = fee_values[sell]*value/values[sell] + fee_values[buy]*value/values[buy]
+            if route_fee*rates[id(to_wallet)] <= hub_fee:
+                direct.append((0, value/rates[id(from_wallet)], from_wallet, to_wallet))
+                left[sell] -= value
+                left[buy] -= value
+        hub = [(stage, amount if left[i] == values[i] else amount*left[i]/values[i], from_wallet, to_wallet) for i, (stage, amount, from_wallet, to_wallet) in enumerate(trades) if left[i] > values[i]*ROUTE_TOLERANCE or left[i] == values[i]]
+        return [trade for trade in hub if trade[0] == 0] + direct + [trade for trade in hub if trade[0] == 1]
+
+
+class TraderOne(TraderOneBase, Trader):
     #@override
     def do_trade_cycle(self) -> None:
+        started = perf_counter() if metrics.enabled else None
+        trades: list[tuple[int, float, Wallet, Wallet]] = []
         main_wallet = self.get_main_wallet()
         if main_wallet is not None:
             wallets = self.get_secondary_wallets()
             if wallets is not None:
                 self.refresh_wallets_cached_balances(block=True)
-                total_relative_balance: float = 0
-                relative_balances: list[tuple[Wallet, float, float]] = []
-                for i, wallet in enumerate(wallets):
-                    rate = self.get_exchange().get_exchange_rate(wallet.get_ticker(), main_wallet.get_ticker())
-                    if self.down_tracker[i][0] is not None:
-                        since_up = self.down_tracker[i][1] + 1 if self.down_tracker[i][0] < rate else 0
-                    else:
-                        since_up = 0
-                    self.down_tracker[i] = (rate, since_up)
-                    relative_balance = rate*wallet.get_cached_balance()
-                    total_relative_balance += relative_balance
-                    relative_balances.append((wallet, relative_balance, rate))
-                highers: list[tuple[Wallet, float, float]] = []
-                lowers: list[tuple[Wallet, float, float]] = []
-                num_balances: int = len(relative_balances)+1
-                avg_balance: float = total_relative_balance / num_balances
-                for i, bal in enumerate(relative_balances):
-                    wallet, relative_balance, rate = bal
-                    if self.max_downs is not None and self.down_tracker[i][1] > self.max_downs:
-                        logger.warning(f"Ticker {wallet.get_ticker()} has been down for {self.down_tracker[i][1]} trade-cycles, skipping...")
-                        pass
-                    diff_balance: float = relative_balance - avg_balance
-                    if diff_balance > 0:
-                        highers.append((wallet, diff_balance, rate))
-                    elif diff_balance < 0:
-                        lowers.append((wallet, diff_balance, rate))
+                snapshot = self.get_exchange().get_rate_snapshot(self.get_portfolio().get_tickers(), main_wallet.get_ticker())
+                rates = [self.get_exchange().get_rate(wallet.get_ticker(), main_wallet.get_ticker(), snapshot) for wallet in wallets]
+                candidates = self.get_rebalance_candidates(wallets, rates)
+                fees = self.get_exchange().get_fees(self.get_fee_requests(candidates, main_wallet), snapshot)
+                trades = self.get_trades(candidates, fees, main_wallet)
+                if self.get_routing():
+                    rates_by_wallet = {id(wallet): rate for wallet, rate in zip(wallets, rates) if rate}
+                    trade_fees = self.get_trade_fees(candidates, fees, trades)
+                    matches = self.get_route_matches(trades, rates_by_wallet)
+                    route_fees = self.get_exchange().get_fees(self.get_route_fee_requests(trades, matches, rates_by_wallet), snapshot)
+                    trades = self.get_routed_trades(trades, trade_fees, matches, route_fees, rates_by_wallet)
+                for stage in (0, 1):
+                    batch = [(amount, from_wallet, to_wallet) for trade_stage, amount, from_wallet, to_wallet in trades if trade_stage == stage]
+                    if batch:
+                        self.record_trades(batch, self.get_exchange().trade_many(batch))
+        self.last_trades = len(trades)
+        self.save_state()
+        if started is not None:
+            metrics.end_cycle(perf_counter()-started, len(trades))
+
+
+class AsyncTraderOne(TraderOneBase, AsyncTrader):
+    """
+    TraderOne over an AsyncExchange and AsyncWallets.
+    Each cycle fetches every balance and the rate snapshot at once, then submits each stage's trades as one batch.
+    """
+    #@override
+    async def do_trade_cycle(self) -> None:
+        started = perf_counter() if metrics.enabled else None
+        trades: list[tuple[int, float, Wallet, Wallet]] = []
+        main_wallet = self.get_main_wallet()
+        if main_wallet is not None:
+            wallets = self.get_secondary_wallets()
+            if wallets is not None:
+                exchange: AsyncExchange = self.get_exchange()
+                _, snapshot = await asyncio.gather(self.refresh_wallets_cached_balances(), exchange.get_rate_snapshot(self.get_portfolio().get_tickers(), main_wallet.get_ticker()))
+                rates = await asyncio.gather(*(exchange.get_rate(wallet.get_ticker(), main_wallet.get_ticker(), snapshot) for wallet in wallets))
+                candidates = self.get_rebalance_candidates(wallets, rates)
+                fees = await exchange.get_fees(self.get_fee_requests(candidates, main_wallet), snapshot)
+                trades = self.get_trades(candidates, fees, main_wallet)
+                if self.get_routing():
+                    rates_by_wallet = {id(wallet): rate for wallet, rate in zip(wallets, rates) if rate}
+                    trade_fees = self.get_trade_fees(candidates, fees, trades)
+                    matches = self.get_route_matches(trades, rates_by_wallet)
+                    route_fees = await exchange.get_fees(self.get_route_fee_requests(trades, matches, rates_by_wallet), snapshot)
+                    trades = self.get_routed_trades(trades, trade_fees, matches, route_fees, rates_by_wallet)
                 for stage in (0, 1):
-                    for wallet, diff_balance, rate in highers if stage == 0 else lowers:
-                        trade_balance = diff_balance*rate
-                        if wallet.get_cached_balance() > 0 and wallet.get_cached_balance() > abs(trade_balance):
-                            if (abs(trade_balance)+self.get_exchange().get_fee(trade_balance, main_wallet if stage else wallet, wallet if stage else main_wallet)) / wallet.get_cached_balance() >= self.get_min_proportional_diff():
-                                if stage == 0:
-                                    if trade_balance > 0:
-                                        self.get_exchange().trade(trade_balance, from_wallet=wallet, to_wallet=main_wallet)
-                                else:
-                                    if trade_balance < 0:
-                                        self.get_exchange().trade(abs(trade_balance), from_wallet=main_wallet, to_wallet=wallet)
+                    batch = [(amount, from_wallet, to_wallet) for trade_stage, amount, from_wallet, to_wallet in trades if trade_stage == stage]
+                    if batch:
+                        self.record_trades(batch, await exchange.trade_many(batch))
+        self.last_trades = len(trades)
+        self.save_state()
+        if started is not None:
+            metrics.end_cycle(perf_counter()-started, len(trades))
 
 
 
@@ -292,39 +2565,80 @@ class Tests():
     class Test1():
         @staticmethod
         def test1_main(args: dict, cycles: int = 50) -> int:
-            exchange: Tests.Test1.Test1Exchange = Tests.Test1.Test1Exchange()
-            trader: TraderOne = TraderOne(exchange, [Tests.Test1.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()], min_cycle_delay=10)
+            """
+            Logs every cycle's shuffles and summary in LogMode.CYCLE (the default), only the balances before and after in LogMode.SUMMARY, and just the throughput in LogMode.OFF.
+            """
+            log_mode: str = args.get(ConfigKeys.LOG_MODE) or LogMode.CYCLE
+            exchange: Tests.Test1.Test1Exchange = Tests.Test1.Test1Exchange(seed=args.get(ConfigKeys.SEED), log_shuffles=log_mode == LogMode.CYCLE)
+            trader: TraderOne = TraderOne(wrap_exchange(exchange, args), [Tests.Test1.Test1Wallet(ticker, ticker, ticker) for ticker in exchange.get_supported_tickers()], **{ConfigKeys.MIN_CYCLE_DELAY: 10, **get_trader_kwargs(args)})
+            attach_state_store(trader, args)
+            def get_value(balances: list[float]) -> float:
+                return sum([balance*exchange.tickers[trader.get_main_wallet().get_ticker()] for balance in balances])
             def printstat():
-                logger.info([f"[Ticker: {wallet.get_ticker()}, Address: {wallet.get_addr()}, Auth: {wallet.get_auth()}, LiveBalance: {wallet.get_live_balance()}, CachedBalance: {wallet.get_cached_balance()}, IsRefreshingCachedBalance: {wallet.get_is_refreshing_cached_balance()}]" for wallet in trader.get_wallets() if wallet is not None])
-                logger.info(f"Total portfolio value change relative to start: {sum([wallet.get_live_balance()*exchange.tickers[trader.get_main_wallet().get_ticker()] for wallet in trader.get_wallets() if wallet is not None])}")
-            printstat()
+                balances = [(wallet, wallet.get_live_balance()) for wallet in trader.get_wallets() if wallet is not None]
+                logger.info([f"[Ticker: {wallet.get_ticker()}, Address: {wallet.get_addr()}, Auth: {wallet.get_auth()}, LiveBalance: {balance}, CachedBalance: {wallet.get_cached_balance()}, IsRefreshingCachedBalance: {wallet.get_is_refreshing_cached_balance()}]" for wallet, balance in balances])
+                logger.info("Total portfolio value change relative to start: %s", get_value([balance for _, balance in balances]))
             def run(n: int):
                 logger.info(get_div_str(False, False))
-                logger.info(f"Starting Cycle no. {n}")
+                logger.info("Starting Cycle no. %d", n, cycle=n)
                 logger.info(get_div_str(False, True))
                 exchange.shuffle_tickers()
                 logger.info(get_div_str(True, True))
                 #trader.tick()
+                started = perf_counter()
                 trader.do_trade_cycle()
-                printstat()
-                logger.info(f"Finished Cycle no. {n}")
+                log_cycle_summary(trader, n, perf_counter()-started, value=get_value([wallet.get_live_balance() for wallet in trader.get_wallets() if wallet is not None]))
                 logger.info(get_div_str(True, False))
                 #sleep(0.1)
-            if cycles > -1:
-                for n in range(cycles):
-                    run(n)
-            else:
-                n = 0
-                while True:
-                    try:
-                        run(n)
-                        n += 1
-                    except KeyboardInterrupt:
-                        print("Keyboard interrupt received, exiting...")
-                        break
+            def run_quiet(n: int):
+                exchange.shuffle_tickers()
+                trader.do_trade_cycle()
+            if log_mode != LogMode.OFF:
+                printstat()
+            level = logger.logger.level
+            if log_mode != LogMode.CYCLE:
+                logger.logger.setLevel("ERROR")
+            cycle = run if log_mode == LogMode.CYCLE else run_quiet
+            n = 0
+            started = monotonic()
+            try:
+                while cycles < 0 or n < cycles:
+                    cycle(n)
+                    n += 1
+            except KeyboardInterrupt:
+                print("Keyboard interrupt received, exiting...")
+            finally:
+                elapsed = monotonic()-started
+                logger.logger.setLevel(level)
+            if log_mode != LogMode.OFF:
+                printstat()
+            logger.info("Ran %d cycles in %.3fs (%.1f cycles/s)", n, elapsed, n/elapsed if elapsed > 0 else 0, cycles=n, seconds=elapsed)
             return 0
 
+        class Test1Trader(TraderOne):
+            """
+            Shuffles its test exchange's tickers before every cycle, so it can be scheduled like a live trader.
+            The exchange it trades through may be that test exchange wrapped.
+            """
+            def __init__(self, test_exchange: "Tests.Test1.Test1Exchange", exchange: Exchange, wallets: list[Wallet], **kwargs):
+                super().__init__(exchange, wallets, **kwargs)
+                self.test_exchange: Tests.Test1.Test1Exchange = test_exchange
+
+            #@override
+            def do_trade_cycle(self) -> None:
+                self.test_exchange.shuffle_tickers()
+                super().do_trade_cycle()
+
+        @staticmethod
+        def build_trader(spec: dict) -> TraderBase:
+            exchange = Tests.Test1.Test1Exchange(seed=spec.get(ConfigKeys.SEED), log_shuffles=(spec.get(ConfigKeys.LOG_MODE) or LogMode.CYCLE) == LogMode.CYCLE)
+            tickers = spec.get(ConfigKeys.TICKERS) or exchange.get_supported_tickers()
+            return Tests.Test1.Test1Trader(exchange, wrap_exchange(exchange, spec), [Tests.Test1.Test1Wallet(ticker, ticker, ticker) for ticker in tickers], **{ConfigKeys.MIN_CYCLE_DELAY: 10, **get_trader_kwargs(spec)})
+
         class Test1Wallet(Wallet):
+            __slots__ = ("balance",)
+            refresh_inline: bool = True
+
             def __init__(self, ticker: str, addr: str, auth: str, start_balance: float = 1):
                 super().__init__(ticker, addr, auth)
                 self.balance: float = start_balance
@@ -344,13 +2658,49 @@ class Tests():
                 return super().send_to(rec_addr, amount, meta)
 
         class Test1Exchange(Exchange):
-            def __init__(self, name: str = "test", num_tickers: int = 6, max_shuffle: int = 3):
+            """
+            Shuffles every ticker by a random integer step each cycle, drawn from a generator seeded with seed (unseeded if None), so seeded runs repeat exactly.
+            With NumPy the shuffles are precomputed chunk_size cycles at a time as a vectorized price path; a seed gives a different (but still fixed) path without it.
+            """
+            def __init__(self, name: str = "test", num_tickers: int = 6, max_shuffle: int = 3, seed: int | None = None, chunk_size: int = 4096, log_shuffles: bool = True):
                 super().__init__(name)
                 self.tickers: dict[str, float] = {}
                 for n in range(num_tickers):
                     self.tickers[str(n)] = n
                 self.max_shuffle: int = max_shuffle
                 self.fee_factor = 0.05
+                self.feeds: list[PriceFeed] = []
+                self.rng: Random = Random(seed)
+                self.np_rng = np.random.default_rng(seed) if np is not None else None
+                self.chunk_size: int = chunk_size
+                self.log_shuffles: bool = log_shuffles
+                self.path: tuple[list, list, list] = ([], [], [])
+                self.path_index: int = 0
+
+            def _extend_path_(self) -> None:
+                """
+                Precomputes the next chunk of (fee factor, steps, prices) rows. The clamp to 1 is the Lindley recursion y = max(0, y+step) on y = price-1,
+                whose closed form y_t = max(y_0+S_t, S_t-min(S_1..S_t)) over the cumulative steps S needs no loop over cycles.
+                """
+                steps = self.np_rng.integers(-self.max_shuffle, self.max_shuffle+1, size=(self.chunk_size, len(self.tickers)))
+                fee_factors = self.np_rng.integers(1, 11, size=self.chunk_size)/100
+                cumulative = np.cumsum(steps, axis=0)
+                start = np.array(list(self.tickers.values()))-1
+                prices = np.maximum(start+cumulative, cumulative-np.minimum.accumulate(cumulative, axis=0))+1
+                self.path = (fee_factors.tolist(), steps.tolist(), prices.tolist())
+                self.path_index = 0
+
+            def _next_shuffle_(self) -> tuple[float, list[int], list[float]]:
+                if self.np_rng is not None:
+                    if self.path_index >= len(self.path[0]):
+                        self._extend_path_()
+                    i = self.path_index
+                    self.path_index += 1
+                    return self.path[0][i], self.path[1][i], self.path[2][i]
+                fee_factor = self.rng.randint(1, 10)/100
+                steps = [self.rng.randint(-(self.max_shuffle), self.max_shuffle) for _ in self.tickers]
+                prices = [price+n if price+n > 0 else 1 for price, n in zip(self.tickers.values(), steps)]
+                return fee_factor, steps, prices
 
             #@override
             def get_supported_tickers(self) -> list[str]:
@@ -360,6 +2710,16 @@ class Tests():
             def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
                 return self.tickers[to_ticker]/self.tickers[from_ticker]
 
+            #@override
+            def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> PriceFeed:
+                """
+                Pushed on every shuffle rather than polled.
+                """
+                feed = PriceFeed(self, tickers, reference)
+                feed.refresh()
+                self.feeds.append(feed)
+                return feed
+
             #@override
             def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
                 transaction = from_wallet.send_to("", amount, None)
@@ -368,27 +2728,477 @@ class Tests():
                 return super().trade(amount, from_wallet, to_wallet)
 
             #@override
-            def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> float:
-                return self.get_exchange_rate(from_wallet.get_ticker(), to_wallet.get_ticker())*self.fee_factor
+            def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+                return self.get_rate(from_wallet.get_ticker(), to_wallet.get_ticker(), snapshot)*self.fee_factor
 
             def shuffle_tickers(self):
-                self.fee_factor = randint(1, 10)/100
-                for ticker in self.tickers.keys():
-                    n = randint(-(self.max_shuffle), self.max_shuffle)
-                    #n = -0.001 # To validate that down-stopping works
-                    if n != 0:
-                        self.tickers[ticker] += n
-                    if self.tickers[ticker] <= 0:
-                        self.tickers[ticker] = 1
-                    logger.info(f"Shuffled ticker: {ticker} by {n} to {self.tickers[ticker]}")
+                self.fee_factor, steps, prices = self._next_shuffle_()
+                for ticker, n, price in zip(list(self.tickers), steps, prices):
+                    self.tickers[ticker] = price
+                    if self.log_shuffles:
+                        logger.info("Shuffled ticker: %s by %s to %s", ticker, n, self.tickers[ticker])
+                for feed in self.feeds:
+                    feed.refresh()
+
+
+class SimWallet(Wallet):
+    __slots__ = ("balance",)
+    refresh_inline: bool = True
+
+    def __init__(self, ticker: str, start_balance: float = 0):
+        super().__init__(ticker, ticker, None)
+        self.balance: float = start_balance
+        self.cached_balance = start_balance
+
+    #@override
+    def get_live_balance(self) -> float | None:
+        return self.balance
+
+    #@override
+    def send_to(self, rec_addr: str, amount: float | None, meta: dict | None) -> dict | None:
+        if amount is not None:
+            if amount > self.balance:
+                return {Transaction.TAG_COMPLETED: False}
+            self.balance -= amount
+        return super().send_to(rec_addr, amount, meta)
+
+
+class ReplayExchange(Exchange):
+    """
+    Replays recorded prices (one row per tick, one column per ticker, all in a common unit such as USD) and settles trades against SimWallets.
+    Rates are quoted as units of to_ticker received per from_ticker, like a real swap.
+    """
+    def __init__(self, tickers: list[str], prices, fee_rate: float = 0.003, name: str = "replay"):
+        super().__init__(name)
+        self.tickers: list[str] = tickers
+        self.indices: dict[str, int] = {ticker: i for i, ticker in enumerate(tickers)}
+        self.prices = prices
+        self.fee_rate: float = fee_rate
+        self.tick: int = 0
+        self.row: list[float] = prices[0].tolist()
+        self.trades: int = 0
+        self.fees: float = 0
+        self.feeds: list[PriceFeed] = []
+
+    def get_tick(self) -> int:
+        return self.tick
+
+    def set_tick(self, tick: int) -> None:
+        self.tick = tick
+        self.row = self.prices[tick].tolist()
+        for feed in self.feeds:
+            feed.refresh()
+
+    def get_price(self, ticker: str) -> float:
+        return self.row[self.indices[ticker]]
+
+    def get_total_trades(self) -> int:
+        return self.trades
+
+    def get_total_fees(self) -> float:
+        """
+        In the price unit.
+        """
+        return self.fees
+
+    #@override
+    def get_supported_tickers(self) -> list[str]:
+        return list(self.tickers)
+
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        return self.get_price(from_ticker)/self.get_price(to_ticker)
+
+    #@override
+    def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> PriceFeed:
+        """
+        Replays each tick into the feed as set_tick moves to it, so the feed is never stale.
+        """
+        feed = PriceFeed(self, tickers, reference)
+        feed.refresh()
+        self.feeds.append(feed)
+        return feed
+
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> RateSnapshot:
+        quote_price = self.get_price(quote)
+        return RateSnapshot(quote, {ticker: self.row[self.indices[ticker]]/quote_price for ticker in tickers})
+
+    #@override
+    def get_fee(self, amount: float, from_wallet: Wallet, to_wallet: Wallet, snapshot: RateSnapshot | None = None) -> float:
+        return abs(amount)*self.get_rate(from_wallet.get_ticker(), to_wallet.get_ticker(), snapshot)*self.fee_rate
+
+    #@override
+    def trade(self, amount: float, from_wallet: Wallet, to_wallet: Wallet) -> dict | None:
+        transaction = from_wallet.send_to("", amount, None)
+        if transaction is not None and transaction.get(Transaction.TAG_COMPLETED, False):
+            fee = self.get_fee(amount, from_wallet, to_wallet)
+            to_wallet.balance += amount*self.get_exchange_rate(from_wallet.get_ticker(), to_wallet.get_ticker())-fee
+            self.trades += 1
+            self.fees += fee*self.get_price(to_wallet.get_ticker())
+        return transaction
+
+
+def load_price_history(path: str) -> tuple[list[str], object, object]:
+    """
+    Loads a CSV or Parquet price history with one column per ticker, plus an optional leading "timestamp" column in seconds.
+    Returns (tickers, prices, timestamps), where timestamps is None if there is no such column.
+    """
+    if path.endswith(".parquet"):
+        import pandas
+        frame = pandas.read_parquet(path)
+        columns = [str(column) for column in frame.columns]
+        data = frame.to_numpy(dtype=float) if columns[0] != "timestamp" else None
+        if data is None:
+            timestamps = frame[frame.columns[0]]
+            timestamps = timestamps.astype("int64").to_numpy()/1e9 if str(timestamps.dtype).startswith("datetime") else timestamps.to_numpy(dtype=float)
+            return columns[1:], frame[frame.columns[1:]].to_numpy(dtype=float), timestamps
+        return columns, data, None
+    with open(path) as file:
+        columns = [column.strip() for column in file.readline().split(",")]
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    if columns[0] == "timestamp":
+        return columns[1:], data[:, 1:], data[:, 0]
+    return columns, data, None
+
+
+class Backtest():
+    """
+    Runs TraderOne over a ReplayExchange with no sleeps and no per-cycle logging.
+    A cycle runs on the first tick at least the trader's min_cycle_delay after the previous one (measured in timestamps, or in ticks without them); ticks in between are skipped, not replayed.
+    """
+    def __init__(self, tickers: list[str], prices, timestamps=None, fee_rate: float = 0.003, start_value: float = 1, quiet: bool = True, **trader_kwargs):
+        self.exchange: ReplayExchange = ReplayExchange(tickers, prices, fee_rate)
+        self.wallets: list[SimWallet] = [SimWallet(ticker, start_value/price) for ticker, price in zip(tickers, prices[0].tolist())]
+        if timestamps is None and ConfigKeys.MIN_CYCLE_DELAY not in trader_kwargs:
+            trader_kwargs[ConfigKeys.MIN_CYCLE_DELAY] = 0
+        self.trader: TraderOne = TraderOne(self.exchange, self.wallets, **trader_kwargs)
+        self.timestamps = np.arange(len(prices), dtype=float) if timestamps is None else np.asarray(timestamps, dtype=float)
+        self.quiet: bool = quiet
+
+    def get_trader(self) -> TraderOne:
+        return self.trader
+
+    def get_exchange(self) -> ReplayExchange:
+        return self.exchange
+
+    def get_value(self, balances: list[float]) -> float:
+        return sum(balance*self.exchange.get_price(wallet.get_ticker()) for wallet, balance in zip(self.wallets, balances))
+
+    def run(self) -> dict:
+        start_balances = [wallet.balance for wallet in self.wallets]
+        start_value = self.get_value(start_balances)
+        level = logger.logger.level
+        if self.quiet:
+            logger.logger.setLevel("ERROR")
+        started = monotonic()
+        cycles = 0
+        try:
+            tick = 0
+            num_ticks = len(self.timestamps)
+            while tick < num_ticks:
+                self.exchange.set_tick(tick)
+                self.trader.do_trade_cycle()
+                cycles += 1
+                delay = self.trader.get_next_cycle_delay()
+                tick = max(tick+1, int(np.searchsorted(self.timestamps, self.timestamps[tick]+delay, side="left")))
+        finally:
+            logger.logger.setLevel(level)
+        elapsed = monotonic()-started
+        self.exchange.set_tick(len(self.timestamps)-1)
+        end_value = self.get_value([wallet.balance for wallet in self.wallets])
+        hold_value = self.get_value(start_balances)
+        return {
+                "ticks": len(self.timestamps),
+                "cycles": cycles,
+                "trades": self.exchange.get_total_trades(),
+                "fees": self.exchange.get_total_fees(),
+                "start_value": start_value,
+                "end_value": end_value,
+                "hold_value": hold_value,
+                "pnl": end_value-start_value,
+                "pnl_vs_hold": end_value-hold_value,
+                "seconds": elapsed,
+                "ticks_per_second": len(self.timestamps)/elapsed if elapsed else 0,
+                }
+
+
+def generate_price_path(seed: int | None, num_ticks: int, num_tickers: int = 6, volatility: float = 0.01) -> tuple[list[str], object]:
+    """
+    Seeded geometric random walk, for sweeps and simulations without recorded prices.
+    """
+    rng = np.random.default_rng(seed)
+    start_prices = rng.uniform(1, 100, num_tickers)
+    prices = start_prices*np.exp(np.cumsum(rng.normal(0, volatility, (num_ticks, num_tickers)), axis=0))
+    return [str(n) for n in range(num_tickers)], prices
+
+
+SWEEP_KEYS: tuple[str, ...] = (ConfigKeys.FEE_RATE, ConfigKeys.MIN_CYCLE_DELAY, ConfigKeys.MIN_PROPORTIONAL_DIFF, ConfigKeys.MAX_DOWNS, ConfigKeys.MAIN_WALLET_INDEX, ConfigKeys.ROUTING)
+
+def get_sweep_params(grid: dict[str, list]) -> list[dict]:
+    unknown = [key for key in grid if key not in SWEEP_KEYS]
+    if unknown:
+        raise ValueError(f"Cannot sweep over {', '.join(unknown)}; sweepable parameters are {', '.join(SWEEP_KEYS)}")
+    return [dict(zip(grid.keys(), values)) for values in product(*grid.values())]
+
+
+def _share_array_(array) -> tuple[SharedMemory, tuple[str, tuple[int, ...], str]]:
+    shm = SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+_sweep_data_: dict = {}
+
+def _sweep_worker_init_(tickers: list[str], prices_spec: tuple, timestamps_spec: tuple | None) -> None:
+    """
+    Attaches each worker to the shared price buffers once, instead of pickling them into every task.
+    """
+    def attach(spec: tuple):
+        shm = SharedMemory(name=spec[0])
+        _sweep_data_.setdefault("shms", []).append(shm)
+        return np.ndarray(spec[1], dtype=spec[2], buffer=shm.buf)
+    _sweep_data_["tickers"] = tickers
+    _sweep_data_["prices"] = attach(prices_spec)
+    _sweep_data_["timestamps"] = None if timestamps_spec is None else attach(timestamps_spec)
+
+def _sweep_worker_run_(params: dict) -> dict:
+    trader_kwargs = dict(params)
+    fee_rate = trader_kwargs.pop(ConfigKeys.FEE_RATE, 0.003)
+    result = Backtest(_sweep_data_["tickers"], _sweep_data_["prices"], _sweep_data_["timestamps"], fee_rate=fee_rate, **trader_kwargs).run()
+    return {**params, **result}
+
+def run_sweep(tickers: list[str], prices, timestamps, grid: dict[str, list], max_workers: int | None = None) -> list[dict]:
+    """
+    Backtests every combination in grid on a process pool (one worker per core by default), sorted by PnL.
+    """
+    shms: list[SharedMemory] = []
+    try:
+        shm, prices_spec = _share_array_(np.ascontiguousarray(prices, dtype=float))
+        shms.append(shm)
+        timestamps_spec = None
+        if timestamps is not None:
+            shm, timestamps_spec = _share_array_(np.ascontiguousarray(timestamps, dtype=float))
+            shms.append(shm)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_sweep_worker_init_, initargs=(tickers, prices_spec, timestamps_spec)) as pool:
+            results = list(pool.map(_sweep_worker_run_, get_sweep_params(grid)))
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+    return sorted(results, key=lambda result: result["pnl"], reverse=True)
+
+
+def format_table(rows: list[dict]) -> str:
+    """
+    Comma-separated, with a header row.
+    """
+    if not rows:
+        return ""
+    columns = list(rows[0].keys())
+    return "\n".join([",".join(columns), *(",".join(str(row.get(column)) for column in columns) for row in rows)])
+
+
+def get_trader_kwargs(args: dict) -> dict:
+    return {key: args[key] for key in (ConfigKeys.MIN_CYCLE_DELAY, ConfigKeys.MIN_PROPORTIONAL_DIFF, ConfigKeys.MAX_DOWNS, ConfigKeys.MAIN_WALLET_INDEX, ConfigKeys.ROUTING, ConfigKeys.INCREMENTAL, ConfigKeys.BALANCE_MAX_AGE) if args.get(key) is not None}
+
+
+_exchange_modules: dict = {}
+_exchange_plugins: dict = {}
+_trader_plugins: dict[str, tuple[type, type | None]] = {}
+
+def load_exchange_module(name: str):
+    """
+    Imports the traderone_<name> plugin module that sits next to this one.
+    """
+    if name not in _exchange_modules:
+        module_name = f"traderone_{name}"
+        try:
+            _exchange_modules[name] = import_module(module_name)
+        except ModuleNotFoundError as e:
+            if e.name != module_name:
+                raise
+            raise ValueError(f"Unknown exchange {name}: there is no {module_name}.py next to {os_path.abspath(__file__)}") from e
+    return _exchange_modules[name]
+
+
+def register_exchange(name: str, loader) -> None:
+    """
+    Adds an exchange to the registry. loader() returns its plugin and is only called once the exchange is chosen, so choosing one exchange never imports another's SDK.
+    A plugin defines build_trader(spec), and may define prep_parser(parser) to add its own flags and run_main(args) (which may be async) to trade live.
+    """
+    _exchange_plugins[name] = loader
+
+
+def get_exchange_names() -> list[str]:
+    return list(_exchange_plugins.keys())
+
+
+def get_exchange_plugin(name: str):
+    """
+    The registered plugin called name, or failing that the traderone_<name>.py module next to this one.
+    """
+    loader = _exchange_plugins.get(name)
+    return loader() if loader is not None else load_exchange_module(name)
+
+
+def register_trader(name: str, trader: type, async_trader: type | None = None) -> None:
+    """
+    Adds a trader to the registry; async_trader is the form run on async exchanges, if it has one.
+    """
+    _trader_plugins[name] = (trader, async_trader)
+
+
+def get_trader_names() -> list[str]:
+    return list(_trader_plugins.keys())
+
+
+def get_trader_class(spec: dict, is_async: bool = False) -> type:
+    """
+    The trader spec selects (TraderOne by default), in its async form for async exchanges.
+    """
+    name = spec.get(ConfigKeys.TRADER) or "traderone"
+    if name not in _trader_plugins:
+        raise ValueError(f"Unknown trader {name}; registered traders are {', '.join(get_trader_names())}")
+    trader, async_trader = _trader_plugins[name]
+    if is_async and async_trader is None:
+        raise ValueError(f"Trader {name} cannot run on an async exchange")
+    return async_trader if is_async else trader
+
+
+register_exchange("test", lambda: Tests.Test1)
+register_exchange("uniswap", lambda: load_exchange_module("uniswap"))
+register_exchange("solana", lambda: load_exchange_module("solana"))
+register_trader("traderone", TraderOne, AsyncTraderOne)
+
+
+def build_trader(spec: dict) -> TraderBase:
+    """
+    Builds the trader described by spec with the build_trader(spec) of its exchange's plugin.
+    """
+    return attach_state_store(get_exchange_plugin(spec[ConfigKeys.EXCHANGE]).build_trader(spec), spec)
+
+
+def attach_state_store(trader: TraderBase, args: dict) -> TraderBase:
+    """
+    Restores and persists trader under args' name (or "default") in the state database args selects, if any.
+    """
+    if args.get(ConfigKeys.STATE):
+        trader.set_state_store(get_state_store(args[ConfigKeys.STATE]), args.get(ConfigKeys.NAME) or "default")
+    return trader
+
+
+def wrap_exchange(exchange: Exchange | AsyncExchange, args: dict) -> Exchange | AsyncExchange:
+    """
+    Applies the wrappers selected in args; instrumentation goes innermost so it times what actually reaches the exchange, and streaming outermost so the feed is read before anything else.
+    """
+    if args.get(ConfigKeys.METRICS):
+        metrics.enable(args[ConfigKeys.METRICS])
+    if metrics.enabled:
+        exchange = AsyncInstrumentedExchange(exchange) if isinstance(exchange, AsyncExchange) else InstrumentedExchange(exchange)
+    cache_ttl = args.get(ConfigKeys.CACHE_TTL) or 0
+    if cache_ttl > 0:
+        exchange = AsyncCachingExchange(exchange, ttl=cache_ttl) if isinstance(exchange, AsyncExchange) else CachingExchange(exchange, ttl=cache_ttl)
+    interval = args.get(ConfigKeys.STREAM) or 0
+    if interval > 0:
+        stream_kwargs = {"interval": interval, "max_staleness": args.get(ConfigKeys.MAX_STALENESS) or max(10, 3*interval), "move_threshold": args.get(ConfigKeys.MOVE_THRESHOLD)}
+        exchange = AsyncStreamingExchange(exchange, **stream_kwargs) if isinstance(exchange, AsyncExchange) else StreamingExchange(exchange, **stream_kwargs)
+    return exchange
 
 
 def test_main(args: dict) -> int:
     return Tests.Test1.test1_main(args, cycles=args.get(ConfigKeys.CYCLES, -1))
 
+def backtest_main(args: dict) -> int:
+    if np is None:
+        logger.error("Backtesting needs NumPy installed! Exiting with error code 1...")
+        return 1
+    tickers, prices, timestamps = load_price_history(args[ConfigKeys.BACKTEST])
+    fee_rate = args.get(ConfigKeys.FEE_RATE)
+    result = Backtest(tickers, prices, timestamps, fee_rate=0.003 if fee_rate is None else fee_rate, **get_trader_kwargs(args)).run()
+    logger.info(f"Backtest results: {result}")
+    return 0
+
+def sweep_main(args: dict) -> int:
+    if np is None:
+        logger.error("Sweeping needs NumPy installed! Exiting with error code 1...")
+        return 1
+    grid_arg: str = args[ConfigKeys.SWEEP]
+    if os_path.isfile(grid_arg):
+        with open(grid_arg) as file:
+            grid_arg = file.read()
+    grid: dict[str, list] = loads(grid_arg)
+    if args.get(ConfigKeys.BACKTEST):
+        tickers, prices, timestamps = load_price_history(args[ConfigKeys.BACKTEST])
+    else:
+        tickers, prices = generate_price_path(args.get(ConfigKeys.SEED), args.get(ConfigKeys.TICKS) or 100000)
+        timestamps = None
+    fixed = {key: args[key] for key in SWEEP_KEYS if args.get(key) is not None and key not in grid}
+    table = format_table(run_sweep(tickers, prices, timestamps, {**{key: [value] for key, value in fixed.items()}, **grid}, args.get(ConfigKeys.WORKERS)))
+    if args.get(ConfigKeys.SWEEP_OUTPUT):
+        with open(args[ConfigKeys.SWEEP_OUTPUT], "w") as file:
+            file.write(table+"\n")
+    logger.info(f"Sweep results:\n{table}")
+    return 0
+
+def multi_main(args: dict) -> int:
+    with open(args[ConfigKeys.STRATEGIES]) as file:
+        specs: list[dict] = loads(file.read())
+    defaults = {key: value for key, value in args.items() if value is not None}
+    traders: dict[str, TraderBase] = {}
+    for i, spec in enumerate(specs):
+        spec = {**defaults, **spec}
+        spec[ConfigKeys.NAME] = spec.get(ConfigKeys.NAME) or f"{spec[ConfigKeys.EXCHANGE]}-{i}"
+        traders[spec[ConfigKeys.NAME]] = build_trader(spec)
+    return MultiTraderRunner(traders).main_loop(args.get(ConfigKeys.CYCLES, -1))
+
+def get_shard_specs(args: dict, tickers: list[str], shards: int) -> tuple[dict, list[dict]]:
+    """
+    Splits the secondary tickers round robin into shards groups, and returns the coordinator's spec followed by one spec per shard.
+    The first shard trades around the main wallet, and every other shard around its first ticker; the coordinator trades between those hubs, every --hub_interval seconds (or min_cycle_delay).
+    """
+    main_index = args.get(ConfigKeys.MAIN_WALLET_INDEX) or 0
+    main = tickers[main_index]
+    others = [ticker for i, ticker in enumerate(tickers) if i != main_index]
+    shards = min(shards, max(1, len(others)//2)) # Every hub but the main wallet needs another wallet in its shard to trade with
+    groups = [others[k::shards] for k in range(shards)]
+    name = args.get(ConfigKeys.NAME) or "default"
+    hub_spec = {**args, ConfigKeys.TICKERS: [main, *(group[0] for group in groups[1:])], ConfigKeys.MAIN_WALLET_INDEX: 0, ConfigKeys.NAME: f"{name}-hubs"}
+    if args.get(ConfigKeys.HUB_INTERVAL) is not None:
+        hub_spec[ConfigKeys.MIN_CYCLE_DELAY] = args[ConfigKeys.HUB_INTERVAL]
+    shard_specs = [{**args, ConfigKeys.TICKERS: [main, *group] if k == 0 else group, ConfigKeys.MAIN_WALLET_INDEX: 0, ConfigKeys.NAME: f"{name}-shard-{k}"} for k, group in enumerate(groups)]
+    return hub_spec, shard_specs
+
+def shard_main(args: dict) -> int:
+    name = args.get(ConfigKeys.EXCHANGE)
+    if not name:
+        logger.error(f"No exchange was chosen! Pick one with --{ConfigKeys.EXCHANGE} ({', '.join(get_exchange_names())}) to trade in shards. Exiting with error code 1...")
+        return 1
+    plugin = get_exchange_plugin(name)
+    if getattr(plugin, "ORDERED_NONCES", False):
+        logger.error(f"Exchange {name} sends every transaction from one address in nonce order, which shards in separate processes would race over; run it without --{ConfigKeys.SHARDS}. Exiting with error code 1...")
+        return 1
+    tickers = args.get(ConfigKeys.TICKERS) or [wallet.get_ticker() for wallet in plugin.build_trader(args).get_wallets()]
+    hub_spec, shard_specs = get_shard_specs(args, tickers, args[ConfigKeys.SHARDS])
+    if len(shard_specs) < 2:
+        return run_main(args)
+    return ShardedTraderRunner(hub_spec, shard_specs).main_loop()
+
 def run_main(args: dict) -> int:
-    logger.error("This is the base script; no live exchanges/wallets are defined here! You must run a script that extends this one to perform live trading. traderone-uniswap.py is provided as an example. Exiting with error code 1...")
-    return 1
+    """
+    Trades live on the exchange args selects, through its plugin's run_main if it has one.
+    """
+    name = args.get(ConfigKeys.EXCHANGE)
+    if not name:
+        logger.error(f"No exchange was chosen! Pick one with --{ConfigKeys.EXCHANGE} ({', '.join(get_exchange_names())}) to perform live trading. Exiting with error code 1...")
+        return 1
+    plugin = get_exchange_plugin(name)
+    if hasattr(plugin, "run_main"):
+        result = plugin.run_main(args)
+        return asyncio.run(result) if asyncio.iscoroutine(result) else result
+    trader = build_trader(args)
+    if isinstance(trader, AsyncTrader):
+        return asyncio.run(AsyncTraderRunner(trader).main_loop(args.get(ConfigKeys.CYCLES, -1)))
+    return TraderRunner(trader).main_loop(args.get(ConfigKeys.CYCLES, -1))
 
 
 
@@ -404,29 +3214,81 @@ def prep_parser(parser: ArgumentParser | None = None) -> ArgumentParser:
 
     parser.add_argument("-w", "--"+ConfigKeys.ADDRESS, help="Wallet address to use")
     parser.add_argument("-a", "--"+ConfigKeys.AUTH, help="Wallet authentication token to use (most likely a private key)")
-    parser.add_argument("-e", "--"+ConfigKeys.EXCHANGE, help="Name of exchane to use (CURRENTLY UNUSED)")
-    parser.add_argument("-t", "--"+ConfigKeys.TRADER, help="Name of trader to use (CURRENTLY UNUSED)")
+    parser.add_argument("-e", "--"+ConfigKeys.EXCHANGE, help=f"Exchange to trade on ({', '.join(get_exchange_names())}, or any traderone_<name>.py plugin module next to this script); its own flags are added once it is chosen")
+    parser.add_argument("-t", "--"+ConfigKeys.TRADER, help="Trader to run", choices=get_trader_names())
+    parser.add_argument("-p", "--"+ConfigKeys.PROVIDER, help="Provider URL to use")
     parser.add_argument("-T", "--"+ConfigKeys.TEST, help="Test mode", action="store_true")
     parser.add_argument("-c", "--"+ConfigKeys.CYCLES, help="Number of cycles to complete (unspecified or -1 for unlimited)", type=int, default=-1)
+    parser.add_argument("--"+ConfigKeys.CACHE_TTL, help="Seconds to cache exchange prices for (0 disables caching)", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.IMPACT_TTL, help="Seconds to trust the price-impact curves sampled while quoting fees for, where the exchange supports them (0 disables them)", type=float, default=0)
+    parser.add_argument("-B", "--"+ConfigKeys.BACKTEST, help="Backtest against a CSV or Parquet price history file")
+    parser.add_argument("--"+ConfigKeys.FEE_RATE, help="Proportional fee charged per backtest trade", type=float)
+    parser.add_argument("--"+ConfigKeys.MIN_CYCLE_DELAY, help="Minimum delay between trade cycles", type=float)
+    parser.add_argument("--"+ConfigKeys.MIN_PROPORTIONAL_DIFF, help="Minimum proportional balance difference worth trading", type=float)
+    parser.add_argument("--"+ConfigKeys.MAX_DOWNS, help="Maximum number of cycles a ticker may stay down", type=int)
+    parser.add_argument("--"+ConfigKeys.MAIN_WALLET_INDEX, help="Index of the main (hub) wallet", type=int)
+    parser.add_argument("--"+ConfigKeys.ROUTING, help="Swap directly between secondary wallets where that costs less than going through the main wallet", action="store_true", default=None)
+    parser.add_argument("--"+ConfigKeys.INCREMENTAL, help="Only re-evaluate wallets whose rate or balance changed, checking every wallet again once the average has moved by this proportion since the last full check", type=float)
+    parser.add_argument("-S", "--"+ConfigKeys.SWEEP, help="Backtest every combination of a JSON parameter grid (or a file containing one), e.g. '{\"min_proportional_diff\": [0.05, 0.1], \"max_downs\": [10, 100]}'; uses --backtest prices if given, otherwise a seeded random walk")
+    parser.add_argument("--"+ConfigKeys.SWEEP_OUTPUT, help="CSV file to write sweep results to")
+    parser.add_argument("--"+ConfigKeys.WORKERS, help="Number of sweep worker processes (defaults to one per core)", type=int)
+    parser.add_argument("--"+ConfigKeys.SEED, help="Random seed for generated prices and test mode", type=int)
+    parser.add_argument("--"+ConfigKeys.LOG_FORMAT, help="Write log records as plain text or as JSON lines", choices=[LogFormat.TEXT, LogFormat.JSON], default=LogFormat.TEXT)
+    parser.add_argument("--"+ConfigKeys.LOG_QUEUE, help="Write log records from a background thread, so cycles only pay for queueing them", action="store_true")
+    parser.add_argument("--"+ConfigKeys.LOG_MODE, help="How much test mode logs: every cycle, a summary, or only its throughput", choices=[LogMode.CYCLE, LogMode.SUMMARY, LogMode.OFF])
+    parser.add_argument("--"+ConfigKeys.TICKS, help="Number of generated price ticks", type=int)
+    parser.add_argument("-m", "--"+ConfigKeys.METRICS, help="Record hot-path timings and write them after every cycle to this file (.prom for Prometheus text, anything else for JSON lines)")
+    parser.add_argument("--"+ConfigKeys.STREAM, help="Subscribe to exchange prices, polling every this many seconds where the exchange has nothing to push (0 disables streaming)", type=float, default=0)
+    parser.add_argument("--"+ConfigKeys.MAX_STALENESS, help="Seconds after which a streamed price is too old and the cycle pulls instead (defaults to 10, or 3 poll intervals if longer)", type=float)
+    parser.add_argument("--"+ConfigKeys.MOVE_THRESHOLD, help="Start a cycle early when a streamed price moves by this proportion", type=float)
+    parser.add_argument("--"+ConfigKeys.STATE, help="SQLite file to keep trader state and a trade journal in, restored on startup")
+    parser.add_argument("--"+ConfigKeys.BALANCE_MAX_AGE, help="Seconds a fetched balance is trusted for if its wallet has not traded since, e.g. after a restart (0 always refreshes)", type=float)
+    parser.add_argument("--"+ConfigKeys.SHARDS, help="Split the wallets into this many shards, each trading around its own hub wallet in its own worker process, with this process rebalancing the hubs against each other", type=int)
+    parser.add_argument("--"+ConfigKeys.HUB_INTERVAL, help="Seconds between rebalancing the shards' hub wallets (defaults to --min_cycle_delay)", type=float)
+    parser.add_argument("-s", "--"+ConfigKeys.STRATEGIES, help="JSON file listing traders to run together, e.g. [{\"name\": \"a\", \"exchange\": \"uniswap\", \"provider\": \"...\", \"min_proportional_diff\": 0.05}]; other flags are used as defaults")
 
     return parser
 
 
-def parse_args(args: list[str], parser: ArgumentParser | None = None) -> dict:
+def parse_args(args: list[str], parser: ArgumentParser | None = None, exchange: str | None = None) -> dict:
+    """
+    Adds the flags of the chosen exchange (exchange, unless --exchange says otherwise) before parsing.
+    Its plugin is not loaded in test mode, nor for --help unless the exchange was chosen on the command line, so neither pays for its SDK.
+    """
     if parser is None:
         parser = prep_parser()
 
+    chooser = ArgumentParser(add_help=False)
+    chooser.add_argument("-e", "--"+ConfigKeys.EXCHANGE)
+    chooser.add_argument("-T", "--"+ConfigKeys.TEST, action="store_true")
+    chooser.add_argument("-h", "--help", action="store_true")
+    chosen = vars(chooser.parse_known_args(args=args[1:])[0])
+    name = chosen[ConfigKeys.EXCHANGE] or exchange
+    if name and not chosen[ConfigKeys.TEST] and (chosen[ConfigKeys.EXCHANGE] or not chosen["help"]):
+        plugin = get_exchange_plugin(name)
+        if hasattr(plugin, "prep_parser"):
+            plugin.prep_parser(parser)
+    if exchange:
+        parser.set_defaults(**{ConfigKeys.EXCHANGE: exchange})
+
     pargs = vars(parser.parse_args(args=args[1:]))
 
     return pargs
 
-def main(args: list[str]) -> int:
+def main(args: list[str], exchange: str | None = None) -> int:
+    """
+    The single entry point: exchange is the default for --exchange, which exchange scripts run directly set to their own.
+    """
     common_init()
-    pargs = parse_args(args)
+    pargs = parse_args(args, exchange=exchange)
+    if pargs.get(ConfigKeys.LOG_FORMAT) == LogFormat.JSON or pargs.get(ConfigKeys.LOG_QUEUE):
+        configure_logging(json_lines=pargs.get(ConfigKeys.LOG_FORMAT) == LogFormat.JSON, queued=bool(pargs.get(ConfigKeys.LOG_QUEUE)))
+    if pargs.get(ConfigKeys.STRATEGIES):
+        return multi_main(pargs)
+    if pargs.get(ConfigKeys.SWEEP):
+        return sweep_main(pargs)
+    if pargs.get(ConfigKeys.BACKTEST):
+        return backtest_main(pargs)
+    if pargs.get(ConfigKeys.SHARDS) and not pargs[ConfigKeys.TEST]:
+        return shard_main(pargs)
     return test_main(pargs) if pargs[ConfigKeys.TEST] else run_main(pargs)
-
-
-if __name__ == "__main__":
-    from sys import argv
-    exit(main(argv))
-
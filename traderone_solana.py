@@ -0,0 +1,334 @@
+from argparse import ArgumentParser
+from typing import final#, override
+import asyncio
+import traderone as t1
+import aiohttp
+from agentipy import SolanaAgentKit, AgentiConstants
+from solders.pubkey import Pubkey
+
+
+
+@final
+class ConfigKeys():
+    JUPITER_URL = "jupiter_url"
+
+
+
+JUPITER_PRICE_URL = "https://api.jup.ag/price/v2"
+JUPITER_QUOTE_URL = "https://quote-api.jup.ag/v6/quote"
+TOKEN_PROGRAM_IDS: tuple[str, ...] = ("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA", "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb")
+WSOL_MINT = "So11111111111111111111111111111111111111112" # Native SOL is held as lamports, not in a token account, so it is read with getBalance and counted under this mint
+LAMPORTS_PER_SOL: int = 10**9
+
+
+
+class SingleFlight():
+    """
+    Shares one in-flight call among every concurrent caller asking for the same key; once it settles, the next caller starts a new one.
+    """
+    def __init__(self):
+        self.calls: dict = {}
+
+    def _forget_(self, key, call: asyncio.Future) -> None:
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    async def do(self, key, factory):
+        call = self.calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(factory())
+            self.calls[key] = call
+            call.add_done_callback(lambda _: self._forget_(key, call))
+        return await asyncio.shield(call)
+
+    async def do_many(self, keys: list, factory) -> dict:
+        """
+        Like do for keys answered together: keys already in flight join their call, and the rest go out in one new factory(missing keys) call, which returns a dict by key.
+        """
+        calls = {key: self.calls[key] for key in keys if key in self.calls}
+        missing = list(dict.fromkeys(key for key in keys if key not in calls))
+        if missing:
+            new_call = asyncio.ensure_future(factory(missing))
+            for key in missing:
+                self.calls[key] = calls[key] = new_call
+            new_call.add_done_callback(lambda _: [self._forget_(key, new_call) for key in missing])
+        results: dict = {}
+        for call in set(calls.values()):
+            results.update(await asyncio.shield(call))
+        return {key: results[key] for key in keys if key in results}
+
+
+class SolanaRPC():
+    """
+    Request layer under SolanaExchange: one pooled HTTP session for the RPC node and Jupiter, kept across cycles, with concurrent identical requests sharing a single call.
+    jupiter_url replaces Jupiter's hosts, e.g. with a simulator's (see traderone-sim.py).
+    """
+    def __init__(self, provider: str, connections: int = 16, jupiter_url: str | None = None):
+        self.provider: str = provider
+        self.connections: int = connections
+        self.price_url: str = JUPITER_PRICE_URL if jupiter_url is None else jupiter_url.rstrip("/")+"/price/v2"
+        self.quote_url: str = JUPITER_QUOTE_URL if jupiter_url is None else jupiter_url.rstrip("/")+"/v6/quote"
+        self.session: aiohttp.ClientSession | None = None
+        self.session_loop: asyncio.AbstractEventLoop | None = None
+        self.balance_requests: SingleFlight = SingleFlight()
+        self.price_requests: SingleFlight = SingleFlight()
+        self.quote_requests: SingleFlight = SingleFlight()
+        self.decimal_requests: SingleFlight = SingleFlight()
+        self.decimals: dict[str, int] = {}
+
+    def get_provider(self) -> str:
+        return self.provider
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        Opened on first use, and again if closed or if the event loop changed (a session only works on the loop it was opened on).
+        """
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self.session_loop is not loop:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300))
+            self.session_loop = loop
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def fetch_prices(self, mints: list[str]) -> dict[str, float]:
+        """
+        The USD price of every mint Jupiter knows, by mint; mints already being fetched join that request, the rest go out together.
+        """
+        return await self.price_requests.do_many(mints, self._fetch_prices_)
+
+    async def _fetch_prices_(self, mints: list[str]) -> dict[str, float]:
+        async with self.get_session().get(self.price_url, params={"ids": ",".join(mints)}) as response:
+            response.raise_for_status()
+            data = (await response.json()).get("data") or {}
+        return {mint: float(data[mint]["price"]) for mint in mints if data.get(mint)}
+
+    async def get_token_balances(self, owner: str) -> dict[str, float]:
+        """
+        Every token balance owner holds, by mint, from one batched request: getTokenAccountsByOwner over both token programs, and getBalance for its native SOL (under WSOL_MINT, added to any wrapped SOL).
+        """
+        return await self.balance_requests.do(owner, lambda: self._get_token_balances_(owner))
+
+    async def _get_token_balances_(self, owner: str) -> dict[str, float]:
+        requests = [{"jsonrpc": "2.0", "id": i, "method": "getTokenAccountsByOwner", "params": [owner, {"programId": program}, {"encoding": "jsonParsed", "commitment": "confirmed"}]} for i, program in enumerate(TOKEN_PROGRAM_IDS)]
+        requests.append({"jsonrpc": "2.0", "id": len(requests), "method": "getBalance", "params": [owner, {"commitment": "confirmed"}]})
+        async with self.get_session().post(self.get_provider(), json=requests) as response:
+            response.raise_for_status()
+            replies = await response.json()
+        balances: dict[str, float] = {}
+        for reply in replies:
+            method = requests[reply["id"]]["method"]
+            if "error" in reply:
+                raise RuntimeError(f"{method} failed: {reply['error']}")
+            if method == "getBalance":
+                balances[WSOL_MINT] = balances.get(WSOL_MINT, 0) + reply["result"]["value"]/LAMPORTS_PER_SOL
+                continue
+            for account in reply["result"]["value"]:
+                info = account["account"]["data"]["parsed"]["info"]
+                balances[info["mint"]] = balances.get(info["mint"], 0) + float(info["tokenAmount"]["uiAmountString"])
+        return balances
+
+    async def get_decimals(self, mints: list[str]) -> dict[str, int]:
+        """
+        The decimals of every mint, by mint, from one getMultipleAccounts request for those not seen before; they never change, so they are kept for good.
+        """
+        missing = [mint for mint in dict.fromkeys(mints) if mint not in self.decimals]
+        if missing:
+            self.decimals.update(await self.decimal_requests.do_many(missing, self._get_decimals_))
+        return {mint: self.decimals[mint] for mint in mints if mint in self.decimals}
+
+    async def _get_decimals_(self, mints: list[str]) -> dict[str, int]:
+        request = {"jsonrpc": "2.0", "id": 0, "method": "getMultipleAccounts", "params": [mints, {"encoding": "jsonParsed"}]}
+        async with self.get_session().post(self.get_provider(), json=request) as response:
+            response.raise_for_status()
+            reply = await response.json()
+        if "error" in reply:
+            raise RuntimeError(f"getMultipleAccounts failed: {reply['error']}")
+        return {mint: account["data"]["parsed"]["info"]["decimals"] for mint, account in zip(mints, reply["result"]["value"]) if account is not None}
+
+    async def quote_amount_out(self, input_mint: str, output_mint: str, amount: int) -> int:
+        """
+        What Jupiter's best route pays out, in the output mint's raw units, for amount raw units of the input mint.
+        """
+        return await self.quote_requests.do((input_mint, output_mint, amount), lambda: self._quote_amount_out_(input_mint, output_mint, amount))
+
+    async def _quote_amount_out_(self, input_mint: str, output_mint: str, amount: int) -> int:
+        async with self.get_session().get(self.quote_url, params={"inputMint": input_mint, "outputMint": output_mint, "amount": str(amount)}) as response:
+            response.raise_for_status()
+            return int((await response.json())["outAmount"])
+
+
+
+class SolanaExchange(t1.AsyncExchange):
+    tickers: dict[str, Pubkey] = AgentiConstants.TOKENS
+
+    def __init__(self, private_key: str, provider: str | None = None, slippage: int = AgentiConstants.DEFAULT_OPTIONS["SLIPPAGE_BPS"], agent: SolanaAgentKit | None = None, rpc: SolanaRPC | None = None, impact_ttl: float = 0):
+        super().__init__("solana")
+        self.agent = agent if agent is not None else SolanaAgentKit(private_key, provider)
+        self.rpc: SolanaRPC = rpc if rpc is not None else SolanaRPC(provider if provider is not None else self.agent.rpc_url)
+        self.private_key: str = private_key
+        self.slippage: int = slippage
+        self.impacts: t1.PriceImpactCache | None = t1.PriceImpactCache(impact_ttl) if impact_ttl > 0 else None
+
+    def get_address(self) -> str:
+        return str(self.agent.wallet_address)
+
+    def get_auth(self) -> str | None:
+        return self.private_key
+
+    def get_rpc(self) -> SolanaRPC:
+        return self.rpc
+
+    #@override
+    def get_supported_tickers(self) -> list[str]:
+        return list(self.tickers.keys())
+
+    def get_mint(self, ticker: str) -> Pubkey:
+        mint = self.tickers[ticker]
+        return mint if isinstance(mint, Pubkey) else Pubkey.from_string(mint)
+
+    async def fetch_prices(self, tickers: list[str]) -> dict[str, float]:
+        """
+        Fetches the USD price of every ticker in at most one Jupiter request, sharing any already in flight (such as the quote ticker's, when every wallet's rate is wanted at once).
+        """
+        mints = {str(self.get_mint(ticker)): ticker for ticker in tickers}
+        prices = await self.get_rpc().fetch_prices(list(mints.keys()))
+        return {mints[mint]: price for mint, price in prices.items()}
+
+    async def fetch_required_prices(self, tickers: list[str], required: list[str]) -> dict[str, float]:
+        """
+        Same as fetch_prices, but raises a LookupError naming every required ticker Jupiter returned no price for.
+        """
+        prices = await self.fetch_prices(tickers)
+        missing = [ticker for ticker in required if not prices.get(ticker)]
+        if missing:
+            raise LookupError(f"Jupiter returned no price for {', '.join(missing)}")
+        return prices
+
+    #@override
+    async def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        prices = await self.fetch_required_prices([from_ticker, to_ticker], [from_ticker, to_ticker])
+        return prices[to_ticker] / prices[from_ticker]
+
+    #@override
+    async def get_rate_snapshot(self, tickers: list[str], quote: str) -> t1.RateSnapshot:
+        prices = await self.fetch_required_prices([quote, *tickers], [quote])
+        return t1.RateSnapshot(quote, {ticker: prices[quote]/price for ticker, price in prices.items() if ticker != quote and price})
+
+    #@override
+    async def get_fee(self, amount: float, from_wallet: t1.Wallet, to_wallet: t1.Wallet, snapshot: t1.RateSnapshot | None = None) -> float:
+        """
+        The slippage allowed on amount, compounded with its price impact where a fresh curve covers it.
+        """
+        impact = self.get_price_impact(amount, from_wallet.get_ticker(), to_wallet.get_ticker())
+        cost = self.get_slippage_float() if impact is None else 1-(1-impact)*(1-self.get_slippage_float())
+        return (await self.get_rate(from_wallet.get_ticker(), to_wallet.get_ticker(), snapshot))*amount*cost
+
+    #@override
+    async def get_fees(self, trades: list[tuple[float, t1.Wallet, t1.Wallet]], snapshot: t1.RateSnapshot | None = None) -> list[float]:
+        """
+        Samples the price-impact curves the trades still need first, with every Jupiter quote for them in flight at once.
+        """
+        if self.impacts is not None:
+            requests = [(amount, from_wallet.get_ticker(), to_wallet.get_ticker()) for amount, from_wallet, to_wallet in trades]
+            mints = {from_ticker: str(self.get_mint(from_ticker)) for _, from_ticker, _ in requests}
+            decimals = await self.get_rpc().get_decimals(list(mints.values()))
+            samples = self.impacts.get_samples(requests, {ticker: 10**-decimals[mint] for ticker, mint in mints.items() if mint in decimals})
+            if samples:
+                self.impacts.set_samples(samples, await self.read_amounts_out(samples))
+        return list(await asyncio.gather(*(self.get_fee(amount, from_wallet, to_wallet, snapshot) for amount, from_wallet, to_wallet in trades)))
+
+    #@override
+    def get_price_impact(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        return None if self.impacts is None else self.impacts.get_cost(amount, from_ticker, to_ticker)
+
+    async def read_amounts_out(self, quotes: list[tuple[float, str, str]]) -> list[float | None]:
+        """
+        What Jupiter would pay out for each (amount, from_ticker, to_ticker), in to_ticker units; None where a quote failed.
+        """
+        mints = {ticker: str(self.get_mint(ticker)) for _, from_ticker, to_ticker in quotes for ticker in (from_ticker, to_ticker)}
+        decimals = await self.get_rpc().get_decimals(list(mints.values()))
+        async def quote(amount: float, from_ticker: str, to_ticker: str) -> float | None:
+            from_mint, to_mint = mints[from_ticker], mints[to_ticker]
+            if from_mint not in decimals or to_mint not in decimals:
+                return None
+            try:
+                return (await self.get_rpc().quote_amount_out(from_mint, to_mint, max(1, int(amount*10**decimals[from_mint]))))/10**decimals[to_mint]
+            except Exception:
+                return None
+        return list(await asyncio.gather(*(quote(*sample) for sample in quotes)))
+
+    def get_slippage(self) -> int:
+        return self.slippage
+
+    def get_slippage_float(self) -> float:
+        return self.get_slippage()/100/100
+
+    #@override
+    async def trade(self, amount: float, from_wallet: t1.Wallet, to_wallet: t1.Wallet) -> dict | None:
+        out = await self.agent.trade(self.get_mint(to_wallet.get_ticker()), amount, self.get_mint(from_wallet.get_ticker()), slippage_bps=self.get_slippage())
+        return {"hexbytes": out}
+
+    async def get_balance(self, ticker: str) -> float | None:
+        """
+        Every wallet refreshing at once shares one request for all the address's token balances; a mint without a token account holds 0.
+        """
+        balances = await self.get_rpc().get_token_balances(self.get_address())
+        return balances.get(str(self.get_mint(ticker)), 0.0)
+
+
+
+class SolanaWallet(t1.AsyncWallet):
+    __slots__ = ("exchange",)
+
+    def __init__(self, ticker: str, exchange: SolanaExchange):
+        self.exchange: SolanaExchange = exchange
+        super().__init__(ticker, self.exchange.get_address(), self.exchange.get_auth())
+
+    #@override
+    async def get_live_balance(self) -> float | None:
+        return await self.exchange.get_balance(self.get_ticker())
+
+
+
+def get_solana_agent(private_key: str, provider: str | None) -> SolanaAgentKit:
+    """
+    Shares one agent (and its RPC client) per key and provider across every trader in the process.
+    """
+    return t1.get_shared_client("solana", (private_key, provider), lambda: SolanaAgentKit(private_key, provider))
+
+
+def get_solana_rpc(provider: str, jupiter_url: str | None = None) -> SolanaRPC:
+    """
+    Shares one request layer (and its connection pool) per provider across every trader in the process.
+    """
+    return t1.get_shared_client("solana-rpc", (provider, jupiter_url), lambda: SolanaRPC(provider, jupiter_url=jupiter_url))
+
+
+def build_trader(spec: dict) -> t1.AsyncTraderOne:
+    agent = get_solana_agent(spec[t1.ConfigKeys.AUTH], spec.get(t1.ConfigKeys.PROVIDER))
+    exchange: SolanaExchange = SolanaExchange(spec[t1.ConfigKeys.AUTH], spec.get(t1.ConfigKeys.PROVIDER), agent=agent, rpc=get_solana_rpc(spec.get(t1.ConfigKeys.PROVIDER) or agent.rpc_url, spec.get(ConfigKeys.JUPITER_URL)), impact_ttl=spec.get(t1.ConfigKeys.IMPACT_TTL) or 0)
+    tickers = spec.get(t1.ConfigKeys.TICKERS) or exchange.get_supported_tickers()
+    return t1.get_trader_class(spec, is_async=True)(t1.wrap_exchange(exchange, spec), [SolanaWallet(ticker, exchange) for ticker in tickers], **t1.get_trader_kwargs(spec))
+
+
+async def run_main(args: dict) -> int:
+    trader: t1.AsyncTraderOne = t1.attach_state_store(build_trader(args), args)
+    runner: t1.AsyncTraderRunner = t1.AsyncTraderRunner(trader)
+    rpc: SolanaRPC = get_solana_rpc(args.get(t1.ConfigKeys.PROVIDER) or get_solana_agent(args[t1.ConfigKeys.AUTH], args.get(t1.ConfigKeys.PROVIDER)).rpc_url, args.get(ConfigKeys.JUPITER_URL))
+
+    try:
+        return await runner.main_loop(args.get(t1.ConfigKeys.CYCLES, -1))
+    finally:
+        await rpc.close()
+
+
+def prep_parser(parser: ArgumentParser | None = None) -> ArgumentParser:
+    if parser is None:
+        parser = t1.prep_parser()
+
+    parser.add_argument("--"+ConfigKeys.JUPITER_URL, help="Base URL to ask for Jupiter prices and quotes instead of Jupiter's own, e.g. traderone-sim.py's (trades still go through Jupiter)")
+
+    return parser
@@ -0,0 +1,451 @@
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic, time
+from typing import final#, override
+import traderone as t1
+from hexbytes import HexBytes
+from uniswap import Uniswap
+from web3 import Web3
+
+
+
+@final
+class ConfigKeys():
+    VERSION = "version"
+    RECEIPT_TIMEOUT = "receipt_timeout"
+    NO_MULTICALL = "no_multicall"
+    BLOCK_TTL = "block_ttl"
+
+
+
+ORDERED_NONCES: bool = True # Every transaction goes out from one address in nonce order, so --shards refuses this exchange
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI: list[dict] = [{
+        "name": "aggregate3",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [{"name": "calls", "type": "tuple[]", "components": [{"name": "target", "type": "address"}, {"name": "allowFailure", "type": "bool"}, {"name": "callData", "type": "bytes"}]}],
+        "outputs": [{"name": "returnData", "type": "tuple[]", "components": [{"name": "success", "type": "bool"}, {"name": "returnData", "type": "bytes"}]}],
+        }]
+GET_AMOUNTS_IN_SELECTOR: bytes = Web3.keccak(text="getAmountsIn(uint256,address[])")[:4]
+GET_AMOUNTS_OUT_SELECTOR: bytes = Web3.keccak(text="getAmountsOut(uint256,address[])")[:4]
+BALANCE_OF_SELECTOR: bytes = Web3.keccak(text="balanceOf(address)")[:4]
+GET_ETH_BALANCE_SELECTOR: bytes = Web3.keccak(text="getEthBalance(address)")[:4]
+ERC20_ABI: list[dict] = [
+        {"name": "allowance", "type": "function", "stateMutability": "view", "inputs": [{"name": "owner", "type": "address"}, {"name": "spender", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}]},
+        {"name": "approve", "type": "function", "stateMutability": "nonpayable", "inputs": [{"name": "spender", "type": "address"}, {"name": "amount", "type": "uint256"}], "outputs": [{"name": "", "type": "bool"}]},
+        ]
+MAX_APPROVAL: int = 2**256-1
+GAS_MARGIN: float = 1.2 # The same margin the uniswap client adds to its gas estimates
+SWAP_DEADLINE: int = 10*60
+
+
+
+class NonceManagedUniswap(Uniswap):
+    """
+    Hands out nonces from a local counter instead of asking the node for each transaction, so several can be signed and sent at once.
+    A nonce is only taken once a transaction is built and its gas estimated, so one that fails before reaching the node leaves no gap for later ones to wait behind.
+    The counter starts from the node's pending transaction count, and starts from it again after resync_nonce() or a failed send.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nonce_lock: Lock = Lock()
+        self.next_nonce: int | None = None
+
+    def resync_nonce(self) -> None:
+        with self.nonce_lock:
+            self.next_nonce = None
+
+    def send_transaction(self, function, value: int = 0) -> HexBytes:
+        """
+        Builds, signs and sends a contract call from this client's address. Building estimates its gas, so a call that would revert raises before a nonce is taken.
+        Only signing and sending hold the nonce lock, so concurrent callers still quote and estimate in parallel, and nonces reach the node in order.
+        """
+        transaction = function.build_transaction({"from": Web3.to_checksum_address(self.address), "value": value})
+        transaction["gas"] = int(transaction["gas"]*GAS_MARGIN)
+        with self.nonce_lock:
+            if self.next_nonce is None:
+                self.next_nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+            transaction["nonce"] = self.next_nonce
+            signed = self.w3.eth.account.sign_transaction(transaction, private_key=self.private_key)
+            try:
+                tx_hash = self.w3.eth.send_raw_transaction(getattr(signed, "raw_transaction", None) or signed.rawTransaction)
+            except Exception:
+                self.next_nonce = None # Whether the node kept the nonce is unknown, so ask it again
+                raise
+            self.next_nonce += 1
+            return tx_hash
+
+
+
+class UniswapMulticall():
+    """
+    Reads the balance of every ticker in an UniswapExchange's table, and its quote against one ticker, with a single Multicall3 aggregate3 eth_call pinned to one block.
+    What it read is kept until the chain moves past that block, and callers that arrive while a read is under way share it.
+    The block number itself is trusted for block_ttl seconds (well under a block time) before it is asked for again, unless new_block() says the chain has moved.
+    Quotes are Uniswap v2 router getAmountsIn calls, routed the way the uniswap client routes them; v3 quotes go through a quoter that cannot be read this way.
+    """
+    def __init__(self, exchange: "UniswapExchange", address: str = MULTICALL3_ADDRESS, block_ttl: float = 1):
+        self.exchange: UniswapExchange = exchange
+        self.block_ttl: float = block_ttl
+        self.w3: Web3 = exchange.uniswap.w3
+        self.contract = self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=MULTICALL3_ABI)
+        self.lock: Lock = Lock()
+        self.block: int | None = None
+        self.checked: float | None = None
+        self.quote: str | None = None
+        self.rates: dict[str, float] | None = None
+        self.balances: dict[str, int] | None = None
+
+    def invalidate(self) -> None:
+        """
+        Makes the next read go to the node even if the block has not changed, e.g. after trading.
+        """
+        with self.lock:
+            self.block = self.checked = self.rates = self.balances = None
+
+    def new_block(self) -> None:
+        """
+        Makes the next read check the block number again, e.g. when a block filter has seen a new one.
+        """
+        with self.lock:
+            self.checked = None
+
+    def read(self, quote: str | None = None) -> tuple[dict[str, float] | None, dict[str, int]]:
+        """
+        Returns (rates, balances) as of the latest block: rates maps tickers to get_exchange_rate(ticker, quote) (None without a quote) and balances to their raw get_token_balance; tickers whose call failed are left out.
+        Quotes against the last quote asked for are read along with the balances, so the balance refresh that starts a cycle also reads that cycle's snapshot.
+        """
+        asked = monotonic()
+        with self.lock:
+            if self.checked is None or (self.checked < asked and asked-self.checked >= self.block_ttl):
+                checked = monotonic()
+                block = self.w3.eth.block_number
+                if block != self.block:
+                    self.block, self.rates, self.balances = block, None, None
+                self.checked = checked
+            if quote is not None and quote != self.quote:
+                self.quote, self.rates = quote, None
+            if self.balances is None or (self.rates is None and self.quote is not None):
+                self._read_()
+            return (self.rates if quote is not None else None), self.balances
+
+    def _read_(self) -> None:
+        tickers = self.exchange.tickers
+        owner = Web3.to_checksum_address(self.exchange.uniswap.address)
+        reads: list[tuple[bool, str]] = []
+        calls: list[tuple[str, bool, bytes]] = []
+        if self.balances is None:
+            for ticker, (address, _) in tickers.items():
+                if int(address, 16) == 0:
+                    calls.append((self.contract.address, True, GET_ETH_BALANCE_SELECTOR+self.w3.codec.encode(["address"], [owner])))
+                else:
+                    calls.append((Web3.to_checksum_address(address), True, BALANCE_OF_SELECTOR+self.w3.codec.encode(["address"], [owner])))
+                reads.append((False, ticker))
+        if self.rates is None and self.quote is not None:
+            router = self.exchange.uniswap.router.address
+            for ticker, (_, unit) in tickers.items():
+                if ticker != self.quote:
+                    calls.append((router, True, GET_AMOUNTS_IN_SELECTOR+self.w3.codec.encode(["uint256", "address[]"], [unit, self.exchange.get_path(ticker, self.quote)])))
+                    reads.append((True, ticker))
+        results = self.contract.functions.aggregate3(calls).call(block_identifier=self.block)
+        balances: dict[str, int] = {}
+        rates: dict[str, float] = {}
+        for (is_rate, ticker), (success, data) in zip(reads, results):
+            if not success:
+                continue
+            if is_rate:
+                rates[ticker] = self.w3.codec.decode(["uint256[]"], data)[0][0]/tickers[self.quote][1]
+            else:
+                balances[ticker] = self.w3.codec.decode(["uint256"], data)[0]
+        if self.balances is None:
+            self.balances = balances
+        if self.rates is None and self.quote is not None:
+            self.rates = rates
+
+    def read_amounts_out(self, quotes: list[tuple[float, str, str]]) -> list[float | None]:
+        """
+        What the router would pay out for each (amount, from_ticker, to_ticker), in to_ticker units, with one aggregate3 eth_call; None where a quote failed.
+        """
+        tickers = self.exchange.tickers
+        router = self.exchange.uniswap.router.address
+        calls = [(router, True, GET_AMOUNTS_OUT_SELECTOR+self.w3.codec.encode(["uint256", "address[]"], [max(1, int(amount*tickers[from_ticker][1])), self.exchange.get_path(from_ticker, to_ticker)])) for amount, from_ticker, to_ticker in quotes]
+        results = self.contract.functions.aggregate3(calls).call()
+        return [self.w3.codec.decode(["uint256[]"], data)[0][-1]/tickers[to_ticker][1] if success else None for (_, _, to_ticker), (success, data) in zip(quotes, results)]
+
+
+class UniswapExchange(t1.Exchange):
+    tickers: dict[str, tuple[str, int]] = {
+            "eth": ("0x0000000000000000000000000000000000000000", 10**18),
+            "bat": ("0x0D8775F648430679A709E98d2b0Cb6250d2887EF", 10**18),
+            "dai": ("0x6B175474E89094C44Da98b954EedeAC495271d0F", 10**18),
+            }
+
+    def __init__(self, address: str, private_key: str, provider: str, version: int = 2, uniswap: Uniswap | None = None, receipt_timeout: float = 120, multicall: bool = True, impact_ttl: float = 0, block_ttl: float = 1):
+        super().__init__("uniswap")
+        self.uniswap = uniswap if uniswap is not None else NonceManagedUniswap(address=address, private_key=private_key, version=version, provider=provider)
+        self.receipt_timeout: float = receipt_timeout
+        self.sends_swaps: bool = isinstance(self.uniswap, NonceManagedUniswap) and self.uniswap.version == 2
+        self.weth: str | None = None
+        self.approved: set[str] = set()
+        self.approval_lock: Lock = Lock()
+        self.multicall: UniswapMulticall | None = UniswapMulticall(self, block_ttl=block_ttl) if multicall and self.uniswap.version == 2 else None
+        self.impacts: t1.PriceImpactCache | None = t1.PriceImpactCache(impact_ttl) if impact_ttl > 0 else None
+
+    def get_address(self) -> str:
+        return str(self.uniswap.address)
+
+    def get_auth(self) -> str | None:
+        return self.uniswap.private_key
+
+    #@override
+    def get_supported_tickers(self) -> list[str]:
+        return list(self.tickers.keys())
+
+    #@override
+    def get_exchange_rate(self, from_ticker: str, to_ticker: str) -> float:
+        return self.uniswap.get_price_output(self.tickers[from_ticker][0], self.tickers[to_ticker][0], self.tickers[from_ticker][1])/self.tickers[to_ticker][1]
+
+    #@override
+    def get_rate_snapshot(self, tickers: list[str], quote: str) -> t1.RateSnapshot:
+        """
+        Reads every quote in one multicall, shared with the cycle's balance reads and free until the next block; on v3, quotes every ticker against quote concurrently instead, so a snapshot costs one round-trip of wall time.
+        Tickers the multicall could not quote are left out, so get_rate quotes them on their own.
+        """
+        if self.multicall is not None:
+            rates, _ = self.multicall.read(quote)
+            return t1.RateSnapshot(quote, {ticker: rates[ticker] for ticker in dict.fromkeys(tickers) if ticker != quote and ticker in rates})
+        pending = [ticker for ticker in dict.fromkeys(tickers) if ticker != quote]
+        if not pending:
+            return t1.RateSnapshot(quote, {})
+        with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+            rates = dict(zip(pending, pool.map(lambda ticker: self.get_exchange_rate(ticker, quote), pending)))
+        return t1.RateSnapshot(quote, rates)
+
+    #@override
+    def subscribe_prices(self, tickers: list[str], reference: str, interval: float = 1) -> t1.PriceFeed:
+        feed = UniswapBlockPriceFeed(self, tickers, reference, interval)
+        feed.start()
+        return feed
+
+    #@override
+    def get_fee(self, amount: float, from_wallet: t1.Wallet, to_wallet: t1.Wallet, snapshot: t1.RateSnapshot | None = None) -> float:
+        """
+        The taker fee on amount, compounded with its price impact where a fresh curve covers it, in to_wallet's ticker like every exchange's fees.
+        """
+        impact = self.get_price_impact(amount, from_wallet.get_ticker(), to_wallet.get_ticker())
+        cost = self.uniswap.get_fee_taker() if impact is None else 1-(1-impact)*(1-self.uniswap.get_fee_taker())
+        return self.get_rate(from_wallet.get_ticker(), to_wallet.get_ticker(), snapshot)*amount*cost
+
+    #@override
+    def get_fees(self, trades: list[tuple[float, t1.Wallet, t1.Wallet]], snapshot: t1.RateSnapshot | None = None) -> list[float]:
+        """
+        Samples the price-impact curves the trades still need first, all in one multicall where there is one.
+        """
+        if self.impacts is not None:
+            samples = self.impacts.get_samples([(amount, from_wallet.get_ticker(), to_wallet.get_ticker()) for amount, from_wallet, to_wallet in trades], {ticker: 1/unit for ticker, (_, unit) in self.tickers.items()})
+            if samples:
+                self.impacts.set_samples(samples, self.read_amounts_out(samples))
+        return [self.get_fee(amount, from_wallet, to_wallet, snapshot) for amount, from_wallet, to_wallet in trades]
+
+    #@override
+    def get_price_impact(self, amount: float, from_ticker: str, to_ticker: str) -> float | None:
+        return None if self.impacts is None else self.impacts.get_cost(amount, from_ticker, to_ticker)
+
+    def read_amounts_out(self, quotes: list[tuple[float, str, str]]) -> list[float | None]:
+        """
+        Like UniswapMulticall.read_amounts_out, quoting each concurrently where there is no multicall (or it failed).
+        """
+        if self.multicall is not None:
+            try:
+                return self.multicall.read_amounts_out(quotes)
+            except Exception as e:
+                t1.logger.warning("Multicall quotes failed, quoting one at a time: %r", e)
+        def quote(amount: float, from_ticker: str, to_ticker: str) -> float | None:
+            try:
+                return self.uniswap.get_price_input(self.tickers[from_ticker][0], self.tickers[to_ticker][0], max(1, int(amount*self.tickers[from_ticker][1])))/self.tickers[to_ticker][1]
+            except Exception:
+                return None
+        with ThreadPoolExecutor(max_workers=len(quotes)) as pool:
+            return list(pool.map(lambda sample: quote(*sample), quotes))
+
+    def get_path(self, from_ticker: str, to_ticker: str) -> list[str]:
+        """
+        The router path from one ticker to another, through WETH the way the uniswap client routes v2 swaps.
+        """
+        if self.weth is None:
+            self.weth = Web3.to_checksum_address(self.uniswap.get_weth_address())
+        from_address, to_address = (Web3.to_checksum_address(self.tickers[ticker][0]) for ticker in (from_ticker, to_ticker))
+        if int(from_address, 16) == 0:
+            return [self.weth, to_address]
+        if int(to_address, 16) == 0:
+            return [from_address, self.weth]
+        return [from_address, self.weth, to_address]
+
+    def approve(self, token: str) -> None:
+        """
+        Gives the router unlimited approval of token unless it already has it, waiting for the approval to be mined so the swap after it can be estimated.
+        """
+        with self.approval_lock:
+            if token in self.approved:
+                return
+            contract = self.uniswap.w3.eth.contract(address=token, abi=ERC20_ABI)
+            router = self.uniswap.router.address
+            if contract.functions.allowance(Web3.to_checksum_address(self.uniswap.address), router).call() < MAX_APPROVAL//2:
+                self.uniswap.w3.eth.wait_for_transaction_receipt(self.uniswap.send_transaction(contract.functions.approve(router, MAX_APPROVAL)), timeout=self.receipt_timeout)
+            self.approved.add(token)
+
+    def swap(self, amount: int, from_ticker: str, to_ticker: str) -> HexBytes:
+        """
+        Sends a v2 router swap of exactly amount (in raw units) of from_ticker, accepting down to the client's default slippage below what the router quotes for it now.
+        """
+        path = self.get_path(from_ticker, to_ticker)
+        router = self.uniswap.router.functions
+        minimum = int(router.getAmountsOut(amount, path).call()[-1]*(1-self.uniswap.default_slippage))
+        owner = Web3.to_checksum_address(self.uniswap.address)
+        deadline = int(time())+SWAP_DEADLINE
+        if int(self.tickers[from_ticker][0], 16) == 0:
+            return self.uniswap.send_transaction(router.swapExactETHForTokens(minimum, path, owner, deadline), amount)
+        self.approve(path[0])
+        if int(self.tickers[to_ticker][0], 16) == 0:
+            return self.uniswap.send_transaction(router.swapExactTokensForETH(amount, minimum, path, owner, deadline))
+        return self.uniswap.send_transaction(router.swapExactTokensForTokens(amount, minimum, path, owner, deadline))
+
+    #@override
+    def trade(self, amount: float, from_wallet: t1.Wallet, to_wallet: t1.Wallet) -> dict | None:
+        """
+        Swaps through swap() where this exchange assigns its own nonces, and through the uniswap client's make_trade otherwise (v3, or a client passed in).
+        """
+        from_ticker, to_ticker = from_wallet.get_ticker(), to_wallet.get_ticker()
+        if self.sends_swaps:
+            out = self.swap(int(amount*self.tickers[from_ticker][1]), from_ticker, to_ticker)
+        else:
+            out = self.uniswap.make_trade(self.tickers[from_ticker][0], self.tickers[to_ticker][0], int(amount*self.tickers[from_ticker][1]))
+        if self.multicall is not None:
+            self.multicall.invalidate()
+        return {"hexbytes": out}
+
+    def confirm(self, out: dict) -> dict:
+        """
+        Waits for the receipt of a trade's transaction and records whether it succeeded.
+        """
+        receipt = self.uniswap.w3.eth.wait_for_transaction_receipt(out["hexbytes"], timeout=self.receipt_timeout)
+        return {**out, "receipt": receipt, t1.Transaction.TAG_COMPLETED: receipt["status"] == 1}
+
+    def _submit_(self, trade: tuple[float, t1.Wallet, t1.Wallet]) -> dict:
+        try:
+            return self.trade(*trade)
+        except Exception as e:
+            return {"error": repr(e), t1.Transaction.TAG_COMPLETED: False}
+
+    def _confirm_(self, out: dict) -> dict:
+        if "hexbytes" not in out:
+            return out
+        try:
+            return self.confirm(out)
+        except Exception as e:
+            return {**out, "error": repr(e), t1.Transaction.TAG_COMPLETED: False}
+
+    #@override
+    def trade_many(self, trades: list[tuple[float, t1.Wallet, t1.Wallet]]) -> list[dict | None]:
+        """
+        Signs and sends every trade at once with locally assigned nonces, each waiting for its own receipt as soon as it is sent.
+        Without them (see trade) the uniswap client picks each nonce itself, which is only safe one send at a time, so trades are sent in turn and only their receipts awaited together.
+        Each result carries its transaction hash and receipt, or the error it failed with; after any failure the nonce counter is resynced with the node.
+        """
+        if not trades:
+            return []
+        with ThreadPoolExecutor(max_workers=len(trades)) as pool:
+            if self.sends_swaps:
+                results = list(pool.map(lambda trade: self._confirm_(self._submit_(trade)), trades))
+            else:
+                results = list(pool.map(self._confirm_, [self._submit_(trade) for trade in trades]))
+        if self.sends_swaps and any(not result.get(t1.Transaction.TAG_COMPLETED, False) for result in results):
+            self.uniswap.resync_nonce()
+        if self.multicall is not None:
+            self.multicall.invalidate()
+        return results
+
+    def get_balance(self, ticker: str):
+        """
+        Read with every other balance in one multicall where there is one, and quoted on its own otherwise (or if that read failed for it).
+        """
+        if self.multicall is not None:
+            balance = self.multicall.read()[1].get(ticker)
+            if balance is not None:
+                return balance
+        return self.uniswap.get_token_balance(self.tickers[ticker][0])
+
+
+class UniswapBlockPriceFeed(t1.PollingPriceFeed):
+    """
+    Watches for new blocks through an eth_newBlockFilter subscription, checked every interval seconds, and only re-quotes when one has arrived.
+    Pool prices can only change between blocks, so this stays current without quoting every ticker on every poll.
+    """
+    def __init__(self, exchange: UniswapExchange, tickers: list[str], reference: str, interval: float = 1):
+        super().__init__(exchange, tickers, reference, interval)
+        self.block_filter = None
+
+    #@override
+    def poll(self) -> None:
+        if self.block_filter is None:
+            self.block_filter = self.exchange.uniswap.w3.eth.filter("latest")
+            self.refresh()
+        else:
+            try:
+                blocks = self.block_filter.get_new_entries()
+            except Exception:
+                self.block_filter = None # Nodes drop filters they consider idle; subscribe again on the next poll
+                raise
+            if blocks:
+                if self.exchange.multicall is not None:
+                    self.exchange.multicall.new_block()
+                self.refresh()
+
+
+class UniswapWallet(t1.Wallet):
+    __slots__ = ("exchange",)
+
+    def __init__(self, ticker: str, exchange: UniswapExchange):
+        self.exchange: UniswapExchange = exchange
+        super().__init__(ticker, self.exchange.get_address(), self.exchange.get_auth())
+
+    #@override
+    def get_live_balance(self) -> float | None:
+        return self.exchange.get_balance(self.get_ticker())
+
+
+
+def get_uniswap_client(address: str, private_key: str, provider: str, version: int = 2) -> Uniswap:
+    """
+    Shares one Web3 connection per provider, and one Uniswap client per address on it, across every trader in the process.
+    """
+    web3 = t1.get_shared_client("web3", (provider,), lambda: Web3(Web3.HTTPProvider(provider)))
+    return t1.get_shared_client("uniswap", (address, provider, version), lambda: NonceManagedUniswap(address=address, private_key=private_key, version=version, provider=provider, web3=web3))
+
+
+def build_trader(spec: dict) -> t1.TraderOne:
+    version = spec.get(ConfigKeys.VERSION) or 2
+    exchange: UniswapExchange = UniswapExchange(spec[t1.ConfigKeys.ADDRESS], spec[t1.ConfigKeys.AUTH], spec[t1.ConfigKeys.PROVIDER], version, get_uniswap_client(spec[t1.ConfigKeys.ADDRESS], spec[t1.ConfigKeys.AUTH], spec[t1.ConfigKeys.PROVIDER], version), spec.get(ConfigKeys.RECEIPT_TIMEOUT) or 120, not spec.get(ConfigKeys.NO_MULTICALL), spec.get(t1.ConfigKeys.IMPACT_TTL) or 0, spec.get(ConfigKeys.BLOCK_TTL) if spec.get(ConfigKeys.BLOCK_TTL) is not None else 1)
+    tickers = spec.get(t1.ConfigKeys.TICKERS) or exchange.get_supported_tickers()
+    return t1.get_trader_class(spec)(t1.wrap_exchange(exchange, spec), [UniswapWallet(ticker, exchange) for ticker in tickers], **t1.get_trader_kwargs(spec))
+
+
+def run_main(args: dict) -> int:
+    trader: t1.TraderOne = t1.attach_state_store(build_trader(args), args)
+    runner: t1.TraderRunner = t1.TraderRunner(trader)
+
+    return runner.main_loop(args.get(t1.ConfigKeys.CYCLES, -1))
+
+
+def prep_parser(parser: ArgumentParser | None = None) -> ArgumentParser:
+    if parser is None:
+        parser = t1.prep_parser()
+
+    parser.add_argument("--"+ConfigKeys.RECEIPT_TIMEOUT, help="Seconds to wait for each batched trade's receipt", type=float)
+    parser.add_argument("--"+ConfigKeys.NO_MULTICALL, help="Read quotes and balances with one call each instead of batching them through Multicall3 (for chains without it)", action="store_true")
+    parser.add_argument("--"+ConfigKeys.BLOCK_TTL, help="Seconds a multicall trusts the last block number before asking the node again (default 1; 0 asks on every read, for chains with sub-second blocks)", type=float)
+
+    return parser
+